@@ -1,40 +1,78 @@
-from flask import Flask, g, session, request, url_for
 import os
+
+from flask import Flask, g, session, request
+from jinja2 import FileSystemBytecodeCache
+from werkzeug.middleware.proxy_fix import ProxyFix
 from app.routes import main
-from app.config import Config
+from app.config import config_for
 from app.extensions import db
+from app import assets, auth, cache, i18n, login_security, instrumentation, rollups, search
+from app.commands import register_commands
 from app.i18n import get_translator, LANGUAGES
 
-def create_app():
+def create_app(profile: str = None):
+    """Build the app with config profile ``profile`` (development, production, test; default env APP_PROFILE)."""
     app = Flask(__name__)
-    # Load configuration
-    app.config.from_object(Config)
-    # Ensure template changes show immediately during development
-    app.config['TEMPLATES_AUTO_RELOAD'] = True
-    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
+    # Load configuration (TEMPLATES_AUTO_RELOAD / SEND_FILE_MAX_AGE_DEFAULT per profiel)
+    app.config.from_object(config_for(profile))
+    if app.config.get('JINJA_BYTECODE_CACHE'):
+        # Gecompileerde templates op schijf: een nieuwe worker hoeft ze niet opnieuw te parsen.
+        # Moet vóór het eerste gebruik van app.jinja_env gezet zijn.
+        cache_dir = app.config.get('JINJA_CACHE_DIR') or os.path.join(app.instance_path, 'jinja-cache')
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(cache_dir)}
+
+    hops = app.config.get('TRUSTED_PROXY_HOPS', 0)
+    if hops:
+        # Achter een proxy: remote_addr en scheme uit X-Forwarded-* (o.a. voor de login-limiet)
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
 
-    # Initialize extensions
+    # Initialize extensions (instrumentation first: it picks the engine's pool class)
+    instrumentation.init_app(app)
     db.init_app(app)
+    cache.init_app(app)
+    auth.init_app(app)
+    login_security.init_app(app)
+    i18n.init_app(app)
+    # Static URLs met content-hash (manifest bij het opstarten, geen stat per render)
+    assets.init_app(app)
 
     # Register blueprints
     app.register_blueprint(main)
+    register_commands(app)
 
-    # Create tables in dev; for production use migrations
     with app.app_context():
-        # Be resilient: don't crash the app if the target DB (e.g., Supabase pooler) rejects DDL
-        try:
-            db.create_all()
-        except Exception as e:
-            print(f"create_all skipped due to error: {e}")
+        # Create tables in dev; for production use migrations
+        if app.config.get('CREATE_ALL', True):
+            # Be resilient: don't crash the app if the target DB (e.g., Supabase pooler) rejects DDL
+            try:
+                db.create_all()
+            except Exception as e:
+                print(f"create_all skipped due to error: {e}")
+        # Oudere SQLite-databases: zoekkolom en FTS-tabellen aanvullen (create_all wijzigt geen tabellen)
+        if db.engine.dialect.name == 'sqlite':
+            search.upgrade_sqlite()
         # Log a safe summary of the active DB connection (no secrets)
-        try:
-            url = db.engine.url
-            driver = getattr(url, 'drivername', 'unknown')
-            host = getattr(url, 'host', None)
-            database = getattr(url, 'database', None)
-            print(f"SQLAlchemy connected: driver={driver} host={host} db={database}")
-        except Exception:
-            pass
+        if app.config.get('LOG_DB_INFO', True):
+            try:
+                url = db.engine.url
+                driver = getattr(url, 'drivername', 'unknown')
+                host = getattr(url, 'host', None)
+                database = getattr(url, 'database', None)
+                print(f"SQLAlchemy connected: driver={driver} host={host} db={database}")
+            except Exception:
+                pass
+
+    if app.config.get('PRELOAD'):
+        _preload(app)
+        # `gunicorn --preload` forkt na create_app: geen open verbindingen of threads meegeven aan de workers
+        with app.app_context():
+            db.engine.dispose()
+    else:
+        assets.start_watcher(app)
+
+    # Verlopen verhuringen worden buiten het request-pad afgesloten, door één apart proces
+    # (`flask rental-sweeper`) of cron; workers en CLI-commando's starten geen sweeper
 
     # --- i18n wiring (simple dictionary-based) ---
     @app.before_request
@@ -50,31 +88,19 @@ def create_app():
     @app.context_processor
     def _inject_i18n():
         def static_or(filename: str, fallback_url: str):
-            """Return url_for('static', filename) if file exists, else fallback_url.
+            """Return the fingerprinted static URL of filename if it exists, else fallback_url.
             Allows using local images when provided, with network fallback otherwise.
             """
-            try:
-                path = os.path.join(app.static_folder, filename.replace('/', os.sep))
-                if os.path.isfile(path):
-                    # Cache-bust with file mtime to avoid stale images
-                    mtime = int(os.path.getmtime(path))
-                    return url_for('static', filename=filename, v=mtime)
-            except Exception:
-                pass
-            return fallback_url
+            return assets.manifest.url(filename) or fallback_url
 
         def static_first(filenames, fallback_url: str = None):
             """Return the first existing static file URL from a list, else fallback_url.
             Example: static_first(['img/home/logo-nl.svg','img/logo-nl.svg'], url_for('static', filename='img/logo.svg'))
             """
             for name in filenames or []:
-                try:
-                    path = os.path.join(app.static_folder, name.replace('/', os.sep))
-                    if os.path.isfile(path):
-                        mtime = int(os.path.getmtime(path))
-                        return url_for('static', filename=name, v=mtime)
-                except Exception:
-                    continue
+                url = assets.manifest.url(name)
+                if url:
+                    return url
             return fallback_url
         return {
             't': getattr(g, 't', lambda s: s),
@@ -86,6 +112,14 @@ def create_app():
 
     return app
 
+
+def _preload(app):
+    """Compile every template and build the translators now instead of on the first requests."""
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(name)
+    for lang in LANGUAGES:
+        get_translator(lang)
+
 if __name__ == "__main__":
     app = create_app()
     app.run(debug=True)
@@ -0,0 +1,119 @@
+"""
+Grouped aggregate queries for the dashboard.
+
+Every helper below answers a whole group of dashboard questions with a single
+``GROUP BY`` / conditional ``SUM(CASE ...)`` round trip, instead of issuing one
+COUNT per status or type. Date-bounded counters ("added today", "this month")
+are the exception: a predicate inside ``SUM(CASE ...)`` is evaluated per row of
+a full scan, so they get their own query with the range in ``WHERE`` where it
+can search ``ix_bike_created_at``, ``ix_member_created_at`` and
+``ix_payment_paid_at``. Per-day/week chart series live in ``app/timeseries.py``.
+"""
+from datetime import date, timedelta
+from typing import Dict, Any
+
+from sqlalchemy import func, case, and_, or_
+
+from app.dateranges import date_range, on_day
+from app.extensions import db
+from app.models import Bike, Member, Child, Rental, Payment, BIKE_STATUSES
+
+
+def _count_if(condition):
+    return func.sum(case((condition, 1), else_=0))
+
+
+def _sum_if(condition, value):
+    return func.sum(case((condition, value), else_=0))
+
+
+def _count_where(entity, *criteria) -> int:
+    return int(db.session.query(func.count()).select_from(entity).filter(*criteria).scalar() or 0)
+
+
+def bike_summary(today: date) -> Dict[str, Any]:
+    """Totals per status, per type and 'added today' for non-archived bikes (2 queries)."""
+    rows = db.session.query(
+        Bike.type,
+        Bike.status,
+        _count_if(Bike.archived == False),
+    ).group_by(Bike.type, Bike.status).all()
+    new_today = _count_where(Bike, on_day(Bike.created_at, today), Bike.archived == False)
+
+    by_status = {s: 0 for s in BIKE_STATUSES}
+    by_type: Dict[str, Dict[str, int]] = {}
+    total = 0
+    for bike_type, status, count in rows:
+        count = int(count or 0)
+        total += count
+        if status in by_status:
+            by_status[status] += count
+        # Types that only exist on archived bikes still get a (zero) category
+        cat = by_type.setdefault(bike_type or 'Onbekend', {s: 0 for s in ['total'] + BIKE_STATUSES})
+        cat['total'] += count
+        if status in cat:
+            cat[status] += count
+
+    categories = [
+        {'name': name.title(), 'total': c['total'], 'available': c['available'],
+         'rented': c['rented'], 'repair': c['repair']}
+        for name, c in sorted(by_type.items())
+    ]
+    return {'total': total, 'by_status': by_status, 'new_today': new_today, 'categories': categories}
+
+
+def member_summary(today: date) -> Dict[str, int]:
+    """Member totals, active/new counts and overdue (no payment in a year) in 2 queries."""
+    month_start = today.replace(day=1)
+    one_year_ago = today - timedelta(days=365)
+    total, active, overdue = db.session.query(
+        func.count(Member.member_id),
+        _count_if(Member.status == 'active'),
+        _count_if(and_(
+            Member.status == 'active',
+            or_(Member.last_payment == None, Member.last_payment < one_year_ago),
+        )),
+    ).one()
+    new_this_month = _count_where(Member, date_range(Member.created_at, month_start))
+    return {
+        'total': int(total or 0),
+        'active': int(active or 0),
+        'new_this_month': new_this_month,
+        'overdue': int(overdue or 0),
+    }
+
+
+def child_summary() -> Dict[str, int]:
+    """Total children and how many of them currently have an active rental (1 query)."""
+    renting = db.session.query(Rental.child_id) \
+        .filter(Rental.status == 'active', Rental.child_id != None) \
+        .distinct().subquery()
+    total, with_bike = db.session.query(
+        func.count(Child.child_id),
+        func.count(renting.c.child_id),
+    ).outerjoin(renting, renting.c.child_id == Child.child_id).one()
+    return {'total': int(total or 0), 'with_bike': int(with_bike or 0)}
+
+
+def payment_summary(today: date) -> Dict[str, float]:
+    """Revenue this month and totals per payment method (2 queries)."""
+    month_start = today.replace(day=1)
+    this_month = db.session.query(func.sum(Payment.amount)) \
+        .filter(date_range(Payment.paid_at, month_start)).scalar()
+    cash, card, bank = db.session.query(
+        _sum_if(Payment.method == 'cash', Payment.amount),
+        _sum_if(Payment.method == 'card', Payment.amount),
+        _sum_if(and_(Payment.method == 'bank_transfer', Payment.received == True), Payment.amount),
+    ).one()
+    return {
+        'this_month': this_month or 0,
+        'cash': float(cash or 0),
+        'card': float(card or 0),
+        'bank': float(bank or 0),
+    }
+
+
+def rental_status_counts() -> Dict[str, int]:
+    """Number of rentals per status (1 query)."""
+    rows = db.session.query(Rental.status, func.count(Rental.rental_id)).group_by(Rental.status).all()
+    return {status: int(count) for status, count in rows}
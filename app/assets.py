@@ -0,0 +1,176 @@
+"""
+Static asset manifest: file -> content hash, for fingerprinted static URLs.
+
+The manifest is built once at startup. ``static/manifest.json`` (written by
+``flask --app run assets-manifest`` at deploy time) saves the hashing: its
+entry is reused when the file's size and mtime still match, any other file is
+hashed again. After that ``static_or`` /
+``static_first`` and ``url_for('static', ...)`` are dict lookups: every static
+URL gets ``?v=<hash>`` and no request touches the filesystem to build one.
+
+A request whose ``v`` matches the current hash is answered with a far-future
+``Cache-Control: public, max-age=31536000, immutable``; a changed file gets a
+new hash and thus a new URL. Other static requests keep
+``SEND_FILE_MAX_AGE_DEFAULT``.
+
+With ``STATIC_WATCH_INTERVAL`` > 0 (development) a daemon thread rehashes the
+static folder every so many seconds when a file was added, removed or changed.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from flask import request, url_for
+
+log = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+FAR_FUTURE = 365 * 24 * 3600
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _walk(folder: str):
+    for root, _, names in os.walk(folder):
+        for name in names:
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, folder).replace(os.sep, '/')
+            if rel != MANIFEST_NAME:
+                yield rel, path
+
+
+def _stat(path: str) -> tuple:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def build(folder: str, known: Dict[str, dict] = None) -> Dict[str, dict]:
+    """``{path: {'hash', 'size', 'mtime_ns'}}`` for every file under ``folder``; keys are URL paths.
+
+    Entries of ``known`` whose size and mtime still match are reused, other files are hashed.
+    """
+    known = known or {}
+    files = {}
+    for rel, path in sorted(_walk(folder)):
+        size, mtime_ns = _stat(path)
+        entry = known.get(rel)
+        if not (isinstance(entry, dict) and entry.get('size') == size and entry.get('mtime_ns') == mtime_ns):
+            entry = {'hash': _hash_file(path), 'size': size, 'mtime_ns': mtime_ns}
+        files[rel] = entry
+    return files
+
+
+def write(folder: str) -> Dict[str, dict]:
+    files = build(folder)
+    with open(os.path.join(folder, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(files, f, indent=1, sort_keys=True)
+    return files
+
+
+def _snapshot(folder: str) -> Dict[str, tuple]:
+    # Goedkope vergelijking voor de watcher: grootte en mtime, zonder te hashen
+    snapshot = {}
+    for rel, path in _walk(folder):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        snapshot[rel] = (st.st_size, st.st_mtime_ns)
+    return snapshot
+
+
+class StaticManifest:
+    def __init__(self):
+        self.folder = None
+        self.files: Dict[str, str] = {}
+        self._entries: Dict[str, dict] = {}
+        # Verhoogt bij elke (her)lading; caches met static URLs erin nemen dit op in hun sleutel
+        self.generation = 0
+
+    def _set(self, entries: Dict[str, dict]):
+        self.files = {rel: entry['hash'] for rel, entry in entries.items()}
+        self._entries = entries
+        self.generation += 1
+
+    def load(self, folder: str):
+        """Hash the static folder, reusing ``folder/manifest.json`` for files whose size and mtime match.
+
+        A manifest left over from an earlier deploy can thus never hand out an old hash
+        for a changed file (which would then be cached as immutable for a year).
+        """
+        self.folder = folder
+        known = {}
+        path = os.path.join(folder, MANIFEST_NAME)
+        if os.path.isfile(path):
+            with open(path, encoding='utf-8') as f:
+                known = json.load(f)
+        self._set(build(folder, known) if os.path.isdir(folder) else {})
+
+    def rebuild(self):
+        self._set(build(self.folder, self._entries))
+
+    def version(self, filename: str) -> Optional[str]:
+        return self.files.get(filename)
+
+    def url(self, filename: str) -> Optional[str]:
+        """Fingerprinted URL of ``filename``, or None when it is not a static file."""
+        return url_for('static', filename=filename) if filename in self.files else None
+
+
+manifest = StaticManifest()
+
+
+def init_app(app):
+    manifest.load(app.static_folder)
+
+    @app.url_defaults
+    def _fingerprint_static(endpoint, values):
+        if endpoint == 'static' and 'v' not in values:
+            version = manifest.version(values.get('filename'))
+            if version:
+                values['v'] = version
+
+    @app.after_request
+    def _cache_fingerprinted(response):
+        if request.endpoint == 'static' and response.status_code in (200, 304):
+            version = manifest.version((request.view_args or {}).get('filename'))
+            if version and request.args.get('v') == version:
+                response.cache_control.public = True
+                response.cache_control.max_age = FAR_FUTURE
+                response.cache_control.immutable = True
+        return response
+
+
+def _watch_loop(interval: int, stop: threading.Event):
+    seen = _snapshot(manifest.folder)
+    while not stop.wait(interval):
+        try:
+            current = _snapshot(manifest.folder)
+            if current != seen:
+                manifest.rebuild()
+                seen = current
+                log.info('Static manifest rebuilt (%s files)', len(manifest.files))
+        except Exception:
+            log.exception('Static watcher failed')
+
+
+def start_watcher(app) -> threading.Event:
+    """Rehash the static folder on changes every ``STATIC_WATCH_INTERVAL`` seconds (0 = off).
+
+    Called by ``create_app`` except when it preloads (no threads before a fork).
+    """
+    stop = threading.Event()
+    interval = app.config.get('STATIC_WATCH_INTERVAL', 0)
+    if interval and interval > 0 and manifest.folder and os.path.isdir(manifest.folder):
+        thread = threading.Thread(target=_watch_loop, args=(interval, stop), name='static-watcher', daemon=True)
+        thread.start()
+    return stop
@@ -0,0 +1,122 @@
+"""
+The logged-in user, resolved once per request.
+
+``current_principal()`` turns ``session['user_id']`` into ``g.principal``: a
+small read-only snapshot of the user (id, role, name, e-mail). Snapshots are
+kept in an in-process LRU with a TTL (``PRINCIPAL_CACHE_SIZE`` /
+``PRINCIPAL_CACHE_TTL``), so the auth decorators cost no query on warm
+requests.
+
+A committed change to a user (role, password, name, deletion) evicts that
+user; bulk ``update()``/``delete()`` statements on ``user`` clear the cache.
+Like the stats cache this is per worker process: other workers pick up the
+change within the TTL.
+"""
+from flask import g, session
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.cache import LRUCache
+from app.extensions import db
+from app.models import User
+
+_EVICT_KEY = 'principal_cache_evict'
+_CLEAR_ALL = object()
+
+principal_cache = LRUCache()
+
+
+class Principal:
+    __slots__ = ('user_id', 'role', 'first_name', 'last_name', 'email')
+
+    def __init__(self, user_id, role, first_name, last_name, email):
+        self.user_id = user_id
+        self.role = role
+        self.first_name = first_name
+        self.last_name = last_name
+        self.email = email
+
+    def has_role(self, *roles) -> bool:
+        return self.role in roles
+
+    def can_access_finance(self) -> bool:
+        return self.role in ['finance_manager', 'admin']
+
+    def can_access_depot(self) -> bool:
+        return self.role in ['depot_manager', 'admin']
+
+
+def init_app(app):
+    principal_cache.maxsize = app.config.get('PRINCIPAL_CACHE_SIZE', 512)
+    principal_cache.ttl = app.config.get('PRINCIPAL_CACHE_TTL', 300)
+    principal_cache.clear()
+
+    @app.before_request
+    def _reset_principal():
+        # g kan een request overleven (bv. een al gepushte app context in tests)
+        g.pop('principal', None)
+
+
+def remember(user):
+    """Seed the cache right after login, so the first page after it needs no user query."""
+    principal = Principal(user.user_id, user.role, user.first_name, user.last_name, user.email)
+    principal_cache.set(user.user_id, principal)
+    return principal
+
+
+def load_principal(user_id):
+    """Principal for ``user_id`` from the cache or one column query; None if the user no longer exists."""
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        row = db.session.query(User.user_id, User.role, User.first_name, User.last_name, User.email) \
+            .filter(User.user_id == user_id).first()
+        if row is None:
+            return None
+        principal = Principal(*row)
+        principal_cache.set(user_id, principal)
+    return principal
+
+
+def current_principal():
+    """Principal of this request (memoized in ``g``), or None when not logged in."""
+    if 'principal' not in g:
+        user_id = session.get('user_id')
+        g.principal = load_principal(user_id) if user_id else None
+    return g.principal
+
+
+# --- Invalidatie via SQLAlchemy session events (pas na commit) ---
+
+def _pending(session):
+    return session.info.setdefault(_EVICT_KEY, set())
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, User) and (obj in session.deleted or session.is_modified(obj)):
+            _pending(session).add(obj.user_id)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_user_changes(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, User):
+            _pending(orm_execute_state.session).add(_CLEAR_ALL)
+
+
+@event.listens_for(Session, 'after_commit')
+def _evict_on_commit(session):
+    evict = session.info.pop(_EVICT_KEY, None)
+    if not evict:
+        return
+    if _CLEAR_ALL in evict:
+        principal_cache.clear()
+    else:
+        principal_cache.evict(*evict)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _reset_on_rollback(session):
+    session.info.pop(_EVICT_KEY, None)
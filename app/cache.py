@@ -0,0 +1,218 @@
+"""
+Small in-process caches: a TTL cache for expensive read-only helpers (dashboard
+statistics) and a bounded LRU for per-key lookups (the logged-in user, see app/auth.py).
+
+Statistics expire after ``STATS_CACHE_TTL`` seconds, at most ``STATS_CACHE_SIZE``
+results are kept, and all are dropped as soon as a session commits a write to one of the models the statistics are built from.
+A result whose computation overlapped such a commit is returned but not stored.
+
+Invalidation only reaches the process that committed the write: the cache lives
+per worker, and other workers keep serving their entry until it expires, so the
+TTL bounds how stale another worker can be after a write it did not see.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import Bike, Rental, Payment, Member, Child
+
+# Modellen waarvan een wijziging de dashboard-cijfers ongeldig maakt
+TRACKED_MODELS = (Bike, Rental, Payment, Member, Child)
+
+_DIRTY_FLAG = 'stats_cache_dirty'
+
+
+class TTLCache:
+    """Cache for memoized helpers: entries expire after ``ttl`` seconds, at most ``maxsize`` are
+    kept (least recently used dropped first) since keys can contain user input."""
+
+    def __init__(self, ttl: float = 60, maxsize: int = 256, clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        # Verhoogt bij elke invalidate(); een berekening die er één overlapte wordt niet bewaard
+        self.generation = 0
+
+    def _purge_expired(self, now):
+        expired = [key for key, (expires, _) in self._data.items() if expires <= now]
+        for key in expired:
+            del self._data[key]
+        self.evictions += len(expired)
+
+    def get_or_set(self, key, factory):
+        """Return the cached value for ``key`` or compute, store and return ``factory()``.
+
+        ``factory()`` runs outside the lock; when ``invalidate()`` ran in the meantime the
+        value may predate that write and is returned without being stored.
+        """
+        if self.ttl <= 0 or self.maxsize <= 0:
+            self.misses += 1
+            return factory()
+        now = self._clock()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            generation = self.generation
+        value = factory()
+        with self._lock:
+            if generation != self.generation:
+                return value
+            self._data[key] = (now + self.ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._purge_expired(now)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def memoize(self, name: str):
+        """Decorator: cache a function per (name, today, args). Today is part of the key
+        so date-relative figures roll over at midnight."""
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                key = (name, date.today(), args, tuple(sorted(kwargs.items())))
+                return self.get_or_set(key, lambda: f(*args, **kwargs))
+            return wrapper
+        return decorator
+
+    def invalidate(self):
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+            self.generation += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'ttl': self.ttl,
+            'maxsize': self.maxsize,
+            'size': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 3) if total else 0.0,
+            'invalidations': self.invalidations,
+            'evictions': self.evictions,
+        }
+
+
+class LRUCache:
+    """Bounded per-key cache: least recently used entries are dropped beyond ``maxsize``,
+    entries expire after ``ttl`` seconds and can be evicted one by one."""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 300, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Cached value for ``key``, or None when missing or expired."""
+        if self.ttl <= 0 or self.maxsize <= 0:
+            self.misses += 1
+            return None
+        now = self._clock()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def evict(self, *keys):
+        with self._lock:
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self.evictions += len(self._data)
+            self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'size': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 3) if total else 0.0,
+            'evictions': self.evictions,
+        }
+
+
+stats_cache = TTLCache()
+
+
+def init_app(app):
+    stats_cache.ttl = app.config.get('STATS_CACHE_TTL', 60)
+    stats_cache.maxsize = app.config.get('STATS_CACHE_SIZE', 256)
+    stats_cache.invalidate()
+
+
+# --- Invalidatie via SQLAlchemy session events ---
+# after_flush / do_orm_execute markeren de sessie, after_commit wist de cache pas
+# wanneer de wijziging echt zichtbaar is voor andere requests.
+
+@event.listens_for(Session, 'after_flush')
+def _mark_dirty_on_flush(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, TRACKED_MODELS):
+            session.info[_DIRTY_FLAG] = True
+            return
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_dirty_on_bulk(orm_execute_state):
+    # Query.update()/delete() en ORM insert()/update()/delete() statements passeren de flush niet
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, TRACKED_MODELS):
+            orm_execute_state.session.info[_DIRTY_FLAG] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop(_DIRTY_FLAG, False):
+        stats_cache.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _reset_on_rollback(session):
+    session.info.pop(_DIRTY_FLAG, None)
@@ -0,0 +1,124 @@
+"""
+Flask CLI commands (``flask --app run <command>``), meant for cron and maintenance.
+"""
+from datetime import timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import assets, imports, maintenance, search, tasks
+
+
+@click.command('expire-rentals')
+@with_appcontext
+def expire_rentals_command():
+    """Expire active rentals whose end date has passed."""
+    expired = tasks.expire_past_due_rentals()
+    click.echo(f'Expired rentals: {expired}')
+
+
+@click.command('rental-sweeper')
+@click.option('--interval', type=click.IntRange(min=1), help='Seconds between passes (default: RENTAL_SWEEP_INTERVAL, else 3600).')
+@click.option('--once', is_flag=True, help='Run one pass and exit.')
+@with_appcontext
+def rental_sweeper_command(interval, once):
+    """Run the rental sweeper in the foreground; start it in exactly one process."""
+    app = current_app._get_current_object()
+    if once:
+        tasks.sweep(app)
+        click.echo('Sweep done.')
+        return
+    interval = interval or app.config.get('RENTAL_SWEEP_INTERVAL') or 3600
+    click.echo(f'Rental sweeper running every {interval}s (Ctrl+C to stop)')
+    tasks.run_sweeper(app, interval)
+
+
+@click.command('refresh-daily-stats')
+@click.option('--from', 'start', type=click.DateTime(['%Y-%m-%d']), help='First day (default: first rental/payment).')
+@click.option('--to', 'end', type=click.DateTime(['%Y-%m-%d']), help='Last day, inclusive (default: today).')
+@with_appcontext
+def refresh_daily_stats_command(start, end):
+    """Backfill or repair the daily_stats rollup."""
+    stop = end.date() + timedelta(days=1) if end else None
+    days = tasks.refresh_daily_stats(start.date() if start else None, stop)
+    click.echo(f'Refreshed days: {days}')
+
+
+@click.command('expiring-digest')
+@click.option('--date', 'day', type=click.DateTime(['%Y-%m-%d']), help='Snapshot day (default: today).')
+@click.option('--outbox', type=click.Path(file_okay=False), help='Outbox directory (default: NOTIFY_OUTBOX_DIR).')
+@with_appcontext
+def expiring_digest_command(day, outbox):
+    """Snapshot rentals expiring within 7/14/30 days and write one digest per parent."""
+    result = tasks.send_expiring_digest(day.date() if day else None, outbox)
+    click.echo(f"Expiring rentals: {result['rentals']}, digests: {result['digests']} -> {result['path']}")
+
+
+@click.command('reindex-search')
+@with_appcontext
+def reindex_search_command():
+    """Recompute the normalized search text of all members and children."""
+    counts = search.reindex()
+    click.echo(', '.join(f'{name}: {count}' for name, count in counts.items()))
+
+
+@click.command('import-data')
+@click.argument('kind', type=click.Choice(list(imports.KINDS)))
+@click.argument('source', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--format', 'fmt', type=click.Choice(imports.FORMATS), help='Default: from the file extension.')
+@click.option('--chunk-size', type=click.IntRange(min=1), help='Rows per INSERT and commit (default: IMPORT_CHUNK_SIZE).')
+@click.option('--dry-run', is_flag=True, help='Validate and resolve members only, write nothing.')
+@with_appcontext
+def import_data_command(kind, source, fmt, chunk_size, dry_run):
+    """Bulk import members, children, bikes or payments from CSV or JSONL (SOURCE may be -)."""
+    result = imports.run_import(kind, source, fmt or imports.detect_format(source.name), chunk_size, dry_run)
+    for line, message in result.errors:
+        click.echo(f'line {line}: {message}', err=True)
+    if result.error_count > len(result.errors):
+        click.echo(f'... {result.error_count - len(result.errors)} more errors', err=True)
+    verb = 'Valid' if dry_run else 'Inserted'
+    click.echo(f'{verb} {kind}: {result.inserted} of {result.rows} rows, errors: {result.error_count}')
+
+
+@click.command('maint')
+@click.argument('task', type=click.Choice(list(maintenance.TASKS)))
+@click.option('--chunk-size', type=click.IntRange(min=1), default=maintenance.DEFAULT_CHUNK_SIZE, show_default=True,
+              help='Rows per statement and commit.')
+@click.option('--dry-run', is_flag=True, help='Only count the rows each step would change.')
+@click.option('--restart', is_flag=True, help='Ignore the saved position of an interrupted run.')
+@click.option('--yes', is_flag=True, help='Do not ask for confirmation (destructive tasks).')
+@with_appcontext
+def maint_command(task, chunk_size, dry_run, restart, yes):
+    """Run a chunked, set-based maintenance task (resumes an interrupted run)."""
+    spec = maintenance.TASKS[task]
+    click.echo(spec.help)
+    if dry_run:
+        for step, rows in maintenance.count(task).items():
+            click.echo(f'{step}: {rows} rows would change')
+        return
+    if spec.destructive and not yes:
+        click.confirm(f'{task} cannot be undone. Continue?', abort=True)
+    totals = maintenance.run(task, chunk_size, restart,
+                             progress=lambda step, done: click.echo(f'  {step}: {done} rows'))
+    click.echo('Done: ' + ', '.join(f'{step}={rows}' for step, rows in totals.items()))
+
+
+@click.command('assets-manifest')
+@with_appcontext
+def assets_manifest_command():
+    """Hash the static files into static/manifest.json (run at deploy time)."""
+    files = assets.write(current_app.static_folder)
+    assets.manifest.load(current_app.static_folder)
+    click.echo(f'Static files: {len(files)} -> {assets.MANIFEST_NAME}')
+
+
+def register_commands(app):
+    app.cli.add_command(expire_rentals_command)
+    app.cli.add_command(rental_sweeper_command)
+    app.cli.add_command(refresh_daily_stats_command)
+    app.cli.add_command(expiring_digest_command)
+    app.cli.add_command(reindex_search_command)
+    app.cli.add_command(import_data_command)
+    app.cli.add_command(maint_command)
+    app.cli.add_command(assets_manifest_command)
@@ -8,6 +8,34 @@ if not os.getenv('DATABASE_URL'):
     load_dotenv('.env.example')
 
 
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def engine_options(database_uri: str) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS from DB_* env vars.
+
+    Pool sizing only applies to server databases; SQLite keeps SQLAlchemy's defaults.
+    """
+    if database_uri.startswith('sqlite'):
+        return {}
+    options = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '5')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+        # Supabase pooler sluit idle verbindingen; recycle ruim daarvoor
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+    }
+    statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '0'))
+    if statement_timeout > 0 and database_uri.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
+
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret')
     # Always prefer env var; now that we auto-load .env.example, this should resolve to Supabase on a fresh clone
@@ -16,5 +44,116 @@ class Config:
     if SQLALCHEMY_DATABASE_URI.startswith('postgres://'):
         SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace('postgres://', 'postgresql+psycopg2://', 1)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Token voor /internal/metrics (header X-Metrics-Token); admins mogen altijd
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    # Queries trager dan dit (ms) worden gelogd met de route erbij (0 = uit)
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+    # Overschrijden van een @query_budget faalt de request i.p.v. enkel te loggen (altijd aan in tests)
+    QUERY_BUDGET_STRICT = _env_bool('QUERY_BUDGET_STRICT', False)
+    # Seconden dat dashboard-statistieken gecachet blijven (0 = cache uit)
+    STATS_CACHE_TTL = int(os.getenv('STATS_CACHE_TTL', '60'))
+    # Max. aantal gecachete resultaten (o.a. per gevraagde periode van /api/dashboard/timeseries)
+    STATS_CACHE_SIZE = int(os.getenv('STATS_CACHE_SIZE', '256'))
+    # Interval (seconden) van de sweeper die verlopen verhuringen afsluit. Die draait enkel in het
+    # proces dat `flask --app run rental-sweeper` start; 0 = uit, draai dan `expire-rentals` via cron.
+    RENTAL_SWEEP_INTERVAL = int(os.getenv('RENTAL_SWEEP_INTERVAL', '0'))
+    # Dagelijkse rollup (daily_stats) bijhouden bij commits en gebruiken voor grafieken
+    DAILY_STATS_ROLLUP = _env_bool('DAILY_STATS_ROLLUP', True)
+    # Map voor de dagelijkse digest (.eml + digest.json); standaard instance/outbox
+    NOTIFY_OUTBOX_DIR = os.getenv('NOTIFY_OUTBOX_DIR')
+    NOTIFY_FROM = os.getenv('NOTIFY_FROM', 'noreply@opwielekes.be')
+    # Seconden dat de browser /api/lookup/* antwoorden (private) mag hergebruiken
+    LOOKUP_MAX_AGE = int(os.getenv('LOOKUP_MAX_AGE', '30'))
+    # Ingelogde gebruiker (rol, naam) per worker gecachet: max. aantal gebruikers en seconden (0 = uit)
+    PRINCIPAL_CACHE_SIZE = int(os.getenv('PRINCIPAL_CACHE_SIZE', '512'))
+    PRINCIPAL_CACHE_TTL = int(os.getenv('PRINCIPAL_CACHE_TTL', '300'))
+    # Werkzeug-hashmethode met parameters, bv. 'scrypt:32768:8:1' of 'pbkdf2:sha256:600000'.
+    # Oudere hashes worden bij een geslaagde login automatisch herberekend.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    # Loginpogingen (token bucket): alle pogingen per IP, mislukte per (IP, account) en per account over
+    # alle IP's heen; aantal ineens en aanvulling per minuut. De accountbucket vult snel bij zodat een
+    # aanval vanaf veel adressen de eigenaar hooguit enkele seconden laat wachten.
+    LOGIN_IP_BURST = int(os.getenv('LOGIN_IP_BURST', '20'))
+    LOGIN_IP_PER_MINUTE = float(os.getenv('LOGIN_IP_PER_MINUTE', '10'))
+    LOGIN_ACCOUNT_BURST = int(os.getenv('LOGIN_ACCOUNT_BURST', '5'))
+    LOGIN_ACCOUNT_PER_MINUTE = float(os.getenv('LOGIN_ACCOUNT_PER_MINUTE', '1'))
+    LOGIN_EMAIL_BURST = int(os.getenv('LOGIN_EMAIL_BURST', '50'))
+    LOGIN_EMAIL_PER_MINUTE = float(os.getenv('LOGIN_EMAIL_PER_MINUTE', '10'))
+    # Aantal reverse proxies (nginx, load balancer) vóór de app waarvan X-Forwarded-For/-Proto
+    # vertrouwd wordt; 0 = rechtstreeks verbonden. Nodig voor de IP-buckets hierboven.
+    TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '0'))
+    # Max. aantal IP's/accounts dat per worker bijgehouden wordt
+    LOGIN_LIMITER_SIZE = int(os.getenv('LOGIN_LIMITER_SIZE', '10000'))
+    # Extra vertaalcatalogi (<lang>.json of <lang>/LC_MESSAGES/messages.mo); standaard app/translations
+    I18N_CATALOG_DIR = os.getenv('I18N_CATALOG_DIR')
+    # Gerenderde statische template-blokken (navigatie) per taal en rol: max. aantal en seconden (0 = uit)
+    FRAGMENT_CACHE_SIZE = int(os.getenv('FRAGMENT_CACHE_SIZE', '256'))
+    FRAGMENT_CACHE_TTL = int(os.getenv('FRAGMENT_CACHE_TTL', '300'))
+    # Development: static map elke zoveel seconden controleren en het manifest herberekenen (0 = uit)
+    STATIC_WATCH_INTERVAL = int(os.getenv('STATIC_WATCH_INTERVAL', '0'))
+    # Rijen per INSERT + commit bij `flask import-data` en /api/import
+    IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))
+    # Maximale uploadgrootte (bytes) voor /api/import
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', str(64 * 1024 * 1024)))
+
+
+
+
+# --- Profielen (APP_PROFILE of create_app(profile)) ---
+# development: templates herladen, create_all bij het opstarten, engine-info loggen.
+# production: geen auto-reload (geen stat per render), Jinja-bytecodecache, geen create_all
+#   (schema via migrations/), templates en vertalers vooraf geladen in create_app zodat
+#   `gunicorn --preload` dat één keer in de master doet. Daarna sluit create_app de pool
+#   en start het geen threads, zodat de workers na de fork niets delen.
+# test: in-memory SQLite, geen achtergrond-threads, create_all.
+
+class DevelopmentConfig(Config):
+    TEMPLATES_AUTO_RELOAD = True
+    SEND_FILE_MAX_AGE_DEFAULT = 0
+    CREATE_ALL = True
+    LOG_DB_INFO = True
+    JINJA_BYTECODE_CACHE = False
+    PRELOAD = False
+
+
+class ProductionConfig(Config):
+    TEMPLATES_AUTO_RELOAD = False
+    # Static URLs met ?v=<hash> krijgen toch een jaar; dit geldt enkel voor de rest
+    SEND_FILE_MAX_AGE_DEFAULT = int(os.getenv('STATIC_MAX_AGE', '3600'))
+    CREATE_ALL = _env_bool('CREATE_ALL', False)
+    LOG_DB_INFO = False
+    JINJA_BYTECODE_CACHE = True
+    # Standaard instance/jinja-cache
+    JINJA_CACHE_DIR = os.getenv('JINJA_CACHE_DIR')
+    PRELOAD = True
+    STATIC_WATCH_INTERVAL = 0
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    RENTAL_SWEEP_INTERVAL = 0
+    STATIC_WATCH_INTERVAL = 0
+    TEMPLATES_AUTO_RELOAD = False
+    SEND_FILE_MAX_AGE_DEFAULT = 0
+    CREATE_ALL = True
+    LOG_DB_INFO = False
+    JINJA_BYTECODE_CACHE = False
+    PRELOAD = False
+
+
+PROFILES = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'test': TestConfig,
+}
 
 
+def config_for(profile: str = None):
+    """Config class for ``profile`` (default: env APP_PROFILE, else development)."""
+    name = (profile or os.getenv('APP_PROFILE') or 'development').strip().lower()
+    if name not in PROFILES:
+        raise ValueError(f"unknown APP_PROFILE '{name}' (expected: {', '.join(PROFILES)})")
+    return PROFILES[name]
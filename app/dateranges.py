@@ -0,0 +1,33 @@
+"""
+Index-friendly date predicates.
+
+Wrapping a column in ``func.date()`` hides it from its index and forces a full
+scan. These helpers compare the raw column against half-open bounds instead
+(``column >= start AND column < stop``), converting the bounds to datetimes for
+DateTime columns so one call works for both ``Date`` and ``DateTime`` columns.
+"""
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import and_
+from sqlalchemy.types import DateTime
+
+
+def _bound(column, day: date):
+    if isinstance(column.type, DateTime) and not isinstance(day, datetime):
+        return datetime.combine(day, time.min)
+    return day
+
+
+def date_range(column, start: date = None, stop: date = None):
+    """``start <= column < stop``; either bound may be omitted."""
+    clauses = []
+    if start is not None:
+        clauses.append(column >= _bound(column, start))
+    if stop is not None:
+        clauses.append(column < _bound(column, stop))
+    return and_(*clauses)
+
+
+def on_day(column, day: date):
+    """Rows whose date (or timestamp) falls on ``day``."""
+    return date_range(column, day, day + timedelta(days=1))
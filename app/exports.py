@@ -0,0 +1,129 @@
+"""
+Streaming exports of the payments and rentals overviews.
+
+The export reuses the list query of the page (same filters, same order) but
+selects only the exported columns and iterates it with ``yield_per``: on
+PostgreSQL that is a server-side cursor, so rows are fetched in batches of
+``EXPORT_BATCH_SIZE`` while the response is already being sent.
+
+- CSV is written per batch into a chunked response; the first bytes go out
+  after the first batch and memory does not grow with the number of rows.
+- XLSX needs the optional ``openpyxl`` package. Its write-only workbook
+  streams the sheet to a temporary file; that file is sent in chunks once
+  complete (an .xlsx is a zip, it cannot be sent before it is finished).
+"""
+import csv
+import io
+import tempfile
+from datetime import date
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import func, literal
+
+from app.models import Bike, Child, Member, Payment, Rental
+from app.pagination import ordering
+
+EXPORT_BATCH_SIZE = 1000
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# (kolomtitel, SQL-expressie); de volgorde is die van het bestand
+PAYMENT_COLUMNS = [
+    ('Datum', Payment.paid_at),
+    ('Voornaam', Member.first_name),
+    ('Achternaam', Member.last_name),
+    ('E-mail', Member.email),
+    ('Methode', Payment.method),
+    ('Bedrag', Payment.amount),
+    ('Ontvangen', Payment.received),
+    ('Betaling ID', Payment.payment_id),
+]
+
+RENTAL_COLUMNS = [
+    ('Status', Rental.status),
+    ('Startdatum', Rental.start_date),
+    ('Einddatum', Rental.end_date),
+    ('Fiets', Bike.name),
+    ('Type', Bike.type),
+    ('Kind', func.trim(func.coalesce(Child.first_name, '') + literal(' ') + func.coalesce(Child.last_name, ''))),
+    ('Lid', func.trim(func.coalesce(Member.first_name, '') + literal(' ') + func.coalesce(Member.last_name, ''))),
+    ('E-mail', Member.email),
+    ('Verhuring ID', Rental.rental_id),
+]
+
+
+def available_formats() -> List[str]:
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return ['csv']
+    return list(FORMATS)
+
+
+def rows(query, columns: Sequence[Tuple[str, object]], keys: Sequence, batch_size: int = EXPORT_BATCH_SIZE):
+    """Iterate ``columns`` of an ORM list ``query`` in the order of its keyset ``keys``, ``batch_size`` rows per fetch."""
+    select = query.with_entities(*[expr.label(f'c{i}') for i, (_, expr) in enumerate(columns)]) \
+        .order_by(None).order_by(*ordering(keys))
+    return select.execution_options(yield_per=batch_size)
+
+
+# Excel/LibreOffice lezen een cel die hiermee begint als formule (CSV-injectie)
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _text(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _cell(value):
+    if isinstance(value, bool):
+        return 'ja' if value else 'nee'
+    if isinstance(value, date):
+        return value.isoformat()
+    return '' if value is None else _text(value)
+
+
+def csv_chunks(header: Sequence[str], records: Iterable, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """CSV text in chunks of ``batch_size`` rows; starts with a BOM so Excel reads UTF-8."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    for n, record in enumerate(records, 1):
+        writer.writerow([_cell(v) for v in record])
+        if n % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def xlsx_chunks(header: Sequence[str], records: Iterable, title: str, chunk_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    sheet.append(list(header))
+    for record in records:
+        sheet.append(['' if v is None else _text(v) for v in record])
+    with tempfile.TemporaryFile() as f:
+        workbook.save(f)
+        f.seek(0)
+        while True:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                break
+            yield chunk
+
+
+def export(fmt: str, query, columns, keys, title: str) -> Iterator:
+    """Generator over the file contents of ``query`` in ``fmt``; iterate it inside the request context."""
+    header = [name for name, _ in columns]
+    records = rows(query, columns, keys)
+    if fmt == 'xlsx':
+        return xlsx_chunks(header, records, title)
+    return csv_chunks(header, records)
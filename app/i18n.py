@@ -2,7 +2,17 @@
 # Usage in templates: {{ t('Home') }}
 # Add new keys as Dutch source strings; provide FR translations below.
 
-from typing import Callable
+import gettext
+import json
+import os
+import threading
+from typing import Callable, Dict
+
+from flask import g, has_request_context
+from markupsafe import Markup
+
+from app import assets
+from app.cache import LRUCache
 
 LANGUAGES = ['nl', 'fr']
 
@@ -298,6 +308,7 @@ TRANSLATIONS = {
         'Deze maand': 'Ce mois',
         'Zoek op lid': 'Rechercher par membre',
         'Zoek op naam lid': 'Rechercher par nom de membre',
+        'beste treffers getoond': 'meilleurs résultats affichés',
         'Datum': 'Date',
         'Lid': 'Membre',
         'Bedrag': 'Montant',
@@ -338,6 +349,7 @@ TRANSLATIONS = {
         'Je moet inloggen om deze pagina te bekijken.': 'Vous devez vous connecter pour voir cette page.',
         'Je hebt geen toegang tot deze pagina.': "Vous n'avez pas accès à cette page.",
         'Ongeldige inloggegevens.': 'Identifiants invalides.',
+        'Te veel pogingen, probeer later opnieuw.': 'Trop de tentatives, réessayez plus tard.',
         'Fiets verwijderd.': 'Vélo supprimé.',
         'Kan lid niet verwijderen met actieve verhuring.': 'Impossible de supprimer un membre avec une location active.',
         'Lid verwijderd.': 'Membre supprimé.',
@@ -353,15 +365,99 @@ TRANSLATIONS = {
         # Rental cancel confirm
         'Weet je zeker dat je deze verhuring wilt annuleren? De verhuring verdwijnt en de fiets wordt beschikbaar.': 'Êtes-vous sûr de vouloir annuler cette location ? La location sera supprimée et le vélo redeviendra disponible.',
         'Verhuring annuleren': 'Annuler la location',
+        # Paginering
+        'Paginering': 'Pagination',
+        'Vorige': 'Précédent',
+        'Volgende': 'Suivant',
+        # Kiezers verhuurformulier
+        'Zoek op naam of e-mail': 'Rechercher par nom ou e-mail',
+        'Meer leden': 'Plus de membres',
+        'Naam begint met': 'Le nom commence par',
+        'Meer fietsen': 'Plus de vélos',
+        'Exporteer': 'Exporter',
     },
     'nl': {}
 }
 
 
-def get_translator(lang: str) -> Callable[[str], str]:
-    mapping = TRANSLATIONS.get(lang, {})
+# --- Vertalers ---
+# Eén vertaler per taal per proces, gebouwd bij het eerste gebruik en daarna hergebruikt.
+# Naast TRANSLATIONS kunnen catalogi in I18N_CATALOG_DIR staan (standaard app/translations):
+# <lang>.json (een plat object bron -> vertaling) of <lang>/LC_MESSAGES/messages.mo (gettext).
+# Ze worden pas gelezen wanneer de taal voor het eerst gevraagd wordt en overschrijven TRANSLATIONS.
+
+_catalog_dir = os.path.join(os.path.dirname(__file__), 'translations')
+_translators: Dict[str, Callable[[str], str]] = {}
+_lock = threading.Lock()
+
+
+def _load_catalog(lang: str) -> Dict[str, str]:
+    mapping = {}
+    path = os.path.join(_catalog_dir, f'{lang}.json')
+    if os.path.isfile(path):
+        with open(path, encoding='utf-8') as f:
+            mapping.update(json.load(f))
+    path = os.path.join(_catalog_dir, lang, 'LC_MESSAGES', 'messages.mo')
+    if os.path.isfile(path):
+        with open(path, 'rb') as f:
+            # Header-entry ('' -> metadata) niet als vertaling gebruiken
+            mapping.update((k, v) for k, v in gettext.GNUTranslations(f)._catalog.items()
+                           if isinstance(k, str) and k)
+    return mapping
+
+
+def _compile(lang: str) -> Callable[[str], str]:
+    mapping = {**TRANSLATIONS.get(lang, {}), **_load_catalog(lang)}
+    if not mapping:
+        return _identity
+    get = mapping.get
 
     def t(s: str) -> str:
-        return mapping.get(s, s)
+        return get(s, s)
 
     return t
+
+
+def _identity(s: str) -> str:
+    return s
+
+
+def get_translator(lang: str) -> Callable[[str], str]:
+    translator = _translators.get(lang)
+    if translator is None:
+        if lang not in LANGUAGES:
+            return _identity
+        with _lock:
+            translator = _translators.get(lang) or _compile(lang)
+            _translators[lang] = translator
+    return translator
+
+
+def init_app(app):
+    global _catalog_dir
+    _catalog_dir = app.config.get('I18N_CATALOG_DIR') or _catalog_dir
+    _translators.clear()
+    fragment_cache.maxsize = app.config.get('FRAGMENT_CACHE_SIZE', 256)
+    fragment_cache.ttl = app.config.get('FRAGMENT_CACHE_TTL', 300)
+    fragment_cache.clear()
+    app.jinja_env.globals['cached_fragment'] = cached_fragment
+
+
+# --- Fragmentcache ---
+# Statische blokken (zoals de navigatie in base.html) worden per taal en sleutel één keer
+# gerenderd. Het blok mag enkel afhangen van de taal en van wat in de sleutel zit:
+#   {% call cached_fragment('sidebar', session.get('user_role'), request.endpoint) %}...{% endcall %}
+# FRAGMENT_CACHE_TTL=0 zet de cache uit (handig bij het aanpassen van templates).
+
+fragment_cache = LRUCache(maxsize=256, ttl=300)
+
+
+def cached_fragment(name: str, *key, caller) -> Markup:
+    lang = getattr(g, 'lang', 'nl') if has_request_context() else 'nl'
+    # Met de manifest-generatie: static URLs in het blok volgen een herberekend manifest
+    cache_key = (name, lang, assets.manifest.generation) + key
+    html = fragment_cache.get(cache_key)
+    if html is None:
+        html = Markup(caller())
+        fragment_cache.set(cache_key, html)
+    return html
@@ -0,0 +1,338 @@
+"""
+Bulk import of members, children, bikes and payments from CSV or JSONL.
+
+Rows are read one at a time from the stream, validated, and written in chunks
+of ``IMPORT_CHUNK_SIZE`` rows: one multi-row INSERT (executemany) and one commit
+per chunk, so memory is bounded by the chunk size whatever the file size.
+Invalid rows are reported with their line number and skipped; the rest of the
+chunk is still inserted.
+
+ORM bulk inserts skip mapper events, so the importer fills in what those would
+have done: ``search_text`` for members and children, and for payments the
+daily_stats days and ``Member.last_payment``.
+
+Children and payments refer to their member with ``member_id`` or
+``member_email``; the references of a chunk are resolved with one query.
+"""
+import csv
+import json
+import math
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import bindparam, func, insert, or_, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import rollups
+from app.extensions import db
+from app.models import (
+    Bike, Child, Member, Payment, gen_uuid,
+    BIKE_STATUSES, BIKE_TYPES, MEMBER_STATUSES, PAYMENT_METHODS,
+)
+from app.search import normalize
+
+FORMATS = ('csv', 'jsonl')
+DEFAULT_CHUNK_SIZE = 1000
+# Enkel de eerste fouten bijhouden; het totaal blijft wel geteld
+MAX_REPORTED_ERRORS = 100
+
+_TRUE = ('1', 'true', 'yes', 'ja', 'on')
+_FALSE = ('0', 'false', 'no', 'nee', 'off')
+
+
+class ImportResult:
+    def __init__(self, kind: str, dry_run: bool = False):
+        self.kind = kind
+        self.dry_run = dry_run
+        self.rows = 0
+        self.inserted = 0
+        self.error_count = 0
+        self.errors: List[Tuple[int, str]] = []
+
+    def add_error(self, line: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def as_dict(self) -> dict:
+        return {
+            'kind': self.kind,
+            'dry_run': self.dry_run,
+            'rows': self.rows,
+            'inserted': self.inserted,
+            'error_count': self.error_count,
+            'errors': [{'line': line, 'error': message} for line, message in self.errors],
+        }
+
+
+def detect_format(filename: str) -> str:
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def read_rows(stream, fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield ``(line, row, error)`` per record of a text stream; keys are lowercased, blanks become None."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for raw in reader:
+            yield reader.line_num, {k.strip().lower(): _blank(v) for k, v in raw.items() if k}, None
+        return
+    for line, text in enumerate(stream, 1):
+        if not text.strip():
+            continue
+        try:
+            raw = json.loads(text)
+        except ValueError as e:
+            yield line, None, f'ongeldige JSON: {e}'
+            continue
+        if not isinstance(raw, dict):
+            yield line, None, 'verwacht een JSON-object per regel'
+            continue
+        yield line, {str(k).strip().lower(): _blank(v) for k, v in raw.items()}, None
+
+
+def _blank(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+# --- Veldvalidatie ---
+
+def _text(row, key, required=False, max_length=None):
+    value = row.get(key)
+    if value is None:
+        if required:
+            raise ValueError(f'{key} ontbreekt')
+        return None
+    value = str(value)
+    if max_length and len(value) > max_length:
+        raise ValueError(f'{key} is langer dan {max_length} tekens')
+    return value
+
+
+def _choice(row, key, choices, default):
+    value = row.get(key)
+    if value is None:
+        return default
+    value = str(value).lower()
+    if value not in choices:
+        raise ValueError(f"{key} '{value}' is ongeldig (verwacht: {', '.join(choices)})")
+    return value
+
+
+def _bool(row, key, default):
+    value = row.get(key)
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    value = str(value).lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError(f"{key} '{value}' is geen ja/nee-waarde")
+
+
+def _date(row, key, default):
+    value = row.get(key)
+    if value is None:
+        return default
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"{key} '{value}' is geen datum (YYYY-MM-DD)") from None
+
+
+def _member_ref(row):
+    member_id, email = _text(row, 'member_id'), _text(row, 'member_email')
+    if not (member_id or email):
+        raise ValueError('member_id of member_email ontbreekt')
+    return {'member_id': member_id, '_member_email': None if member_id else email.lower()}
+
+
+def _member_row(row):
+    first_name = _text(row, 'first_name', required=True, max_length=100)
+    last_name = _text(row, 'last_name', required=True, max_length=100)
+    email = _text(row, 'email', max_length=120)
+    parts = [_text(row, k) for k in ('street', 'house_number', 'postcode', 'city')]
+    return {
+        'member_id': _text(row, 'member_id') or gen_uuid(),
+        'first_name': first_name,
+        'last_name': last_name,
+        'email': email,
+        'phone': _text(row, 'phone', max_length=30),
+        'street': parts[0], 'house_number': parts[1], 'postcode': parts[2], 'city': parts[3],
+        'address': ' '.join(p for p in parts if p) or _text(row, 'address', max_length=255),
+        'status': _choice(row, 'status', MEMBER_STATUSES, 'active'),
+        'search_text': normalize(first_name, last_name, email),
+    }
+
+
+def _child_row(row):
+    mapping = _member_ref(row)
+    mapping.update({
+        'child_id': gen_uuid(),
+        'first_name': _text(row, 'first_name', required=True, max_length=100),
+        # Zonder achternaam: die van het lid (ingevuld bij het oplossen van de referentie)
+        'last_name': _text(row, 'last_name', max_length=100),
+    })
+    return mapping
+
+
+def _bike_row(row):
+    return {
+        'bike_id': gen_uuid(),
+        'name': _text(row, 'name', required=True, max_length=120),
+        'type': _choice(row, 'type', BIKE_TYPES, 'gewoon'),
+        'status': _choice(row, 'status', BIKE_STATUSES, 'available'),
+        'archived': _bool(row, 'archived', False),
+    }
+
+
+def _payment_row(row):
+    try:
+        amount = float(row.get('amount'))
+    except (TypeError, ValueError):
+        raise ValueError(f"amount '{row.get('amount')}' is geen bedrag") from None
+    # nan/inf zouden SUM en daily_stats onbruikbaar maken
+    if not math.isfinite(amount):
+        raise ValueError(f"amount '{row.get('amount')}' is geen bedrag")
+    if amount < 0:
+        raise ValueError('amount mag niet negatief zijn')
+    method = _choice(row, 'method', PAYMENT_METHODS, 'cash')
+    mapping = _member_ref(row)
+    mapping.update({
+        'payment_id': gen_uuid(),
+        'amount': amount,
+        'method': method,
+        'paid_at': _date(row, 'paid_at', date.today()),
+        # Zoals bij het formulier: cash en kaart zijn meteen ontvangen
+        'received': _bool(row, 'received', method in ('cash', 'card')),
+    })
+    return mapping
+
+
+KINDS = {
+    'members': (Member, _member_row),
+    'children': (Child, _child_row),
+    'bikes': (Bike, _bike_row),
+    'payments': (Payment, _payment_row),
+}
+
+
+# --- Verwerking per chunk ---
+
+def _resolve_members(chunk: List[Tuple[int, dict]], result: ImportResult) -> List[Tuple[int, dict]]:
+    """Fill in ``member_id`` (and a child's last name and search text) for a chunk; drops rows with unknown members."""
+    ids = {m['member_id'] for _, m in chunk if m['member_id']}
+    emails = {m['_member_email'] for _, m in chunk if m['_member_email']}
+    by_id, by_email = {}, {}
+    if ids or emails:
+        rows = db.session.query(Member.member_id, func.lower(Member.email), Member.last_name).filter(
+            or_(Member.member_id.in_(ids), func.lower(Member.email).in_(emails))).all()
+        for member_id, email, last_name in rows:
+            by_id[member_id] = last_name
+            if email:
+                by_email.setdefault(email, []).append((member_id, last_name))
+
+    resolved = []
+    for line, mapping in chunk:
+        email = mapping.pop('_member_email')
+        if email is not None:
+            matches = by_email.get(email, [])
+            if len(matches) != 1:
+                result.add_error(line, f"geen lid met e-mail '{email}'" if not matches
+                                 else f"meerdere leden met e-mail '{email}', gebruik member_id")
+                continue
+            mapping['member_id'], last_name = matches[0]
+        elif mapping['member_id'] in by_id:
+            last_name = by_id[mapping['member_id']]
+        else:
+            result.add_error(line, f"onbekend member_id '{mapping['member_id']}'")
+            continue
+        if 'child_id' in mapping:
+            if not mapping['last_name']:
+                mapping['last_name'] = last_name
+            # Pas nu is de achternaam gekend
+            mapping['search_text'] = normalize(mapping['first_name'], mapping['last_name'])
+        resolved.append((line, mapping))
+    return resolved
+
+
+def _after_payments(mappings: List[dict]):
+    rollups.touch(db.session, {m['paid_at'] for m in mappings})
+    latest: Dict[str, date] = {}
+    for m in mappings:
+        if m['member_id'] not in latest or m['paid_at'] > latest[m['member_id']]:
+            latest[m['member_id']] = m['paid_at']
+    table = Member.__table__
+    db.session.execute(
+        update(table)
+        .where(table.c.member_id == bindparam('_id'),
+               or_(table.c.last_payment.is_(None), table.c.last_payment < bindparam('_paid')))
+        .values(last_payment=bindparam('_paid')),
+        [{'_id': member_id, '_paid': paid} for member_id, paid in latest.items()],
+    )
+
+
+def _write(model, mappings: List[dict]):
+    db.session.execute(insert(model), mappings)
+    if model is Payment:
+        _after_payments(mappings)
+
+
+def _insert_chunk(model, chunk: List[Tuple[int, dict]], result: ImportResult):
+    if model in (Child, Payment):
+        chunk = _resolve_members(chunk, result)
+    if not chunk:
+        return
+    if result.dry_run:
+        result.inserted += len(chunk)
+        return
+    try:
+        _write(model, [m for _, m in chunk])
+        db.session.commit()
+        result.inserted += len(chunk)
+        return
+    except SQLAlchemyError:
+        db.session.rollback()
+    # De chunk faalde als geheel (bv. dubbele sleutel): rij per rij opnieuw, elk in een savepoint
+    for line, mapping in chunk:
+        try:
+            with db.session.begin_nested():
+                _write(model, [mapping])
+            result.inserted += 1
+        except SQLAlchemyError as e:
+            result.add_error(line, f'database: {e.orig if getattr(e, "orig", None) else e}')
+    db.session.commit()
+
+
+def run_import(kind: str, stream, fmt: str = 'csv', chunk_size: int = None, dry_run: bool = False) -> ImportResult:
+    """Import ``kind`` rows from a text ``stream``; ``dry_run`` validates and resolves without writing."""
+    if kind not in KINDS:
+        raise ValueError(f"onbekend type '{kind}' (verwacht: {', '.join(KINDS)})")
+    if fmt not in FORMATS:
+        raise ValueError(f"onbekend formaat '{fmt}' (verwacht: {', '.join(FORMATS)})")
+    model, validate = KINDS[kind]
+    chunk_size = chunk_size or current_app.config.get('IMPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    result = ImportResult(kind, dry_run)
+
+    chunk = []
+    for line, row, error in read_rows(stream, fmt):
+        result.rows += 1
+        if error is None:
+            try:
+                chunk.append((line, validate(row)))
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            result.add_error(line, error)
+        if len(chunk) >= chunk_size:
+            _insert_chunk(model, chunk, result)
+            chunk = []
+    if chunk:
+        _insert_chunk(model, chunk, result)
+    return result
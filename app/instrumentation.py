@@ -0,0 +1,177 @@
+"""
+Runtime instrumentation of the database layer, exposed via ``/internal/metrics``.
+
+Connection pool: ``TimedQueuePool`` measures how long each request waits for a
+connection; together with the pool's own checked-out/overflow counters this is
+what we size gunicorn workers and ``DB_POOL_SIZE`` on.
+
+Queries: cursor-execute hooks count statements and DB time per request, add a
+``Server-Timing`` header, log statements slower than ``SLOW_QUERY_MS`` and
+enforce the budgets declared with ``@query_budget(n)``.
+"""
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import g, has_app_context, has_request_context, current_app, request
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+slow_query_log = logging.getLogger('app.sql.slow')
+
+
+class PoolWaitStats:
+    """Cumulative connection-wait figures for this worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_request_wait = 0.0
+
+    def record_checkout(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += int(timed_out)
+            self.total_wait += waited
+
+    def record_request(self, waited: float):
+        with self._lock:
+            self.requests += 1
+            self.max_request_wait = max(self.max_request_wait, waited)
+
+    def as_dict(self) -> dict:
+        return {
+            'requests': self.requests,
+            'checkouts': self.checkouts,
+            'timeouts': self.timeouts,
+            'total_wait_ms': round(self.total_wait * 1000, 3),
+            'avg_wait_per_request_ms': round(self.total_wait * 1000 / self.requests, 3) if self.requests else 0.0,
+            'max_wait_per_request_ms': round(self.max_request_wait * 1000, 3),
+        }
+
+
+pool_wait_stats = PoolWaitStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long ``checkout`` blocked, per request and in total."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            pool_wait_stats.record_checkout(waited, timed_out)
+            if has_app_context():
+                g.db_pool_wait = g.get('db_pool_wait', 0.0) + waited
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    status = {'class': type(pool).__name__, 'status': pool.status()}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'timeout': pool.timeout(),
+        })
+    return status
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A route issued more SQL statements than its declared ``@query_budget``."""
+
+
+def query_budget(max_queries: int):
+    """Declare the maximum number of SQL statements a view may issue per request.
+
+    Put it directly above the view function (below the auth decorators, whose own
+    queries count too). Over budget raises ``QueryBudgetExceeded`` when testing or
+    when ``QUERY_BUDGET_STRICT`` is set, otherwise it logs a warning.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            g.query_budget = max_queries
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_start'].pop()
+    elapsed = time.perf_counter() - started
+    if not has_app_context():
+        return
+    if has_request_context():
+        g.db_queries = g.get('db_queries', 0) + 1
+        g.db_time = g.get('db_time', 0.0) + elapsed
+    threshold = current_app.config.get('SLOW_QUERY_MS', 0)
+    if threshold and elapsed * 1000 >= threshold:
+        endpoint = request.endpoint if has_request_context() else None
+        slow_query_log.warning('Slow query (%.1f ms) in %s: %s', elapsed * 1000, endpoint or '-',
+                               ' '.join(statement.split())[:1000])
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    # Een mislukte statement krijgt geen after_cursor_execute; anders groeit de stapel per fout
+    # en koppelt de volgende query zich aan een verkeerde starttijd
+    stack = context.connection.info.get('query_start') if context.connection is not None else None
+    if stack:
+        stack.pop()
+
+
+def init_app(app):
+    """Install the timed pool (server databases only) and per-request bookkeeping.
+
+    Must run before ``db.init_app`` so the engine is created with the timed pool class.
+    """
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    if 'pool_size' in options:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(options, poolclass=TimedQueuePool)
+
+    @app.before_request
+    def _reset_request_counters():
+        g.db_pool_wait = 0.0
+        g.db_queries = 0
+        g.db_time = 0.0
+
+    @app.after_request
+    def _report_request_queries(response):
+        queries, db_time = g.get('db_queries', 0), g.get('db_time', 0.0)
+        response.headers.add('Server-Timing', f'db;dur={db_time * 1000:.2f};desc="{queries} queries"')
+        response.headers.add('Server-Timing', f'db-pool;dur={g.get("db_pool_wait", 0.0) * 1000:.2f}')
+
+        budget = g.get('query_budget')
+        if budget is not None and queries > budget:
+            message = f'{request.endpoint} issued {queries} SQL queries (budget {budget})'
+            if app.testing or app.config.get('QUERY_BUDGET_STRICT'):
+                raise QueryBudgetExceeded(message)
+            slow_query_log.warning(message)
+        return response
+
+    @app.teardown_request
+    def _record_pool_wait(exc=None):
+        pool_wait_stats.record_request(g.get('db_pool_wait', 0.0))
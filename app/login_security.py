@@ -0,0 +1,168 @@
+"""
+Login hardening: e-mail normalization, password hash settings and rate limiting.
+
+- E-mail addresses of users are stored lowercased (``User.email`` validator),
+  so the login lookup is a plain equality on the indexed column
+  (``ix_user_email``). ``flask maint user-emails`` lowercases older rows.
+- ``PASSWORD_HASH_METHOD`` picks the werkzeug hash method and its cost
+  parameters (e.g. ``scrypt:32768:8:1`` or ``pbkdf2:sha256:600000``). A
+  successful login with a hash made under other settings rehashes the
+  password transparently. ``benchmarks/bench_password_hash.py`` measures the
+  cost per method.
+- Every login attempt takes a token from the bucket of its IP before any
+  password is hashed. Failed attempts also take one from the bucket of the
+  (IP, account) pair, which slows down guessing from one address without
+  letting anyone else lock the owner out (a correct password empties that
+  pair's record), and one from the bucket of the account itself, which caps
+  guessing spread over many addresses. The account bucket has a large burst
+  and refills quickly (``LOGIN_EMAIL_*``): a distributed attack is throttled to
+  its refill rate, while the owner waits at most one refill interval (seconds)
+  rather than being locked out. An empty bucket answers 429 without touching
+  the database. Buckets
+  live in a bounded in-process store (least recently used keys are dropped),
+  per worker.
+- Behind a reverse proxy ``TRUSTED_PROXY_HOPS`` must be set (see create_app),
+  otherwise every client shares the proxy's address and thus one IP bucket.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_HASH_METHOD = 'scrypt'
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    return email.strip().lower() if email else email
+
+
+# --- Wachtwoord-hashes ---
+
+def hash_method() -> str:
+    if has_app_context():
+        return current_app.config.get('PASSWORD_HASH_METHOD') or DEFAULT_HASH_METHOD
+    return DEFAULT_HASH_METHOD
+
+
+@lru_cache(maxsize=8)
+def _stored_prefix(method: str) -> str:
+    # Werkzeug vult ontbrekende parameters zelf aan ('scrypt' -> 'scrypt:32768:8:1'); één keer hashen
+    # per instelling geeft het voorvoegsel zoals het in de database staat
+    return generate_password_hash('', method, salt_length=1).split('$', 1)[0]
+
+
+def hash_password(raw: str) -> str:
+    return generate_password_hash(raw, hash_method())
+
+
+def verify_password(stored: Optional[str], raw: str) -> bool:
+    return check_password_hash(stored or '', raw)
+
+
+def needs_rehash(stored: Optional[str]) -> bool:
+    """True when ``stored`` was made with other hash settings than ``PASSWORD_HASH_METHOD``."""
+    return bool(stored) and stored.split('$', 1)[0] != _stored_prefix(hash_method())
+
+
+# --- Rate limiting ---
+
+class TokenBucketLimiter:
+    """Token buckets per key: ``burst`` attempts at once, refilled at ``per_minute`` tokens a minute.
+
+    At most ``maxsize`` keys are tracked; the least recently used bucket is dropped
+    first (a dropped bucket starts full again, which only errs on the lenient side).
+    """
+
+    def __init__(self, burst: int, per_minute: float, maxsize: int = 10_000, clock=time.monotonic):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.maxsize = maxsize
+        self._clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _level(self, key, now) -> float:
+        entry = self._buckets.get(key)
+        if entry is None:
+            return float(self.burst)
+        tokens, updated = entry
+        return min(float(self.burst), tokens + (now - updated) * self.rate)
+
+    def peek(self, key) -> float:
+        """Seconds until ``key`` has a token again (0 = an attempt is allowed now)."""
+        if self.burst <= 0:
+            return 0.0
+        with self._lock:
+            tokens = self._level(key, self._clock())
+        if tokens >= 1:
+            return 0.0
+        return (1 - tokens) / self.rate if self.rate > 0 else float('inf')
+
+    def hit(self, key):
+        """Take a token for ``key`` (the level never goes below zero)."""
+        if self.burst <= 0:
+            return
+        now = self._clock()
+        with self._lock:
+            self._buckets[key] = (max(0.0, self._level(key, now) - 1), now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def configure(self, burst: int, per_minute: float, maxsize: int):
+        with self._lock:
+            self.burst, self.rate, self.maxsize = burst, per_minute / 60.0, maxsize
+            self._buckets.clear()
+
+    def stats(self) -> dict:
+        return {'burst': self.burst, 'per_minute': round(self.rate * 60, 3),
+                'tracked': len(self._buckets), 'rejected': self.rejected}
+
+
+ip_limiter = TokenBucketLimiter(burst=20, per_minute=10)
+account_limiter = TokenBucketLimiter(burst=5, per_minute=1)
+email_limiter = TokenBucketLimiter(burst=50, per_minute=10)
+
+
+def init_app(app):
+    size = app.config.get('LOGIN_LIMITER_SIZE', 10_000)
+    ip_limiter.configure(app.config.get('LOGIN_IP_BURST', 20), app.config.get('LOGIN_IP_PER_MINUTE', 10), size)
+    account_limiter.configure(app.config.get('LOGIN_ACCOUNT_BURST', 5),
+                              app.config.get('LOGIN_ACCOUNT_PER_MINUTE', 1), size)
+    email_limiter.configure(app.config.get('LOGIN_EMAIL_BURST', 50),
+                            app.config.get('LOGIN_EMAIL_PER_MINUTE', 10), size)
+
+
+def check_login_allowed(ip: str, email: str) -> float:
+    """Seconds the client has to wait (0 = go ahead); an allowed attempt takes a token from the IP bucket."""
+    waits = [(limiter, limiter.peek(key))
+             for limiter, key in ((ip_limiter, ip), (account_limiter, (ip, email)), (email_limiter, email))]
+    blocked = [(limiter, wait) for limiter, wait in waits if wait]
+    if blocked:
+        blocked[0][0].rejected += 1
+        return max(wait for _, wait in blocked)
+    ip_limiter.hit(ip)
+    return 0.0
+
+
+def login_failed(ip: str, email: str):
+    """Only wrong passwords count against an account: per address that tried them and for the account as a whole."""
+    account_limiter.hit((ip, email))
+    email_limiter.hit(email)
+
+
+def login_succeeded(ip: str, email: str):
+    """A correct password clears the failed attempts of this address on the account.
+
+    The IP and account-wide buckets keep counting: a lucky guess must not reset them.
+    """
+    account_limiter.reset((ip, email))
@@ -0,0 +1,74 @@
+"""
+Small JSON payloads for the pickers on the rental form.
+
+The form used to embed every member, child and available bike in the page.
+These helpers return one page of ``{'id', 'label', ...}`` items instead; the
+form fetches them on demand via ``/api/lookup/*`` (see routes).
+
+- members: ranked name/e-mail search via ``app.search`` when ``q`` is given,
+  otherwise keyset pages in name order (``ix_member_name``).
+- children: the children of one member, with their active rental if any.
+- bikes: available bikes, optionally per type and by name prefix, keyset pages.
+"""
+import re
+
+from sqlalchemy import and_
+from sqlalchemy.orm import load_only
+
+from app.extensions import db
+from app.models import Bike, Child, Member, Rental
+from app.pagination import paginate
+from app.search import normalize, ranked
+
+LOOKUP_PAGE_SIZE = 20
+
+MEMBER_KEYS = [(Member.last_name, False), (Member.first_name, False), (Member.member_id, False)]
+BIKE_KEYS = [(Bike.name, False), (Bike.bike_id, False)]
+
+
+def members(term: str = '', after: str = None, per_page: int = LOOKUP_PAGE_SIZE) -> dict:
+    query = Member.query.options(load_only(Member.member_id, Member.first_name, Member.last_name, Member.email))
+    if normalize(term):
+        # Op relevantie: enkel de beste treffers, geen volgende pagina
+        rows, cursor = ranked(query, Member, term, per_page), None
+    else:
+        page = paginate(query, MEMBER_KEYS, after=after, per_page=per_page)
+        rows, cursor = page.items, page.next_cursor
+    return {
+        'results': [{'id': m.member_id, 'label': f'{m.last_name}, {m.first_name}', 'email': m.email}
+                    for m in rows],
+        'next': cursor,
+    }
+
+
+def children(member_id: str) -> dict:
+    """Children of one member; ``active_rental`` tells the form which ones cannot rent another bike."""
+    rows = db.session.query(Child.child_id, Child.first_name, Child.last_name, Rental.rental_id, Bike.name) \
+        .outerjoin(Rental, and_(Rental.child_id == Child.child_id, Rental.status == 'active')) \
+        .outerjoin(Bike, Bike.bike_id == Rental.bike_id) \
+        .filter(Child.member_id == member_id) \
+        .order_by(Child.first_name, Child.child_id).all()
+    results, seen = [], set()
+    for child_id, first_name, last_name, rental_id, bike_name in rows:
+        if child_id in seen:
+            continue
+        seen.add(child_id)
+        results.append({'id': child_id, 'label': f'{first_name} {last_name}',
+                        'active_rental': rental_id is not None, 'bike_name': bike_name})
+    return {'results': results, 'next': None}
+
+
+def bikes(bike_type: str = None, term: str = '', after: str = None, per_page: int = LOOKUP_PAGE_SIZE) -> dict:
+    query = Bike.query.options(load_only(Bike.bike_id, Bike.name, Bike.type)) \
+        .filter(Bike.status == 'available', Bike.archived == False)
+    if bike_type:
+        query = query.filter(Bike.type == bike_type)
+    prefix = re.sub(r'[%_\\]', '', term or '').strip()
+    if prefix:
+        query = query.filter(Bike.name.ilike(f'{prefix}%'))
+    page = paginate(query, BIKE_KEYS, after=after, per_page=per_page)
+    return {
+        'results': [{'id': b.bike_id, 'label': f"{b.name} ({b.type or '-'})", 'type': b.type}
+                    for b in page.items],
+        'next': page.next_cursor,
+    }
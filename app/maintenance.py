@@ -0,0 +1,193 @@
+"""
+Set-based maintenance tasks (``flask --app run maint <task>``).
+
+A task is a list of steps; each step is one ``UPDATE ... WHERE`` or
+``DELETE ... WHERE`` on a model, run in primary-key order chunks of
+``chunk_size`` rows with a commit per chunk. No rows are loaded into the
+session and no transaction holds its locks for longer than one chunk.
+
+- ``--dry-run`` only counts the rows each step would touch.
+- Progress (step, primary-key cursor, rows done) is stored in ``job_run`` after
+  every chunk. A run that was interrupted continues where it stopped the next
+  time it is started (``--restart`` ignores the saved position). The WHERE
+  clauses only match rows that still need the change, so rerunning a finished
+  task is a cheap no-op.
+
+The old scripts in ``app/scripts`` delegate to these tasks.
+"""
+import re
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import case, func
+
+from app import rollups
+from app.extensions import db
+from app.models import (
+    Bike, Child, DailyStats, ExpiringRental, Item, JobRun, Member, Payment, Rental, User,
+)
+from app.pagination import decode_cursor, encode_cursor
+
+DEFAULT_CHUNK_SIZE = 1000
+# Standaard verhuurduur, zoals bij een nieuwe verhuring
+END_DATE_DAYS = 365
+
+# Lokale/oude statussen -> canonieke status (normalize_member_statuses)
+MEMBER_STATUS_MAP = {
+    'actief': 'active',
+    'inactief': 'inactive',
+    'gepauzeerd': 'paused',
+}
+CANONICAL_MEMBER_STATUSES = ('active', 'inactive', 'paused')
+
+
+class Step:
+    """One chunked statement: update ``values()`` (or delete when None) on rows of ``model`` matching ``where()``.
+
+    ``where`` and ``values`` are callables so dialect-specific SQL is built at run time;
+    ``before`` gets the ORM query of each chunk before it is changed (e.g. ``rollups.touch_query``).
+    """
+
+    def __init__(self, model, where: Callable[[], list] = list, values: Callable[[], dict] = None,
+                 before: Callable = None):
+        self.model = model
+        self.where = where
+        self.values = values
+        self.before = before
+
+    @property
+    def name(self) -> str:
+        return self.model.__tablename__
+
+
+class Task:
+    def __init__(self, name: str, help: str, steps: List[Step], destructive: bool = False):
+        self.name = name
+        self.help = help
+        self.steps = steps
+        self.destructive = destructive
+
+    @property
+    def job_name(self) -> str:
+        return f'maint:{self.name}'
+
+
+def _dialect() -> str:
+    return db.session.get_bind().dialect.name
+
+
+def _plus_days(column, days: int):
+    if _dialect() == 'sqlite':
+        return func.date(column, f'+{days} days')
+    return column + days
+
+
+def _canonical_member_status():
+    status = func.lower(func.trim(Member.status))
+    return case(
+        (status.in_(CANONICAL_MEMBER_STATUSES), status),
+        *[(status == old, new) for old, new in MEMBER_STATUS_MAP.items()],
+        else_='active',
+    )
+
+
+def _touch_end_date_backfill(query):
+    # De nieuwe einddatums (start + 365) raken andere daily_stats-dagen dan de huidige waarden
+    rollups.touch(query.session, (start + timedelta(days=END_DATE_DAYS)
+                                  for (start,) in query.with_entities(Rental.start_date).distinct()))
+
+
+TASKS: Dict[str, Task] = {task.name: task for task in [
+    Task('rental-end-dates', 'Set missing rental end dates to start date + 365 days.', [
+        Step(Rental,
+             where=lambda: [Rental.start_date.isnot(None), Rental.end_date.is_(None)],
+             values=lambda: {Rental.end_date: _plus_days(Rental.start_date, END_DATE_DAYS)},
+             before=_touch_end_date_backfill),
+    ]),
+    Task('member-statuses', 'Normalize legacy member statuses (actief, inactief, empty, ...).', [
+        Step(Member,
+             where=lambda: [(Member.status.is_(None)) | Member.status.notin_(CANONICAL_MEMBER_STATUSES)],
+             values=lambda: {Member.status: _canonical_member_status()}),
+    ]),
+    # Gebruikers van vóór de e-mailnormalisatie (User.email wordt nu in kleine letters opgeslagen)
+    Task('user-emails', 'Lowercase and trim user e-mail addresses so login can use ix_user_email.', [
+        Step(User,
+             where=lambda: [User.email != func.lower(func.trim(User.email))],
+             values=lambda: {User.email: func.lower(func.trim(User.email))}),
+    ]),
+    # Kinderen vóór ouders (foreign keys); gebruikers blijven staan
+    Task('delete-all-data', 'Delete all members, children, bikes, rentals, payments and items.', [
+        Step(ExpiringRental), Step(Payment), Step(Rental), Step(Child), Step(Member), Step(Bike), Step(Item),
+        Step(DailyStats),
+    ], destructive=True),
+]}
+
+_PROGRESS = re.compile(r'running step=(\d+) cursor=(\S*) done=(\d+)')
+
+
+def _saved_position(task: Task):
+    """(step index, cursor token, rows done) of an interrupted run, or None."""
+    run = db.session.get(JobRun, task.job_name)
+    match = _PROGRESS.match(run.last_result or '') if run else None
+    return (int(match.group(1)), match.group(2) or None, int(match.group(3))) if match else None
+
+
+def _save(task: Task, result: str):
+    db.session.merge(JobRun(name=task.job_name, last_run_at=datetime.utcnow(), last_result=result[:255]))
+
+
+def count(name: str) -> Dict[str, int]:
+    """Dry run: rows each step of task ``name`` would change."""
+    task = TASKS[name]
+    totals = {}
+    for step in task.steps:
+        pk = step.model.__mapper__.primary_key[0]
+        totals[step.name] = db.session.query(func.count(pk)).filter(*step.where()).scalar()
+    return totals
+
+
+def run(name: str, chunk_size: int = DEFAULT_CHUNK_SIZE, restart: bool = False,
+        progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+    """Run task ``name`` chunk by chunk; returns rows changed per step (this run only)."""
+    task = TASKS[name]
+    position = None if restart else _saved_position(task)
+    first_step, token, done = position or (0, None, 0)
+
+    totals = {}
+    for index, step in enumerate(task.steps):
+        if index < first_step:
+            continue
+        pk = step.model.__mapper__.primary_key[0]
+        keys = [(pk, False)]
+        last = decode_cursor(token, keys)[0] if index == first_step and token else None
+        if index != first_step:
+            done = 0
+        changed = 0
+        while True:
+            where = step.where()
+            q = db.session.query(pk).filter(*where)
+            if last is not None:
+                q = q.filter(pk > last)
+            ids = [row[0] for row in q.order_by(pk).limit(chunk_size)]
+            if not ids:
+                break
+            target = step.model.query.filter(pk.in_(ids), *where)
+            if step.before:
+                step.before(target)
+            if step.values is None:
+                n = target.delete(synchronize_session=False)
+            else:
+                n = target.update(step.values(), synchronize_session=False)
+            last, changed, done = ids[-1], changed + n, done + n
+            _save(task, f'running step={index} cursor={encode_cursor([last])} done={done}')
+            db.session.commit()
+            if progress:
+                progress(step.name, done)
+        totals[step.name] = changed
+        # Volgende stap begint vooraan
+        _save(task, f'running step={index + 1} cursor= done=0')
+        db.session.commit()
+
+    _save(task, 'done: ' + ', '.join(f'{k}={v}' for k, v in totals.items()))
+    db.session.commit()
+    return totals
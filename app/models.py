@@ -2,11 +2,22 @@ from datetime import datetime
 from app.extensions import db
 import uuid
 from datetime import date
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import lazyload, validates
+
+from app.login_security import hash_password, needs_rehash, normalize_email, verify_password
 
 def gen_uuid():
     return str(uuid.uuid4())
 
+
+def without_eager(model):
+    """Loader options die de ``lazy='joined'`` relaties van ``model`` voor één query uitschakelen.
+
+    De joined defaults zijn handig op detailpagina's; lijstqueries die de gerelateerde
+    rijen zelf joinen of niet nodig hebben geven deze mee aan ``.options(...)``.
+    """
+    return [lazyload(rel.class_attribute) for rel in db.inspect(model).relationships if rel.lazy == 'joined']
+
 # Centralized choice lists (avoid hardcoding in templates/routes)
 USER_ROLES = ['depot_manager', 'finance_manager', 'admin']
 MEMBER_STATUSES = ['active', 'inactive']
@@ -31,18 +42,27 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     first_name = db.Column(db.String(100))
     last_name = db.Column(db.String(100))
-    email = db.Column(db.String(120))
+    email = db.Column(db.String(120), index=True)
     password = db.Column(db.String(255))
     role = db.Column(db.String(50), default='depot_manager')
    
 
+    @validates('email')
+    def _normalize_email(self, key, email):
+        # Altijd in kleine letters opslaan: de login zoekt met een gewone gelijkheid op ix_user_email
+        return normalize_email(email)
+
     def set_password(self, raw: str):
-        """Hash en sla wachtwoord veilig op"""
-        self.password = generate_password_hash(raw)
+        """Hash en sla wachtwoord veilig op (methode uit PASSWORD_HASH_METHOD)"""
+        self.password = hash_password(raw)
 
     def check_password(self, raw: str) -> bool:
         """Verifieer wachtwoord tegen gehashte versie"""
-        return check_password_hash(self.password or '', raw)
+        return verify_password(self.password, raw)
+
+    def password_needs_rehash(self) -> bool:
+        """True als de hash met andere instellingen gemaakt is dan PASSWORD_HASH_METHOD"""
+        return needs_rehash(self.password)
     
     def has_role(self, *roles) -> bool:
         """Check of gebruiker één van de opgegeven rollen heeft"""
@@ -59,6 +79,12 @@ class User(db.Model):
 # Member management models
 class Member(db.Model):
     __tablename__ = 'member'
+    __table_args__ = (
+        db.Index('ix_member_name', 'last_name', 'first_name'),
+        db.Index('ix_member_created_at', 'created_at'),
+        # Lid opzoeken op e-mail, hoofdletterongevoelig (bulk import)
+        db.Index('ix_member_email_lower', db.text('lower(email)')),
+    )
     member_id = db.Column(db.String, primary_key=True, default=gen_uuid)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     first_name = db.Column(db.String(100), nullable=False)
@@ -70,38 +96,56 @@ class Member(db.Model):
     house_number = db.Column(db.String(20))
     postcode = db.Column(db.String(20))
     city = db.Column(db.String(120))
-    last_payment = db.Column(db.Date)
-    status = db.Column(db.String(20), default='active')
+    last_payment = db.Column(db.Date, index=True)
+    status = db.Column(db.String(20), default='active', index=True)
+    # Genormaliseerde naam + e-mail voor zoeken (app/search.py)
+    search_text = db.Column(db.Text)
 
     children = db.relationship('Child', backref='member', cascade='all, delete-orphan', lazy=True)
 
 class Child(db.Model):
     __tablename__ = 'child'
     child_id = db.Column(db.String, primary_key=True, default=gen_uuid)
-    member_id = db.Column(db.String, db.ForeignKey('member.member_id'), nullable=False)
+    member_id = db.Column(db.String, db.ForeignKey('member.member_id'), nullable=False, index=True)
     first_name = db.Column(db.String(100), nullable=False)
     last_name = db.Column(db.String(100), nullable=False)
+    # Genormaliseerde naam voor zoeken (app/search.py)
+    search_text = db.Column(db.Text)
 
 
 class Bike(db.Model):
     __tablename__ = 'bike'
+    __table_args__ = (
+        db.Index('ix_bike_status_archived', 'status', 'archived'),
+        db.Index('ix_bike_created_at', 'created_at'),
+    )
     bike_id = db.Column(db.String, primary_key=True, default=gen_uuid)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     name = db.Column(db.String(120), nullable=False)
-    type = db.Column(db.String(80))
+    type = db.Column(db.String(80), index=True)
     status = db.Column(db.String(20), default='available')
     archived = db.Column(db.Boolean, default=False)
 
 
 class Rental(db.Model):
     __tablename__ = 'rental'
+    __table_args__ = (
+        # Lijst: filter op status, sorteer op start_date
+        db.Index('ix_rental_status_start_date', 'status', 'start_date'),
+        # "Heeft dit kind al een actieve verhuring?"
+        db.Index('ix_rental_child_status', 'child_id', 'status'),
+        # Partiële index: enkel actieve verhuringen (sweeper, aflopende verhuringen)
+        db.Index('ix_rental_active_end_date', 'end_date',
+                 postgresql_where=db.text("status = 'active'"),
+                 sqlite_where=db.text("status = 'active'")),
+    )
     rental_id = db.Column(db.String, primary_key=True, default=gen_uuid)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    bike_id = db.Column(db.String, db.ForeignKey('bike.bike_id'), nullable=False)
-    member_id = db.Column(db.String, db.ForeignKey('member.member_id'))
+    bike_id = db.Column(db.String, db.ForeignKey('bike.bike_id'), nullable=False, index=True)
+    member_id = db.Column(db.String, db.ForeignKey('member.member_id'), index=True)
     child_id = db.Column(db.String, db.ForeignKey('child.child_id'))
-    start_date = db.Column(db.Date, default=date.today)
-    end_date = db.Column(db.Date)
+    start_date = db.Column(db.Date, default=date.today, index=True)
+    end_date = db.Column(db.Date, index=True)
     status = db.Column(db.String(20), default='active')
     # Relationships for convenient access in templates + reverse access via backrefs
     bike = db.relationship('Bike', backref='rentals', lazy='joined')
@@ -111,11 +155,14 @@ class Rental(db.Model):
 
 class Payment(db.Model):
     __tablename__ = 'payment'
+    __table_args__ = (
+        db.Index('ix_payment_method_paid_at', 'method', 'paid_at'),
+    )
     payment_id = db.Column(db.String, primary_key=True, default=gen_uuid)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    member_id = db.Column(db.String, db.ForeignKey('member.member_id'), nullable=False)
+    member_id = db.Column(db.String, db.ForeignKey('member.member_id'), nullable=False, index=True)
     amount = db.Column(db.Float, nullable=False)
-    paid_at = db.Column(db.Date, default=date.today)
+    paid_at = db.Column(db.Date, default=date.today, index=True)
     method = db.Column(db.String(20), default='cash')
     received = db.Column(db.Boolean, default=True)  # Voor bankbetalingen: is bedrag ontvangen?
     
@@ -129,3 +176,52 @@ class Item(db.Model):
     type = db.Column(db.String(80))
     status = db.Column(db.String(20), default='available')
     archived = db.Column(db.Boolean, default=False)
+
+
+class JobRun(db.Model):
+    """Laatste uitvoering van een achtergrondtaak (sweeper, cron-commando's)."""
+    __tablename__ = 'job_run'
+    name = db.Column(db.String(80), primary_key=True)
+    last_run_at = db.Column(db.DateTime)
+    last_result = db.Column(db.String(255))
+
+
+class DailyStats(db.Model):
+    """Dagelijkse rollup van verhuringen en betalingen (zie app/rollups.py).
+
+    Eén rij per dag, ook voor dagen zonder activiteit, zodat een volledige
+    reeks rijen aangeeft dat een periode uit de rollup gelezen kan worden.
+    """
+    __tablename__ = 'daily_stats'
+    day = db.Column(db.Date, primary_key=True)
+    rentals_started = db.Column(db.Integer, nullable=False, default=0)
+    rentals_returned = db.Column(db.Integer, nullable=False, default=0)
+    payments_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    cash_amount = db.Column(db.Float, nullable=False, default=0)
+    card_amount = db.Column(db.Float, nullable=False, default=0)
+    bank_received_amount = db.Column(db.Float, nullable=False, default=0)
+    bank_open_amount = db.Column(db.Float, nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime)
+
+
+class ExpiringRental(db.Model):
+    """Dagelijkse snapshot van verhuringen die binnen 30 dagen aflopen (zie tasks.snapshot_expiring_rentals).
+
+    Gedenormaliseerd zodat de dashboard-popup en de digest geen joins meer nodig hebben.
+    """
+    __tablename__ = 'expiring_rental'
+    __table_args__ = (
+        db.Index('ix_expiring_rental_end_date', 'end_date'),
+    )
+    rental_id = db.Column(db.String, db.ForeignKey('rental.rental_id', ondelete='CASCADE'), primary_key=True)
+    snapshot_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    days_left = db.Column(db.Integer, nullable=False)
+    window_days = db.Column(db.Integer, nullable=False)  # 7, 14 of 30
+    member_id = db.Column(db.String, index=True)
+    parent_name = db.Column(db.String(201))
+    parent_email = db.Column(db.String(120))
+    child_name = db.Column(db.String(201))
+    bike_name = db.Column(db.String(120))
+    bike_type = db.Column(db.String(80))
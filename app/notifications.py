@@ -0,0 +1,88 @@
+"""
+Daily digest of expiring rentals, one message per parent.
+
+``build_digests`` groups the snapshot rows of ``expiring_rental`` per member, so
+a parent with several children gets one message listing every bike. There is no
+mail server: ``write_outbox`` writes the digests to ``NOTIFY_OUTBOX_DIR`` as one
+``.eml`` file per parent plus a JSON overview, ready to be sent or inspected.
+"""
+import json
+import os
+from datetime import date
+from email.message import EmailMessage
+from typing import Any, Dict, Iterable, List
+
+from flask import current_app
+
+SUBJECT = 'Op Wielekes: verhuring loopt binnenkort af'
+
+
+def build_digests(rows: Iterable) -> List[Dict[str, Any]]:
+    """Group ``ExpiringRental`` rows per member; parents and items are ordered by first end date."""
+    digests: Dict[str, Dict[str, Any]] = {}
+    for row in sorted(rows, key=lambda r: (r.end_date, r.rental_id)):
+        digest = digests.setdefault(row.member_id, {
+            'member_id': row.member_id,
+            'parent_name': row.parent_name,
+            'parent_email': row.parent_email,
+            'items': [],
+        })
+        digest['items'].append({
+            'rental_id': row.rental_id,
+            'child_name': row.child_name,
+            'bike_name': row.bike_name,
+            'bike_type': row.bike_type,
+            'end_date': row.end_date.isoformat(),
+            'days_left': row.days_left,
+            'window_days': row.window_days,
+        })
+    return list(digests.values())
+
+
+def _body(digest: Dict[str, Any]) -> str:
+    lines = [f"Beste {digest['parent_name']},", '',
+             'De volgende verhuringen lopen binnenkort af:', '']
+    for item in digest['items']:
+        when = 'vandaag' if item['days_left'] == 0 else f"over {item['days_left']} dagen"
+        lines.append(f"- {item['child_name']}: {item['bike_name']} ({item['bike_type'] or '-'}), "
+                     f"einddatum {item['end_date']} ({when})")
+    lines += ['', 'Kom gerust langs in het depot om te verlengen of een grotere fiets te kiezen.', '',
+              'Met vriendelijke groeten,', 'Op Wielekes']
+    return '\n'.join(lines)
+
+
+def to_email(digest: Dict[str, Any], sender: str) -> EmailMessage:
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = digest['parent_email'] or ''
+    message['Subject'] = SUBJECT
+    message.set_content(_body(digest))
+    return message
+
+
+def outbox_dir() -> str:
+    return current_app.config.get('NOTIFY_OUTBOX_DIR') or os.path.join(current_app.instance_path, 'outbox')
+
+
+def write_outbox(digests: List[Dict[str, Any]], day: date, directory: str = None) -> str:
+    """Write ``<directory>/<day>/`` with one ``.eml`` per parent with an e-mail address and ``digest.json``.
+
+    Rerunning for the same day replaces that day's files. Returns the day directory.
+    """
+    target = os.path.join(directory or outbox_dir(), day.isoformat())
+    os.makedirs(target, exist_ok=True)
+    for name in os.listdir(target):
+        if name.endswith('.eml'):
+            os.remove(os.path.join(target, name))
+
+    sender = current_app.config.get('NOTIFY_FROM', 'noreply@opwielekes.be')
+    for digest in digests:
+        if not digest['parent_email']:
+            continue
+        with open(os.path.join(target, f"{digest['member_id']}.eml"), 'wb') as f:
+            f.write(bytes(to_email(digest, sender)))
+
+    with open(os.path.join(target, 'digest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'generated_at': day.isoformat(), 'count': len(digests), 'digests': digests},
+                  f, ensure_ascii=False, indent=2)
+    return target
@@ -0,0 +1,169 @@
+"""
+Keyset (seek) pagination for the list pages.
+
+Instead of OFFSET, a page continues after/before the sort key of the last/first
+row it showed, so every page costs one index range scan no matter how deep the
+user pages. The position is carried in the query string as an opaque cursor
+(``?after=...`` / ``?before=...``).
+
+Keys are ``(column, descending)`` pairs and must end with a unique column (the
+primary key) so the order is total. A nullable key column sorts its NULLs as if
+they were larger than any value (last ascending, first descending, the default
+of PostgreSQL and its indexes) and the seek predicate handles them explicitly;
+a plain ``>`` / ``<`` would otherwise skip every NULL row.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, false, or_
+from sqlalchemy.engine import Row
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+Key = Tuple[Any, bool]
+
+
+class KeysetPage:
+    def __init__(self, items: list, per_page: int, next_cursor: Optional[str], prev_cursor: Optional[str]):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def page_size(value, default: int = DEFAULT_PAGE_SIZE) -> int:
+    """Parse a ``per_page`` query argument, clamped to ``1..MAX_PAGE_SIZE``."""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return default
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+    return value
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str, keys: Sequence[Key]) -> Optional[list]:
+    """Decode a cursor; returns None for missing or malformed cursors."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = [_decode_value(v) for v in json.loads(raw)]
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(keys):
+        return None
+    return values
+
+
+def _row_values(row, keys: Sequence[Key]) -> list:
+    """Extract the sort key values from a result row (an entity or a tuple of entities)."""
+    entities = tuple(row) if isinstance(row, Row) else (row,)
+    values = []
+    for column, _ in keys:
+        owner = next(e for e in entities if isinstance(e, column.class_))
+        values.append(getattr(owner, column.key))
+    return values
+
+
+def _nullable(column) -> bool:
+    return getattr(column.expression, 'nullable', True)
+
+
+def _equal(column, value):
+    return column.is_(None) if value is None else column == value
+
+
+def _greater(column, value):
+    # NULL telt als groter dan elke waarde
+    if not _nullable(column):
+        return column > value
+    return false() if value is None else or_(column > value, column.is_(None))
+
+
+def _less(column, value):
+    if not _nullable(column):
+        return column < value
+    return column.isnot(None) if value is None else column < value
+
+
+def _seek(keys: Sequence[Key], values: Sequence, forward: bool):
+    """(k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... with > / < per key direction."""
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        beyond = _less(column, values[i]) if descending == forward else _greater(column, values[i])
+        clauses.append(and_(*[_equal(keys[j][0], values[j]) for j in range(i)], beyond))
+    return or_(*clauses)
+
+
+def ordering(keys: Sequence[Key], forward: bool = True) -> List:
+    """ORDER BY clauses for ``keys``; ``forward=False`` reverses every key (paging backwards)."""
+    clauses = []
+    for column, descending in keys:
+        if descending == forward:
+            clauses.append(column.desc().nulls_first() if _nullable(column) else column.desc())
+        else:
+            clauses.append(column.asc().nulls_last() if _nullable(column) else column.asc())
+    return clauses
+
+
+def paginate(query, keys: Sequence[Key], after: str = None, before: str = None,
+             per_page: int = DEFAULT_PAGE_SIZE) -> KeysetPage:
+    """Return one page of ``query`` ordered by ``keys``, starting after/before a cursor."""
+    after_values = decode_cursor(after, keys)
+    before_values = decode_cursor(before, keys) if after_values is None else None
+    forward = before_values is None
+    position = after_values if forward else before_values
+
+    q = query.order_by(None)
+    if position is not None:
+        q = q.filter(_seek(keys, position, forward))
+    rows = q.order_by(*ordering(keys, forward)).limit(per_page + 1).all()
+
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+    if not rows:
+        return KeysetPage([], per_page, None, None)
+
+    first, last = encode_cursor(_row_values(rows[0], keys)), encode_cursor(_row_values(rows[-1], keys))
+    if forward:
+        return KeysetPage(rows, per_page, last if more else None, first if position is not None else None)
+    return KeysetPage(rows, per_page, last, first if more else None)
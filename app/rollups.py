@@ -0,0 +1,174 @@
+"""
+Incrementally maintained ``daily_stats`` rollup.
+
+Writes to ``Rental`` and ``Payment`` mark the dates they touch (old and new
+values) on the session; just before the commit those dates are recomputed from
+the base tables in the same transaction. The day rows are claimed first
+(``INSERT ... ON CONFLICT DO NOTHING`` + ``SELECT ... FOR UPDATE``), so two
+transactions touching the same day take turns: the second one recomputes after
+the first has committed and sees its rows, and the final write is an upsert that
+cannot collide on the primary key. Bulk ``Query.update()/delete()`` statements bypass the flush:
+callers mark the affected rows with ``touch_query()`` first.
+
+``refresh-daily-stats`` backfills or repairs a date range from the CLI; the
+rental sweeper keeps yesterday and today present so the chart ranges stay
+fully covered.
+"""
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+from flask import current_app, has_app_context
+from sqlalchemy import case, event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import DailyStats, Payment, Rental
+
+_DAYS_KEY = 'daily_stats_days'
+_CHUNK = 366
+
+# Datumkolommen waarvan de waarde (oud en nieuw) een rollup-dag raakt
+_DATE_ATTRS = {Rental: ('start_date', 'end_date'), Payment: ('paid_at',)}
+
+
+def enabled() -> bool:
+    return has_app_context() and current_app.config.get('DAILY_STATS_ROLLUP', True)
+
+
+def touch(session, days: Iterable[date]):
+    """Mark ``days`` to be recomputed when ``session`` commits."""
+    session.info.setdefault(_DAYS_KEY, set()).update(d for d in days if d is not None)
+
+
+def touch_query(query):
+    """Mark the dates of every row ``query`` matches; call before its bulk ``update()``/``delete()``."""
+    model = query.column_descriptions[0]['entity']
+    columns = [getattr(model, attr) for attr in _DATE_ATTRS[model]]
+    for row in query.with_entities(*columns).distinct():
+        touch(query.session, row)
+
+
+def _sum_if(condition, value):
+    return func.sum(case((condition, value), else_=0))
+
+
+def _insert(connection):
+    # Beide dialecten kennen ON CONFLICT (day) DO ...
+    return (postgresql if connection.dialect.name == 'postgresql' else sqlite).insert(DailyStats.__table__)
+
+
+def _lock_days(connection, days):
+    """Make sure ``days`` have a row and lock them until the transaction ends (in day order: no deadlocks).
+
+    SQLite has no row locks, but only one transaction writes at a time there anyway.
+    """
+    table = DailyStats.__table__
+    connection.execute(_insert(connection).on_conflict_do_nothing(index_elements=['day']),
+                       [{'day': day} for day in days])
+    connection.execute(select(table.c.day).where(table.c.day.in_(days)).order_by(table.c.day).with_for_update())
+
+
+def _upsert(connection, rows):
+    stmt = _insert(connection)
+    columns = [c.name for c in DailyStats.__table__.columns if c.name != 'day']
+    connection.execute(stmt.on_conflict_do_update(index_elements=['day'],
+                                                  set_={c: stmt.excluded[c] for c in columns}), rows)
+
+
+def refresh_days(connection, days: Iterable[date]) -> int:
+    """Recompute the rollup rows of ``days`` from the base tables; returns the number of rows written.
+
+    Per chunk of days: lock the day rows, three grouped queries, one upsert.
+    Every day gets a row, including days without activity.
+    """
+    days = sorted(set(days))
+    for i in range(0, len(days), _CHUNK):
+        chunk = days[i:i + _CHUNK]
+        # Eerst de dagen claimen, dan pas tellen: wie wacht, telt daarna de gecommitte rijen mee
+        _lock_days(connection, chunk)
+        started = dict(connection.execute(
+            select(Rental.start_date, func.count())
+            .where(Rental.start_date.in_(chunk)).group_by(Rental.start_date)
+        ).all())
+        returned = dict(connection.execute(
+            select(Rental.end_date, func.count())
+            .where(Rental.end_date.in_(chunk), Rental.status == 'returned').group_by(Rental.end_date)
+        ).all())
+        bank = Payment.method == 'bank_transfer'
+        payments = {row[0]: row[1:] for row in connection.execute(
+            select(
+                Payment.paid_at,
+                func.count(),
+                func.sum(Payment.amount),
+                _sum_if(Payment.method == 'cash', Payment.amount),
+                _sum_if(Payment.method == 'card', Payment.amount),
+                _sum_if(bank & (Payment.received == True), Payment.amount),
+                _sum_if(bank & (Payment.received != True), Payment.amount),
+            ).where(Payment.paid_at.in_(chunk)).group_by(Payment.paid_at)
+        )}
+
+        now = datetime.utcnow()
+        rows = []
+        for day in chunk:
+            count, revenue, cash, card, bank_received, bank_open = payments.get(day, (0, 0, 0, 0, 0, 0))
+            rows.append({
+                'day': day,
+                'rentals_started': int(started.get(day, 0)),
+                'rentals_returned': int(returned.get(day, 0)),
+                'payments_count': int(count or 0),
+                'revenue': float(revenue or 0),
+                'cash_amount': float(cash or 0),
+                'card_amount': float(card or 0),
+                'bank_received_amount': float(bank_received or 0),
+                'bank_open_amount': float(bank_open or 0),
+                'refreshed_at': now,
+            })
+        _upsert(connection, rows)
+    return len(days)
+
+
+def refresh_range(connection, start: date, stop: date) -> int:
+    """Recompute every day in ``start <= day < stop``."""
+    return refresh_days(connection, (start + timedelta(days=i) for i in range((stop - start).days)))
+
+
+def first_activity_date(connection):
+    """Earliest date referenced by a rental or payment, or None for an empty database."""
+    dates = connection.execute(select(
+        func.min(Rental.start_date),
+        select(func.min(Rental.end_date)).scalar_subquery(),
+        select(func.min(Payment.paid_at)).scalar_subquery(),
+    )).one()
+    dates = [d for d in dates if d is not None]
+    return min(dates) if dates else None
+
+
+# --- Bijhouden via SQLAlchemy session events ---
+
+@event.listens_for(Session, 'after_flush')
+def _collect_days(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        attrs = _DATE_ATTRS.get(type(obj))
+        if not attrs:
+            continue
+        state = inspect(obj)
+        for attr in attrs:
+            # state.dict: huidige waarde zonder lazy load (ook kolom-defaults na INSERT),
+            # history.deleted: de waarde van vóór een wijziging
+            touch(session, (state.dict.get(attr), *state.attrs[attr].history.deleted))
+
+
+@event.listens_for(Session, 'before_commit')
+def _refresh_on_commit(session):
+    if not enabled():
+        session.info.pop(_DAYS_KEY, None)
+        return
+    session.flush()
+    days = session.info.pop(_DAYS_KEY, None)
+    if days:
+        refresh_days(session.connection(), days)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _reset_on_rollback(session):
+    session.info.pop(_DAYS_KEY, None)
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, abort, current_app, Response, stream_with_context
 from datetime import datetime, date, timedelta
 from app.extensions import db
 from app.models import (
@@ -6,19 +6,34 @@ from app.models import (
     MEMBER_STATUSES, BIKE_TYPES, BIKE_STATUSES, ITEM_STATUSES, PAYMENT_METHODS
 )
 from functools import wraps
-from sqlalchemy import func, or_
+import hmac
+from app.instrumentation import query_budget
+from app.auth import current_principal, principal_cache, remember as remember_principal
+from sqlalchemy import and_
+from sqlalchemy.orm import lazyload, selectinload
+from app import aggregates, login_security, rollups
+from app.login_security import normalize_email
+from app.pagination import KeysetPage, paginate, page_size
+from app.search import count_matching, ranked
+from app.exports import available_formats as available_export_formats
 
 # Definieer de blueprint
 main = Blueprint('main', __name__)
 
 # --- AUTH DECORATORS ---
 
+# De ingelogde gebruiker komt uit app/auth.py: één keer per request, gecachet over requests heen
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             flash('Je moet inloggen om deze pagina te bekijken.', 'warning')
             return redirect(url_for('main.login'))
+        if current_principal() is None:
+            # Gebruiker bestaat niet meer
+            session.clear()
+            return redirect(url_for('main.login'))
         return f(*args, **kwargs)
     return decorated_function
 
@@ -29,13 +44,14 @@ def role_required(*allowed_roles):
             if 'user_id' not in session:
                 return redirect(url_for('main.login'))
             
-            user = User.query.get(session['user_id'])
+            user = current_principal()
             if not user or user.role not in allowed_roles:
                 flash('Je hebt geen toegang tot deze pagina.', 'error')
                 return redirect(url_for('main.dashboard'))
             
-            # Sla rol op in sessie voor templates
-            session['user_role'] = user.role
+            # Rol in de sessie voor templates; enkel schrijven als ze veranderd is (anders elke keer een nieuwe cookie)
+            if session.get('user_role') != user.role:
+                session['user_role'] = user.role
             return f(*args, **kwargs)
         return decorated_function
     return decorator
@@ -47,20 +63,6 @@ def depot_access_required(f):
 def finance_access_required(f):
     return role_required('finance_manager', 'admin')(f)
 
-# --- HELPER FUNCTIES ---
-
-def _expire_past_due_rentals():
-    """Zet verhuringen die verlopen zijn automatisch op 'returned' (best-effort)."""
-    try:
-        today = date.today()
-        overdue = Rental.query.filter(Rental.status == 'active', Rental.end_date < today).all()
-        for r in overdue:
-            r.status = 'returned'
-            if r.bike: r.bike.status = 'available'
-        if overdue: db.session.commit()
-    except Exception:
-        pass
-
 # --- ROUTES ---
 
 @main.route('/')
@@ -72,19 +74,35 @@ def home():
 @main.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
-        email = request.form.get('email', '').strip().lower()
+        email = normalize_email(request.form.get('email', ''))
         password = request.form.get('password', '')
-        
+
+        # Eerst de token buckets: een geweigerde poging kost geen query en geen hash
+        ip = request.remote_addr or '-'
+        wait = login_security.check_login_allowed(ip, email)
+        if wait:
+            flash('Te veel pogingen, probeer later opnieuw.', 'error')
+            response = current_app.make_response((render_template('login.html'), 429))
+            response.headers['Retry-After'] = str(max(1, int(wait + 0.999)))
+            return response
+
         user = User.query.filter_by(email=email).first()
-        
+
         if user and user.check_password(password):
+            login_security.login_succeeded(ip, email)
+            if user.password_needs_rehash():
+                # Nog gehasht met oude instellingen: nu het wachtwoord gekend is, opnieuw hashen
+                user.set_password(password)
+                db.session.commit()
             session['user_id'] = user.user_id
             session['user_role'] = user.role
+            remember_principal(user)
             session['user_name'] = f"{user.first_name} {user.last_name}"
             session['show_upcoming_popup'] = True
             flash(f'Welkom, {user.first_name}!', 'success')
             return redirect(url_for('main.dashboard'))
         else:
+            login_security.login_failed(ip, email)
             flash('Ongeldige inloggegevens.', 'error')
     
     return render_template('login.html')
@@ -107,23 +125,48 @@ def set_language(lang_code):
 
 @main.route('/dashboard')
 @login_required
+@query_budget(16)  # 15 + de gebruiker bij een koude principal-cache
 def dashboard():
-    _expire_past_due_rentals()
     from app.services import get_dashboard_stats 
     ctx = get_dashboard_stats()
     return render_template('dashboard.html', **ctx)
 
 @main.route('/api/dashboard/rental-activity')
 @login_required
+@query_budget(4)
 def api_dashboard_rental_activity():
     from app.services import get_rental_activity_data
     return jsonify(get_rental_activity_data())
 
+@main.route('/api/dashboard/timeseries')
+@login_required
+@query_budget(4)
+def api_dashboard_timeseries():
+    """Gebucket reeks voor de grafieken: ?metric=&granularity=day|week|month&from=&to= (to inclusief)."""
+    from app.services import get_timeseries
+    from app.timeseries import METRICS, GRANULARITIES
+    metric = request.args.get('metric', 'rentals_started')
+    granularity = request.args.get('granularity', 'day')
+    if metric not in METRICS or granularity not in GRANULARITIES:
+        return jsonify({'error': 'Onbekende metric of granularity',
+                        'metrics': sorted(METRICS), 'granularities': list(GRANULARITIES)}), 400
+    try:
+        to = date.fromisoformat(request.args['to']) if request.args.get('to') else date.today()
+        start = date.fromisoformat(request.args['from']) if request.args.get('from') else None
+    except ValueError:
+        return jsonify({'error': 'Ongeldige datum, verwacht YYYY-MM-DD'}), 400
+    try:
+        return jsonify(get_timeseries(metric, granularity, start, to))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
 @main.route('/api/dashboard/upcoming-rentals')
 @login_required
+@query_budget(4)
 def api_dashboard_upcoming_rentals():
     from app.speciaal_algoritme import get_upcoming_rentals_for_popup
-    return jsonify(get_upcoming_rentals_for_popup(30))
+    limit = request.args.get('limit', type=int)
+    return jsonify(get_upcoming_rentals_for_popup(30, limit if limit and limit > 0 else None))
 
 @main.route('/api/dashboard/upcoming-rentals/ack', methods=['POST'])
 @login_required
@@ -131,37 +174,140 @@ def api_dashboard_upcoming_rentals_ack():
     session['show_upcoming_popup'] = False
     return jsonify({'ok': True})
 
+# --- LOOKUPS (kiezers op het verhuurformulier) ---
+
+def _lookup_response(payload):
+    """JSON met korte private cache en ETag, zodat herhaalde zoekopdrachten 304 krijgen."""
+    response = jsonify(payload)
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config.get('LOOKUP_MAX_AGE', 30)
+    response.add_etag()
+    return response.make_conditional(request)
+
+@main.route('/api/lookup/members')
+@login_required
+@depot_access_required
+@query_budget(2)
+def api_lookup_members():
+    from app import lookups
+    per_page = page_size(request.args.get('per_page'), lookups.LOOKUP_PAGE_SIZE)
+    return _lookup_response(lookups.members(request.args.get('q', ''), request.args.get('after'), per_page))
+
+@main.route('/api/lookup/children')
+@login_required
+@depot_access_required
+@query_budget(2)
+def api_lookup_children():
+    from app import lookups
+    member_id = request.args.get('member_id')
+    if not member_id:
+        return jsonify({'error': 'member_id is verplicht'}), 400
+    return _lookup_response(lookups.children(member_id))
+
+@main.route('/api/lookup/bikes')
+@login_required
+@depot_access_required
+@query_budget(2)
+def api_lookup_bikes():
+    from app import lookups
+    bike_type = request.args.get('type') or None
+    if bike_type and bike_type not in BIKE_TYPES:
+        return jsonify({'error': 'Onbekend type', 'types': BIKE_TYPES}), 400
+    per_page = page_size(request.args.get('per_page'), lookups.LOOKUP_PAGE_SIZE)
+    return _lookup_response(lookups.bikes(bike_type, request.args.get('q', ''), request.args.get('after'), per_page))
+
+# --- BULK IMPORT ---
+
+@main.route('/api/import/<kind>', methods=['POST'])
+@login_required
+def api_import(kind):
+    """Upload een CSV/JSONL-bestand (veld ``file``); antwoordt met aantallen en fouten per regel."""
+    import io
+    from app import imports
+    if kind not in imports.KINDS:
+        abort(404)
+    user = current_principal()
+    allowed = user and (user.can_access_finance() if kind == 'payments' else user.can_access_depot())
+    if not allowed:
+        abort(403)
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'error': 'Geen bestand (veld "file")'}), 400
+    fmt = request.form.get('format') or imports.detect_format(upload.filename)
+    if fmt not in imports.FORMATS:
+        return jsonify({'error': 'Onbekend formaat', 'formats': list(imports.FORMATS)}), 400
+    # Werkzeug spoolt grote uploads naar een tijdelijk bestand; we lezen het als tekststroom
+    stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    result = imports.run_import(kind, stream, fmt, dry_run=request.form.get('dry_run') == 'true')
+    return jsonify(result.as_dict()), 200
+
 @main.route('/api/child/<child_id>/has-active-rental')
 @login_required
 def api_child_has_active_rental(child_id):
     r = Rental.query.filter_by(child_id=child_id, status='active').first()
     return jsonify({'hasActiveRental': bool(r), 'bikeName': r.bike.name if r and r.bike else None})
 
+# --- INTERNAL METRICS ---
+
+@main.route('/internal/metrics')
+def internal_metrics():
+    """Pool- en cachestatistieken van dit worker-proces (admin of X-Metrics-Token)."""
+    token = current_app.config.get('METRICS_TOKEN')
+    sent = request.headers.get('X-Metrics-Token', '')
+    if not (token and hmac.compare_digest(sent.encode(), token.encode())):
+        user = current_principal()
+        if not user or user.role != 'admin':
+            abort(403)
+
+    from app.cache import stats_cache
+    from app.instrumentation import pool_status, pool_wait_stats
+    return jsonify({
+        'pool': pool_status(db.engine),
+        'pool_wait': pool_wait_stats.as_dict(),
+        'stats_cache': stats_cache.stats(),
+        'principal_cache': principal_cache.stats(),
+        'login_limiter': {'ip': login_security.ip_limiter.stats(),
+                          'account': login_security.account_limiter.stats(),
+                          'email': login_security.email_limiter.stats()},
+    })
+
 # --- INVENTORY (FIETSEN & ITEMS) ---
 
 @main.route('/inventory')
 @login_required
 @depot_access_required
+@query_budget(4)
 def inventory():
-    _expire_past_due_rentals()
-    bikes = Bike.query.filter_by(archived=False).order_by(Bike.created_at.desc()).all()
+    # Eén query: elke fiets met de naam van het lid van zijn actieve verhuring (outer join),
+    # zonder de joined-eager relaties van Rental mee te laden
+    rows = db.session.query(Bike, Rental.rental_id, Member.first_name, Member.last_name) \
+        .outerjoin(Rental, and_(Rental.bike_id == Bike.bike_id, Rental.status == 'active')) \
+        .outerjoin(Member, Member.member_id == Rental.member_id) \
+        .filter(Bike.archived == False) \
+        .order_by(Bike.created_at.desc(), Bike.bike_id).all()
     items = Item.query.order_by(Item.created_at.desc()).all()
-    
+
+    bikes_by_status = {s: [] for s in BIKE_STATUSES}
     rental_map = {}
-    for r in Rental.query.filter_by(status='active').all():
-        name = f"{r.member.first_name} {r.member.last_name}" if r.member else "Onbekend"
-        if r.bike_id: rental_map[r.bike_id] = name
+    for bike, rental_id, first_name, last_name in rows:
+        if rental_id is not None:
+            rental_map[bike.bike_id] = f"{first_name} {last_name}" if first_name is not None else "Onbekend"
+        # Meerdere actieve verhuringen voor één fiets geven meerdere rijen; fiets maar één keer tonen
+        group = bikes_by_status.setdefault(bike.status, [])
+        if not group or group[-1] is not bike:
+            group.append(bike)
 
     return render_template(
         'inventory.html',
-        available_bikes=[b for b in bikes if b.status == 'available'],
-        rented_bikes=[b for b in bikes if b.status == 'rented'],
-        repair_bikes=[b for b in bikes if b.status == 'repair'],
+        available_bikes=bikes_by_status['available'],
+        rented_bikes=bikes_by_status['rented'],
+        repair_bikes=bikes_by_status['repair'],
         available_items=[i for i in items if i.status == 'available'],
         rented_items=[i for i in items if i.status in ['rented', 'unavailable']],
         repair_items=[i for i in items if i.status == 'repair'],
         rental_map=rental_map,
-        item_rental_map={} 
+        # Objecten hebben (nog) geen verhuringen in het datamodel
+        item_rental_map={}
     )
 
 @main.route('/bikes/new', methods=['GET', 'POST'])
@@ -205,7 +351,9 @@ def bikes_status(bike_id):
 @depot_access_required
 def bikes_delete(bike_id):
     bike = Bike.query.get_or_404(bike_id)
-    Rental.query.filter_by(bike_id=bike.bike_id).delete()
+    rentals = Rental.query.filter_by(bike_id=bike.bike_id)
+    rollups.touch_query(rentals)
+    rentals.delete()
     db.session.delete(bike)
     db.session.commit()
     flash('Fiets verwijderd.', 'warning')
@@ -242,13 +390,35 @@ def items_delete(item_id):
 @main.route('/members')
 @login_required
 @depot_access_required
+@query_budget(8)
 def members_list():
-    members = Member.query.order_by(Member.last_name, Member.first_name).all()
+    search = (request.args.get('search') or '').strip()
+    per_page = page_size(request.args.get('per_page'))
+    if search:
+        # Zoekresultaten op relevantie, enkel de beste treffers (geen paginering)
+        members = ranked(Member.query.options(selectinload(Member.children)), Member, search, per_page)
+        page = KeysetPage(members, per_page, None, None)
+        members_total = count_matching(Member, search)
+    else:
+        page = paginate(
+            Member.query.options(selectinload(Member.children)),
+            [(Member.last_name, False), (Member.first_name, False), (Member.member_id, False)],
+            after=request.args.get('after'), before=request.args.get('before'),
+            per_page=per_page,
+        )
+        members = page.items
+        members_total = Member.query.count()
     active = [m for m in members if m.status in ['active', 'actief', None]]
     inactive = [m for m in members if m.status not in ['active', 'actief', None]]
-    blocked_ids = {r.member_id for r in Rental.query.filter_by(status='active').all() if r.member_id}
-    
-    return render_template('members.html', active_members=active, inactive_members=inactive, members_sorted=members, today=date.today(), blocked_member_ids=blocked_ids)
+    # Enkel de leden op deze pagina controleren op actieve verhuringen
+    page_ids = [m.member_id for m in members]
+    blocked_ids = {mid for (mid,) in db.session.query(Rental.member_id).filter(
+        Rental.status == 'active', Rental.member_id.in_(page_ids)
+    ).distinct()} if page_ids else set()
+
+    return render_template('members.html', active_members=active, inactive_members=inactive, members_sorted=members,
+                           members_total=members_total, page=page,
+                           today=date.today(), blocked_member_ids=blocked_ids, search_query=search)
 
 @main.route('/members/new', methods=['GET', 'POST'])
 @login_required
@@ -316,8 +486,10 @@ def members_delete(member_id):
         return redirect(url_for('main.members_list'))
         
     m = Member.query.get_or_404(member_id)
-    Rental.query.filter_by(member_id=m.member_id).delete()
-    Payment.query.filter_by(member_id=m.member_id).delete()
+    # Bulk deletes passeren de flush niet: eerst de geraakte dagen van de rollup markeren
+    for rows in (Rental.query.filter_by(member_id=m.member_id), Payment.query.filter_by(member_id=m.member_id)):
+        rollups.touch_query(rows)
+        rows.delete()
     db.session.delete(m)
     db.session.commit()
     flash('Lid verwijderd.', 'info')
@@ -327,7 +499,11 @@ def members_delete(member_id):
 @login_required
 def members_children(member_id):
     member = Member.query.get_or_404(member_id)
-    active_rentals = {r.child_id: r for r in Rental.query.filter_by(status='active').all()}
+    # Enkel de actieve verhuringen van de kinderen van dit lid; de fiets is het enige wat de pagina toont
+    active_rentals = {r.child_id: r for r in Rental.query
+                      .options(lazyload(Rental.member), lazyload(Rental.child))
+                      .join(Child, Child.child_id == Rental.child_id)
+                      .filter(Child.member_id == member_id, Rental.status == 'active').all()}
     bikes = Bike.query.filter_by(status='available', archived=False).all()
     return render_template('children.html', member=member, children=member.children, active_rentals=active_rentals, available_bikes=bikes)
 
@@ -384,51 +560,32 @@ def members_children_delete(member_id, child_id):
 @main.route('/rentals')
 @login_required
 @finance_access_required
+@query_budget(6)
 def rentals_list():
-    _expire_past_due_rentals()
-    # FIX: Gebruik outerjoin voor Child en Member zodat verhuringen zonder kind/member niet verdwijnen
-    query = db.session.query(Rental, Bike, Child, Member)\
-        .join(Bike)\
-        .outerjoin(Child, Rental.child_id == Child.child_id)\
-        .outerjoin(Member, Rental.member_id == Member.member_id)
-    
+    from app.services import rentals_query, RENTAL_SORT_KEYS
     status = request.args.get('status', 'all')
-    if status != 'all': query = query.filter(Rental.status == status)
-    
-    # Optioneel filter op fietstype
     bike_type = request.args.get('bike_type') or ''
-    if bike_type:
-        query = query.filter(Bike.type == bike_type)
-    
-    # Optioneel zoeken op naam kind of ouder
     search = (request.args.get('search') or '').strip()
-    if search:
-        like = f"%{search.lower()}%"
-        query = query.filter(
-            or_(
-                func.lower(Member.first_name).like(like),
-                func.lower(Member.last_name).like(like),
-                func.lower(Child.first_name).like(like),
-                func.lower(Child.last_name).like(like)
-            )
-        )
-    
-    rentals = query.order_by(Rental.status, Rental.start_date.desc()).all()
-    
-    counts = {
-        'active': Rental.query.filter_by(status='active').count(),
-        'returned': Rental.query.filter_by(status='returned').count()
-    }
-    
+    query = rentals_query(status, bike_type, search)
+
+    page = paginate(
+        query, RENTAL_SORT_KEYS,
+        after=request.args.get('after'), before=request.args.get('before'),
+        per_page=page_size(request.args.get('per_page')),
+    )
+    counts = aggregates.rental_status_counts()
+
     return render_template(
         'rentals.html',
-        rentals_data=rentals,
-        total_active=counts['active'],
-        total_returned=counts['returned'],
+        rentals_data=page.items,
+        page=page,
+        total_active=counts.get('active', 0),
+        total_returned=counts.get('returned', 0),
         bike_types=BIKE_TYPES,
         status_filter=status,
         bike_type=bike_type,
-        search_query=search
+        search_query=search,
+        export_formats=available_export_formats()
     )
 
 @main.route('/rentals/new', methods=['GET', 'POST'])
@@ -471,12 +628,11 @@ def rental_new(bike_id=None):
         flash('Verhuring succesvol.', 'success')
         return redirect(url_for('main.rentals_list'))
 
+    # Leden, kinderen en fietsen laadt het formulier zelf via /api/lookup/*
     context = {
-        'members': Member.query.order_by(Member.last_name).all(),
-        'available_bikes': Bike.query.filter_by(status='available', archived=False).all(),
-        'children': Child.query.all(),
+        'bike_types': BIKE_TYPES,
         'today': date.today(),
-        'bike': Bike.query.get(bike_id) if bike_id else None
+        'bike': Bike.query.get_or_404(bike_id) if bike_id else None
     }
     template = 'rent.html' if bike_id else 'rent_new.html'
     return render_template(template, **context)
@@ -518,70 +674,84 @@ def rentals_delete_returned(rental_id):
     flash('Verhuring verwijderd.', 'info')
     return redirect(url_for('main.rentals_list'))
 
+@main.route('/rentals/export.<fmt>')
+@login_required
+@finance_access_required
+def rentals_export(fmt):
+    """Verhuringen met de filters van de lijst als CSV/XLSX, gestreamd."""
+    from app import exports
+    from app.services import rentals_query, RENTAL_SORT_KEYS
+    if fmt not in exports.available_formats():
+        abort(404)
+    query = rentals_query(request.args.get('status', 'all'), request.args.get('bike_type') or '',
+                          request.args.get('search', ''))
+    return _export_response(fmt, 'verhuringen',
+                            exports.export(fmt, query, exports.RENTAL_COLUMNS, RENTAL_SORT_KEYS, 'Verhuringen'))
+
+def _export_response(fmt, name, chunks):
+    from app.exports import FORMATS
+    return Response(stream_with_context(chunks), mimetype=FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename="{name}-{date.today().isoformat()}.{fmt}"',
+        'Cache-Control': 'no-store',
+    })
+
 # --- BETALINGEN (PAYMENTS) ---
 
 @main.route('/payments')
 @login_required
 @finance_access_required
+@query_budget(6)
 def payments_list():
-    # Base query
-    query = db.session.query(Payment, Member).join(Member)
-
-    # Filters
+    from app.services import payment_filter_criteria, get_payment_totals, payments_query, payment_sort_keys
     method_filter = request.args.get('method', 'all')
-    if method_filter != 'all':
-        query = query.filter(Payment.method == method_filter)
-
     period_filter = request.args.get('period', 'all')
-    if period_filter != 'all':
-        today = date.today()
-        if period_filter == 'today':
-            start = today
-        elif period_filter == 'week':
-            # Monday as start of week
-            start = today - timedelta(days=today.weekday())
-        elif period_filter == 'month':
-            start = today.replace(day=1)
-        else:
-            start = None
-        if start is not None:
-            query = query.filter(Payment.paid_at >= start)
-
     search = (request.args.get('search') or '').strip()
-    if search:
-        like = f"%{search.lower()}%"
-        query = query.filter(or_(func.lower(Member.first_name).like(like),
-                                 func.lower(Member.last_name).like(like),
-                                 func.lower(Member.email).like(like)))
+    # Dezelfde filters voor de lijst en voor de totalen
+    criteria = payment_filter_criteria(method_filter, period_filter, search)
+    query = payments_query(criteria)
 
     # Sorting
     sort = request.args.get('sort', 'date')
     direction = request.args.get('dir', 'desc')
-    if sort == 'method':
-        order_clause = Payment.method.asc() if direction == 'asc' else Payment.method.desc()
-    elif sort == 'amount':
-        order_clause = Payment.amount.asc() if direction == 'asc' else Payment.amount.desc()
-    else:
-        order_clause = Payment.paid_at.asc() if direction == 'asc' else Payment.paid_at.desc()
-    query = query.order_by(order_clause, Payment.paid_at.desc())
+    keys = payment_sort_keys(sort, direction)
+
+    page = paginate(query, keys, after=request.args.get('after'), before=request.args.get('before'),
+                    per_page=page_size(request.args.get('per_page')))
 
-    payments = query.all()
-    total = sum(p.amount for p, m in payments if p.received)
+    # Totalen over alle gefilterde betalingen (niet enkel deze pagina)
+    totals = get_payment_totals(criteria)
 
     return render_template(
         'payments.html',
-        payments_data=payments,
-        total_payments=total,
-        cash_payments=sum(p.amount for p, m in payments if p.method=='cash'),
-        card_payments=sum(p.amount for p, m in payments if p.method=='card'),
-        bank_payments=sum(p.amount for p, m in payments if p.method=='bank_transfer' and p.received),
+        payments_data=page.items,
+        page=page,
+        total_payments=totals['total'],
+        cash_payments=totals['cash'],
+        card_payments=totals['card'],
+        bank_payments=totals['bank'],
         method_filter=method_filter,
         period_filter=period_filter,
         search_query=search,
         sort=sort,
-        direction=direction
+        direction=direction,
+        export_formats=available_export_formats()
     )
 
+@main.route('/payments/export.<fmt>')
+@login_required
+@finance_access_required
+def payments_export(fmt):
+    """Betalingen met de filters en sortering van de lijst als CSV/XLSX, gestreamd."""
+    from app import exports
+    from app.services import payment_filter_criteria, payments_query, payment_sort_keys
+    if fmt not in exports.available_formats():
+        abort(404)
+    criteria = payment_filter_criteria(request.args.get('method', 'all'), request.args.get('period', 'all'),
+                                       request.args.get('search', ''))
+    keys = payment_sort_keys(request.args.get('sort', 'date'), request.args.get('dir', 'desc'))
+    return _export_response(fmt, 'betalingen',
+                            exports.export(fmt, payments_query(criteria), exports.PAYMENT_COLUMNS, keys, 'Betalingen'))
+
 @main.route('/payments/new', methods=['GET', 'POST'])
 @main.route('/members/<member_id>/payment', methods=['GET', 'POST'])
 @login_required
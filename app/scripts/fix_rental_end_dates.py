@@ -1,24 +1,13 @@
-from datetime import timedelta
-from app.extensions import db
-from app.models import Rental
+from app import maintenance
 
 
 def backfill_end_dates():
-    count = 0
-    rentals = Rental.query.all()
-    for r in rentals:
-        try:
-            if r.start_date and not r.end_date:
-                r.end_date = r.start_date + timedelta(days=365)
-                count += 1
-        except Exception:
-            continue
-    db.session.commit()
-    return count
+    """Chunked UPDATE via `flask maint rental-end-dates`; returns the number of rentals updated."""
+    return maintenance.run('rental-end-dates').get('rental', 0)
 
 if __name__ == '__main__':
     # This script expects to be run within the Flask app context.
-    # Use run_migration.py to execute it.
+    # Use run_migration.py to execute it, or `flask --app run maint rental-end-dates`.
     print("Start backfilling rental end dates...")
     updated = backfill_end_dates()
     print(f"Updated rentals: {updated}")
@@ -1,28 +1,10 @@
-from app import create_app
-from app.extensions import db
-from app.models import Member
+from app import create_app, maintenance
 
-# Map localized/legacy statuses to canonical
-STATUS_MAP = {
-    None: 'active',
-    '': 'active',
-    'actief': 'active',
-    'inactief': 'inactive',
-    'gepauzeerd': 'paused',
-}
+# Zelfde als `flask --app run maint member-statuses` (zie app/maintenance.py voor de statusmapping)
 
 if __name__ == '__main__':
     app = create_app()
     with app.app_context():
-        total = 0
-        updated = 0
-        members = Member.query.all()
-        for m in members:
-            s = (m.status or '').strip().lower()
-            canonical = STATUS_MAP.get(s, s if s in {'active','inactive','paused'} else 'active')
-            total += 1
-            if m.status != canonical:
-                m.status = canonical
-                updated += 1
-        db.session.commit()
-        print(f"Members scanned: {total}, updated: {updated}")
+        scanned = maintenance.count('member-statuses')['member']
+        updated = maintenance.run('member-statuses').get('member', 0)
+        print(f"Members to normalize: {scanned}, updated: {updated}")
@@ -0,0 +1,203 @@
+"""
+Name search for members and children.
+
+Every member and child carries a ``search_text`` column: first name, last name
+(and e-mail for members) lowercased, accent-folded and whitespace-collapsed,
+kept up to date by mapper events. Searching is a substring match on that
+column, served by an index instead of ``lower(col) LIKE '%term%'`` over four
+columns:
+
+- PostgreSQL: a ``pg_trgm`` GIN index on ``search_text`` (``LIKE`` uses it),
+  ranked with ``similarity()``. See ``migrations/add_search.sql``.
+- SQLite: an FTS5 table with the trigram tokenizer per model, kept in sync by
+  triggers, whose ``LIKE`` is answered from the full-text index. Terms shorter
+  than three characters fall back to scanning ``search_text``.
+
+``flask reindex-search`` recomputes ``search_text`` (and the FTS tables) for
+existing rows. A SQLite database created before this column gets the column,
+the FTS tables and their triggers at startup (``upgrade_sqlite``).
+"""
+import re
+import unicodedata
+
+from sqlalchemy import DDL, bindparam, case, column, event, func, select, table, text
+
+from app.extensions import db
+from app.models import Child, Member
+
+# Kolommen waaruit de zoektekst per model opgebouwd wordt
+SOURCES = {
+    Member: ('first_name', 'last_name', 'email'),
+    Child: ('first_name', 'last_name'),
+}
+# Trigram-index: kortere termen kunnen de index niet gebruiken
+MIN_INDEXED_LENGTH = 3
+
+
+def normalize(*parts) -> str:
+    """Lowercase, strip accents and LIKE wildcards, collapse whitespace: 'Zoë  Müller' -> 'zoe muller'."""
+    value = ' '.join(p for p in parts if p)
+    if not value.isascii():
+        value = unicodedata.normalize('NFKD', value)
+        value = ''.join(c for c in value if not unicodedata.combining(c))
+    value = re.sub(r'[%_\\]', ' ', value.lower())
+    return ' '.join(value.split())
+
+
+def search_text_for(obj) -> str:
+    return normalize(*(getattr(obj, attr) for attr in SOURCES[type(obj)]))
+
+
+def _set_search_text(mapper, connection, target):
+    target.search_text = search_text_for(target)
+
+
+for _model in SOURCES:
+    event.listen(_model, 'before_insert', _set_search_text)
+    event.listen(_model, 'before_update', _set_search_text)
+
+
+# --- SQLite: FTS5 trigram-tabellen, bijgehouden met triggers ---
+
+def _fts_name(model) -> str:
+    return f'{model.__tablename__}_search'
+
+
+def _fts_table(model):
+    pk = model.__mapper__.primary_key[0].name
+    return table(_fts_name(model), column(pk), column('search_text')), pk
+
+
+def _fts_statements(model) -> list:
+    name, source = _fts_name(model), model.__tablename__
+    pk = model.__mapper__.primary_key[0].name
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({pk} UNINDEXED, search_text, tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {name} ({pk}, search_text) VALUES (new.{pk}, coalesce(new.search_text, '')); END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {source} BEGIN "
+        f"DELETE FROM {name} WHERE {pk} = old.{pk}; END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF search_text ON {source} BEGIN "
+        f"UPDATE {name} SET search_text = coalesce(new.search_text, '') WHERE {pk} = old.{pk}; END",
+    ]
+
+
+def _install_fts(model):
+    for statement in _fts_statements(model):
+        event.listen(model.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+    event.listen(model.__table__, 'before_drop',
+                 DDL(f'DROP TABLE IF EXISTS {_fts_name(model)}').execute_if(dialect='sqlite'))
+
+
+for _model in SOURCES:
+    _install_fts(_model)
+
+
+def ensure_sqlite_schema(connection) -> bool:
+    """Add ``search_text`` and the FTS tables/triggers to a SQLite database created before them.
+
+    ``create_all`` does not alter existing tables, so ``after_create`` never fires there.
+    Returns True when something was added (the rows then still need ``reindex()``).
+    """
+    if connection.dialect.name != 'sqlite':
+        return False
+    changed = False
+    for model in SOURCES:
+        source = model.__tablename__
+        columns = {row[1] for row in connection.exec_driver_sql(f'PRAGMA table_info({source})')}
+        if not columns:
+            continue  # tabel bestaat nog niet; create_all maakt alles aan
+        if 'search_text' not in columns:
+            connection.exec_driver_sql(f'ALTER TABLE {source} ADD COLUMN search_text TEXT')
+            changed = True
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (_fts_name(model),)).first()
+        for statement in _fts_statements(model):
+            connection.exec_driver_sql(statement)
+        changed = changed or exists is None
+    return changed
+
+
+def upgrade_sqlite():
+    """Startup check for SQLite: add what ``ensure_sqlite_schema`` finds missing and fill it once."""
+    with db.engine.begin() as connection:
+        changed = ensure_sqlite_schema(connection)
+    if changed:
+        reindex()
+
+
+# --- Zoeken ---
+
+def _dialect() -> str:
+    return db.session.get_bind().dialect.name
+
+
+def matching_ids(model, term: str):
+    """SELECT of the primary keys of ``model`` rows whose search text contains ``term``.
+
+    Meant for semi-joins: ``Rental.member_id.in_(matching_ids(Member, term))``.
+    """
+    needle = normalize(term)
+    pattern = f'%{needle}%'
+    if _dialect() == 'sqlite' and len(needle) >= MIN_INDEXED_LENGTH:
+        fts, pk = _fts_table(model)
+        return select(fts.c[pk]).where(fts.c.search_text.like(pattern))
+    pk = model.__mapper__.primary_key[0]
+    return select(pk).where(model.search_text.like(pattern))
+
+
+def rank(model, term: str):
+    """ORDER BY expressions, best match first."""
+    needle = normalize(term)
+    if _dialect() == 'postgresql':
+        return [func.similarity(model.search_text, needle).desc()]
+    # Begint de zoektekst (voornaam) of een woord ermee, dan eerst; daarna de kortste teksten
+    return [
+        case((model.search_text.like(f'{needle}%'), 0),
+             (model.search_text.like(f'% {needle}%'), 1), else_=2),
+        func.length(model.search_text),
+    ]
+
+
+def ranked(query, model, term: str, limit: int):
+    """Apply the search filter and ranking to an ORM ``query`` over ``model``; returns at most ``limit`` rows."""
+    pk = model.__mapper__.primary_key[0]
+    return query.filter(pk.in_(matching_ids(model, term))) \
+        .order_by(*rank(model, term), pk).limit(limit).all()
+
+
+def count_matching(model, term: str) -> int:
+    """Number of ``model`` rows matching ``term`` (``ranked`` returns only the best ``limit`` of them)."""
+    return db.session.scalar(select(func.count()).select_from(matching_ids(model, term).subquery()))
+
+
+def reindex(chunk_size: int = 1000) -> dict:
+    """Recompute ``search_text`` for every member and child, in primary-key order chunks."""
+    ensure_sqlite_schema(db.session.connection())
+    counts = {}
+    for model, attrs in SOURCES.items():
+        pk = model.__mapper__.primary_key[0]
+        columns = [getattr(model, attr) for attr in attrs]
+        counts[model.__tablename__] = 0
+        last = None
+        while True:
+            q = db.session.query(pk, *columns).order_by(pk)
+            if last is not None:
+                q = q.filter(pk > last)
+            rows = q.limit(chunk_size).all()
+            if not rows:
+                break
+            db.session.execute(
+                model.__table__.update().where(model.__table__.c[pk.key] == bindparam('_id')),
+                [{'_id': row[0], 'search_text': normalize(*row[1:])} for row in rows],
+            )
+            counts[model.__tablename__] += len(rows)
+            last = rows[-1][0]
+        if _dialect() == 'sqlite':
+            # FTS-tabel volledig heropbouwen (ook rijen van vóór de triggers)
+            name, pk_name = _fts_name(model), pk.key
+            db.session.execute(text(f'DELETE FROM {name}'))
+            db.session.execute(text(f"INSERT INTO {name} ({pk_name}, search_text) "
+                                    f"SELECT {pk_name}, coalesce(search_text, '') FROM {model.__tablename__}"))
+        db.session.commit()
+    return counts
@@ -1,108 +1,88 @@
 from datetime import date, timedelta
-from sqlalchemy import func, desc, or_
+from sqlalchemy import func, or_
+from app import aggregates, timeseries
+from app.cache import stats_cache
+from app.dateranges import date_range
 from app.extensions import db
-from app.models import Bike, Member, Rental, Payment, Child, Item
+from app.search import matching_ids
+from app.models import Bike, Child, Rental, Payment, Member, without_eager
 
+@stats_cache.memoize('dashboard_stats')
 def get_dashboard_stats():
     today = date.today()
-    month_start = today.replace(day=1)
-    thirty_days_ago = today - timedelta(days=30)
-    seven_days_ago = today - timedelta(days=7)
-    
+
+    # Alle tellers komen uit een handvol gegroepeerde queries (zie app/aggregates.py)
+    bikes = aggregates.bike_summary(today)
+    members = aggregates.member_summary(today)
+    children = aggregates.child_summary()
+    payments = aggregates.payment_summary(today)
+    rental_counts = aggregates.rental_status_counts()
+
     # --- BASIS TELLERS ---
-    total_bikes = Bike.query.filter_by(archived=False).count()
-    available_bikes_count = Bike.query.filter_by(status='available', archived=False).count()
-    rented_bikes_count = Bike.query.filter_by(status='rented', archived=False).count()
-    repair_bikes_count = Bike.query.filter_by(status='repair', archived=False).count()
-    
-    # Fietsen toegevoegd vandaag
-    new_bikes_today = Bike.query.filter(
-        Bike.archived == False, 
-        func.date(Bike.created_at) == today
-    ).count()
-    
+    total_bikes = bikes['total']
+    available_bikes_count = bikes['by_status']['available']
+    rented_bikes_count = bikes['by_status']['rented']
+    repair_bikes_count = bikes['by_status']['repair']
+    new_bikes_today = bikes['new_today']
+
     # --- LEDEN STATISTIEKEN ---
-    total_members = Member.query.count()
-    active_members_count = Member.query.filter_by(status='active').count()
-    new_members_this_month = Member.query.filter(func.date(Member.created_at) >= month_start).count()
-    
+    total_members = members['total']
+    active_members_count = members['active']
+    new_members_this_month = members['new_this_month']
     # Achterstallige leden (geen betaling in laatste jaar of nooit)
-    one_year_ago = today - timedelta(days=365)
-    overdue_members_count = Member.query.filter(
-        Member.status == 'active',
-        or_(Member.last_payment == None, Member.last_payment < one_year_ago)
-    ).count()
-    
+    overdue_members_count = members['overdue']
+
     # --- KINDEREN ---
-    total_children = Child.query.count()
+    total_children = children['total']
     # Kinderen zonder actieve fiets
-    children_with_rental_ids = db.session.query(Rental.child_id).filter(
-        Rental.status == 'active', Rental.child_id != None
-    ).distinct()
-    children_without_bike = Child.query.filter(~Child.child_id.in_(children_with_rental_ids)).count()
+    children_without_bike = total_children - children['with_bike']
     new_children_this_month = 0 # Placeholder
-    
+
     # --- BETALINGEN ---
-    payments_this_month = db.session.query(func.sum(Payment.amount)).filter(func.date(Payment.paid_at) >= month_start).scalar() or 0
-    
+    payments_this_month = payments['this_month']
     # Totalen per methode (voor grafiek)
-    cash_payments = db.session.query(func.sum(Payment.amount)).filter(Payment.method == 'cash').scalar() or 0
-    card_payments = db.session.query(func.sum(Payment.amount)).filter(Payment.method == 'card').scalar() or 0
-    bank_payments = db.session.query(func.sum(Payment.amount)).filter(Payment.method == 'bank_transfer', Payment.received == True).scalar() or 0
-    
+    cash_payments = payments['cash']
+    card_payments = payments['card']
+    bank_payments = payments['bank']
     overdue_amount = overdue_members_count * 10 # Ruwe schatting
-    last_payment = Payment.query.order_by(Payment.paid_at.desc()).first()
-    
+
+    # --- GRAFIEK DATA (één gegroepeerde query per reeks, zie app/timeseries.py) ---
+    tomorrow = today + timedelta(days=1)
+    start_of_week = today - timedelta(days=today.weekday())
+    first_week = start_of_week - timedelta(weeks=7)
+    rentals_per_day = timeseries.series('rentals_started', 'day', today - timedelta(days=6), tomorrow)
+    returns_per_day = timeseries.series('rentals_returned', 'day', today - timedelta(days=6), tomorrow)
+    revenue_per_week = timeseries.series('revenue', 'week', first_week, start_of_week + timedelta(weeks=1))
+
     # --- VERHURINGEN ---
-    active_rentals_count = Rental.query.filter_by(status='active').count()
-    rentals_today = Rental.query.filter(func.date(Rental.start_date) == today).count()
-    returns_today = Rental.query.filter(func.date(Rental.end_date) == today, Rental.status == 'returned').count()
-    
+    active_rentals_count = rental_counts.get('active', 0)
+    rentals_today = rentals_per_day[-1][1]
+    returns_today = returns_per_day[-1][1]
+
     # --- PERCENTAGES ---
     active_member_percentage = round((active_members_count / total_members * 100) if total_members > 0 else 0, 1)
     bike_availability_percentage = round((available_bikes_count / total_bikes * 100) if total_bikes > 0 else 0, 1)
     children_with_bike_percentage = round(((total_children - children_without_bike) / total_children * 100) if total_children > 0 else 0, 1)
 
-    # --- REPAIR STATS (Dit miste je!) ---
+    # --- REPAIR STATS ---
     repair_stats = {
         'total_in_repair': repair_bikes_count,
         'avg_repair_time': None, # Placeholder
-        'bikes': Bike.query.filter_by(status='repair', archived=False).limit(5).all()
+        'bikes': db.session.query(Bike.bike_id, Bike.name, Bike.type)
+            .filter(Bike.status == 'repair', Bike.archived == False).limit(5).all()
     }
 
-    # --- GRAFIEK DATA (Lijsten opbouwen) ---
     # 1. Rental Activity (laatste 7 dagen)
-    rental_chart_labels = []
-    rental_chart_rentals = []
-    rental_chart_returns = []
-    for i in range(6, -1, -1):
-        day = today - timedelta(days=i)
-        rental_chart_labels.append(day.strftime('%d/%m'))
-        rental_chart_rentals.append(Rental.query.filter(func.date(Rental.start_date) == day).count())
-        rental_chart_returns.append(Rental.query.filter(func.date(Rental.end_date) == day, Rental.status == 'returned').count())
+    rental_chart_labels = [timeseries.label(day, 'day') for day, _ in rentals_per_day]
+    rental_chart_rentals = [count for _, count in rentals_per_day]
+    rental_chart_returns = [count for _, count in returns_per_day]
 
     # 2. Wekelijkse omzet (laatste 8 weken)
-    payment_weeks = []
-    payment_amounts = []
-    start_of_week = today - timedelta(days=today.weekday())
-    for i in range(7, -1, -1):
-        week_start = start_of_week - timedelta(weeks=i)
-        week_end = week_start + timedelta(days=7)
-        amt = db.session.query(func.sum(Payment.amount)).filter(Payment.paid_at >= week_start, Payment.paid_at < week_end).scalar() or 0
-        payment_weeks.append(f"{week_start.strftime('%d/%m')}")
-        payment_amounts.append(float(amt))
+    payment_weeks = [timeseries.label(week, 'week') for week, _ in revenue_per_week]
+    payment_amounts = [amount for _, amount in revenue_per_week]
 
     # 3. Categorieën
-    bike_categories = []
-    # Simpele groepering op type
-    types = db.session.query(Bike.type).distinct().all()
-    for t in types:
-        t_name = t[0] or "Onbekend"
-        total = Bike.query.filter_by(type=t_name, archived=False).count()
-        avail = Bike.query.filter_by(type=t_name, status='available', archived=False).count()
-        rented = Bike.query.filter_by(type=t_name, status='rented', archived=False).count()
-        repair = Bike.query.filter_by(type=t_name, status='repair', archived=False).count()
-        bike_categories.append({'name': t_name.title(), 'total': total, 'available': avail, 'rented': rented, 'repair': repair})
+    bike_categories = bikes['categories']
 
     # --- RETURN CONTEXT ---
     return {
@@ -173,18 +153,129 @@ def get_dashboard_stats():
         'avg_rental_duration': 0
     }
 
+@stats_cache.memoize('rental_activity')
 def get_rental_activity_data():
     """API helper for dashboard chart: weekly rentals started (last 8 weeks)."""
     today = date.today()
-    labels = []
-    data = []
-    # Start from Monday of current week
+    # Start from Monday of current week, 8 weeks history including current
     start_of_week = today - timedelta(days=today.weekday())
-    # Build 8 weeks history including current
-    for i in range(7, -1, -1):
-        week_start = start_of_week - timedelta(weeks=i)
-        week_end = week_start + timedelta(days=7)
-        labels.append(week_start.strftime('%d/%m'))
-        count = Rental.query.filter(Rental.start_date >= week_start, Rental.start_date < week_end).count()
-        data.append(count)
-    return {'labels': labels, 'rentals': data}
\ No newline at end of file
+    first_week = start_of_week - timedelta(weeks=7)
+    weeks = timeseries.series('rentals_started', 'week', first_week, start_of_week + timedelta(weeks=1))
+    return {'labels': [timeseries.label(week, 'week') for week, _ in weeks],
+            'rentals': [count for _, count in weeks]}
+
+
+# Standaard historiek per granularity als ?from= ontbreekt
+TIMESERIES_DEFAULT_SPAN = {'day': timedelta(days=29), 'week': timedelta(weeks=11), 'month': timedelta(days=334)}
+TIMESERIES_MAX_BUCKETS = 400
+
+
+@stats_cache.memoize('timeseries')
+def get_timeseries(metric, granularity, start, to):
+    """JSON payload for /api/dashboard/timeseries; ``to`` is inclusive, ``start`` defaults to a recent span."""
+    start = start or to - TIMESERIES_DEFAULT_SPAN[granularity]
+    if start > to:
+        raise ValueError('from moet vóór to liggen')
+    if len(timeseries.buckets(start, to + timedelta(days=1), granularity)) > TIMESERIES_MAX_BUCKETS:
+        raise ValueError(f'Maximaal {TIMESERIES_MAX_BUCKETS} buckets per aanvraag')
+    points = timeseries.series(metric, granularity, start, to + timedelta(days=1))
+    return {
+        'metric': metric,
+        'granularity': granularity,
+        'from': start.isoformat(),
+        'to': to.isoformat(),
+        'buckets': [day.isoformat() for day, _ in points],
+        'labels': [timeseries.label(day, granularity) for day, _ in points],
+        'values': [value for _, value in points],
+    }
+
+
+# --- BETALINGEN OVERZICHT ---
+
+def payment_filter_criteria(method='all', period='all', search=''):
+    """WHERE-criteria of the payments overview, shared by the list query and its totals.
+
+    The member search is a semi-join on member_id (indexed search text, see
+    app/search.py) so the criteria also apply to queries that do not join Member.
+    """
+    criteria = []
+    if method and method != 'all':
+        criteria.append(Payment.method == method)
+
+    today = date.today()
+    period_start = {
+        'today': today,
+        'week': today - timedelta(days=today.weekday()),  # Monday as start of week
+        'month': today.replace(day=1),
+    }.get(period)
+    if period_start is not None:
+        criteria.append(date_range(Payment.paid_at, period_start))
+
+    search = (search or '').strip()
+    if search:
+        criteria.append(Payment.member_id.in_(matching_ids(Member, search)))
+    return criteria
+
+
+def payments_query(criteria):
+    """(Payment, Member) rows matching ``criteria``; shared by the list page and the export."""
+    return db.session.query(Payment, Member).options(*without_eager(Payment)).join(Member).filter(*criteria)
+
+
+def payment_sort_keys(sort='date', direction='desc'):
+    """Keyset sort keys of the payments overview (always ending with the primary key)."""
+    descending = direction != 'asc'
+    if sort == 'method':
+        keys = [(Payment.method, descending), (Payment.paid_at, True)]
+    elif sort == 'amount':
+        keys = [(Payment.amount, descending), (Payment.paid_at, True)]
+    else:
+        keys = [(Payment.paid_at, descending)]
+    keys.append((Payment.payment_id, keys[0][1]))
+    return keys
+
+
+def get_payment_totals(criteria):
+    """Totals cards of the payments overview in one ``GROUP BY method, received`` query."""
+    rows = db.session.query(Payment.method, Payment.received, func.sum(Payment.amount)) \
+        .filter(*criteria).group_by(Payment.method, Payment.received).all()
+    totals = {'total': 0.0, 'cash': 0.0, 'card': 0.0, 'bank': 0.0}
+    for method, received, amount in rows:
+        amount = float(amount or 0)
+        if received:
+            totals['total'] += amount
+        if method == 'cash':
+            totals['cash'] += amount
+        elif method == 'card':
+            totals['card'] += amount
+        elif method == 'bank_transfer' and received:
+            totals['bank'] += amount
+    return totals
+
+
+# --- VERHURINGEN OVERZICHT ---
+
+RENTAL_SORT_KEYS = [(Rental.status, False), (Rental.start_date, True), (Rental.rental_id, True)]
+
+
+def rentals_query(status='all', bike_type='', search=''):
+    """(Rental, Bike, Child, Member) rows of the rentals overview with its filters; shared with the export."""
+    # Outer joins: verhuringen zonder kind/lid mogen niet verdwijnen.
+    # Bike/Child/Member komen uit de eigen joins; de joined-eager relaties van Rental zouden ze nog eens joinen
+    query = db.session.query(Rental, Bike, Child, Member) \
+        .options(*without_eager(Rental)) \
+        .join(Bike) \
+        .outerjoin(Child, Rental.child_id == Child.child_id) \
+        .outerjoin(Member, Rental.member_id == Member.member_id)
+    if status and status != 'all':
+        query = query.filter(Rental.status == status)
+    if bike_type:
+        query = query.filter(Bike.type == bike_type)
+    # Zoeken op naam kind of ouder (geïndexeerde zoektekst, zie app/search.py)
+    search = (search or '').strip()
+    if search:
+        query = query.filter(or_(
+            Rental.member_id.in_(matching_ids(Member, search)),
+            Rental.child_id.in_(matching_ids(Child, search)),
+        ))
+    return query
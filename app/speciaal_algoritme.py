@@ -1,69 +1,171 @@
 from datetime import date, timedelta
-from typing import List, Dict, Any
-
-from app.extensions import db
-from app.models import Rental, Member, Child, Bike
+from typing import List, Dict, Any, Optional
 
+from sqlalchemy import delete, event, insert
+from sqlalchemy.orm import Session
 
-def _days_until(target: date) -> int:
-    """Return number of days from today until target (negative if past)."""
-    if not target:
-      return 10**9
-    return (target - date.today()).days
+from app.extensions import db
+from app.models import Rental, Member, Child, Bike, ExpiringRental, JobRun
 
 
-def get_upcoming_rentals(days_threshold: int = 30) -> List[Dict[str, Any]]:
+def get_upcoming_rentals(days_threshold: int = 30, limit: Optional[int] = None,
+                         today: Optional[date] = None) -> List[Dict[str, Any]]:
     """
     Speciaal algoritme: vind verhuringen die binnen `days_threshold` dagen aflopen.
 
-    Returns a list of dictionaries with keys:
+    The window (``end_date BETWEEN today AND today + days_threshold``) and the
+    ordering are done by the database on the partial index of active rentals, and
+    only the displayed columns are selected, so the cost follows the number of
+    expiring rentals rather than all active ones.
+
+    Returns a list of dictionaries (soonest first, at most ``limit``) with keys:
       - rental_id
       - end_date
       - days_left
+      - member_id
       - parent_name
       - parent_email
       - child_name
       - bike_name
       - bike_type
     """
-    # Query active rentals that have an end date
-    q = db.session.query(Rental, Child, Member, Bike) \
+    today = today or date.today()
+    q = db.session.query(
+            Rental.rental_id, Rental.end_date,
+            Member.member_id, Member.first_name, Member.last_name, Member.email,
+            Child.first_name, Child.last_name,
+            Bike.name, Bike.type,
+        ) \
         .join(Child, Rental.child_id == Child.child_id) \
         .join(Member, Child.member_id == Member.member_id) \
         .join(Bike, Rental.bike_id == Bike.bike_id) \
-        .filter(Rental.status == 'active')
-
-    results: List[Dict[str, Any]] = []
-    for rental, child, member, bike in q.all():
-        if not rental.end_date:
-            # Skip if no end date (should be rare after migrations)
-            continue
-        days_left = _days_until(rental.end_date)
-        if 0 <= days_left <= days_threshold:
-            results.append({
-                'rental_id': rental.rental_id,
-                'end_date': rental.end_date,
-                'days_left': days_left,
-                'parent_name': f"{member.first_name} {member.last_name}",
-                'parent_email': member.email,
-                'child_name': f"{child.first_name} {child.last_name}",
-                'bike_name': bike.name or (bike.model or bike.brand),
-                'bike_type': bike.type,
-            })
-
-    # Sort soonest first
-    results.sort(key=lambda r: r['days_left'])
-    return results
-
-
-def get_upcoming_rentals_for_popup(days_threshold: int = 30) -> Dict[str, Any]:
+        .filter(Rental.status == 'active',
+                Rental.end_date.between(today, today + timedelta(days=days_threshold))) \
+        .order_by(Rental.end_date, Rental.rental_id)
+    if limit is not None:
+        q = q.limit(limit)
+
+    return [
+        {
+            'rental_id': rental_id,
+            'end_date': end_date,
+            'days_left': (end_date - today).days,
+            'member_id': member_id,
+            'parent_name': f"{parent_first} {parent_last}",
+            'parent_email': parent_email,
+            'child_name': f"{child_first} {child_last}",
+            'bike_name': bike_name or 'Onbekend',
+            'bike_type': bike_type,
+        }
+        for (rental_id, end_date, member_id, parent_first, parent_last, parent_email,
+             child_first, child_last, bike_name, bike_type) in q.all()
+    ]
+
+
+# --- Voorberekende snapshot (expiring_rental) ---
+
+SNAPSHOT_JOB = 'expiring_rentals_snapshot'
+# Vensters waarin een aflopende verhuring ingedeeld wordt (dagen)
+WINDOWS = (7, 14, 30)
+
+
+def _window(days_left: int) -> int:
+    return next(w for w in WINDOWS if days_left <= w)
+
+
+def snapshot_expiring_rentals(today: Optional[date] = None) -> int:
+    """Replace the expiring_rental queue with the rentals ending within the largest window.
+
+    Runs in the caller's transaction; the caller records the run under ``SNAPSHOT_JOB``
+    with a result starting with the snapshot date (see ``snapshot_date``).
+    """
+    today = today or date.today()
+    rows = get_upcoming_rentals(WINDOWS[-1], today=today)
+    ExpiringRental.query.delete(synchronize_session=False)
+    if rows:
+        db.session.execute(insert(ExpiringRental), [
+            dict(row, snapshot_date=today, window_days=_window(row['days_left'])) for row in rows
+        ])
+    return len(rows)
+
+
+def snapshot_date() -> Optional[date]:
+    """Day of the last snapshot, or None if it never ran."""
+    run = db.session.get(JobRun, SNAPSHOT_JOB)
+    try:
+        return date.fromisoformat(run.last_result[:10]) if run and run.last_result else None
+    except ValueError:
+        return None
+
+
+def _drop_snapshot(session):
+    # In dezelfde transactie als de wijziging: zonder commit blijft de snapshot geldig
+    session.connection().execute(delete(JobRun.__table__).where(JobRun.__table__.c.name == SNAPSHOT_JOB))
+
+
+@event.listens_for(Session, 'after_flush')
+def _drop_snapshot_on_flush(session, flush_context):
+    # Een nieuwe, gewijzigde of verwijderde verhuring kan in of uit het venster schuiven
+    if any(isinstance(obj, Rental) for obj in (*session.new, *session.dirty, *session.deleted)):
+        _drop_snapshot(session)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _drop_snapshot_on_bulk(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, Rental):
+            _drop_snapshot(orm_execute_state.session)
+
+
+def get_upcoming_rentals_from_snapshot(days_threshold: int = 30, limit: Optional[int] = None,
+                                       today: Optional[date] = None) -> Optional[List[Dict[str, Any]]]:
+    """Same rows as ``get_upcoming_rentals``, read from today's snapshot; None when there is none.
+
+    Any write to a rental drops the snapshot's job_run record in the same transaction, so
+    a rental created or moved into the window after the snapshot is never missed: the
+    popup is computed live until the next snapshot. The join with the rental table is a
+    second guard for rentals returned or extended since then.
+    """
+    today = today or date.today()
+    if days_threshold > WINDOWS[-1] or snapshot_date() != today:
+        return None
+    q = db.session.query(ExpiringRental) \
+        .join(Rental, Rental.rental_id == ExpiringRental.rental_id) \
+        .filter(Rental.status == 'active', Rental.end_date == ExpiringRental.end_date,
+                ExpiringRental.end_date.between(today, today + timedelta(days=days_threshold))) \
+        .order_by(ExpiringRental.end_date, ExpiringRental.rental_id)
+    if limit is not None:
+        q = q.limit(limit)
+    return [
+        {
+            'rental_id': row.rental_id,
+            'end_date': row.end_date,
+            'days_left': (row.end_date - today).days,
+            'member_id': row.member_id,
+            'parent_name': row.parent_name,
+            'parent_email': row.parent_email,
+            'child_name': row.child_name,
+            'bike_name': row.bike_name,
+            'bike_type': row.bike_type,
+        }
+        for row in q.all()
+    ]
+
+
+def get_upcoming_rentals_for_popup(days_threshold: int = 30, limit: Optional[int] = None) -> Dict[str, Any]:
     """
     Helper payload tailored for a dashboard popup.
     Returns minimal fields; email copy action should copy the parent's email address only.
+    Served from today's expiring_rental snapshot when there is one, otherwise computed live.
     """
-    upcoming = get_upcoming_rentals(days_threshold)
+    upcoming = get_upcoming_rentals_from_snapshot(days_threshold, limit)
+    source = 'snapshot'
+    if upcoming is None:
+        upcoming, source = get_upcoming_rentals(days_threshold, limit), 'live'
     return {
         'generated_at': date.today().isoformat(),
+        'source': source,
         'days_threshold': days_threshold,
         'count': len(upcoming),
         'items': upcoming,
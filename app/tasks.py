@@ -0,0 +1,141 @@
+"""
+Background jobs that used to run on the request path.
+
+``expire_past_due_rentals`` is run either by the sweeper in one dedicated
+process (``flask --app run rental-sweeper``, every ``RENTAL_SWEEP_INTERVAL``
+seconds) or from cron with ``flask --app run expire-rentals``. The web workers
+and other CLI commands never start it. The sweeper also keeps the daily_stats
+rows of yesterday and today present and rebuilds the expiring-rentals snapshot
+behind the dashboard popup; ``flask --app run refresh-daily-stats`` backfills and
+``flask --app run expiring-digest`` (daily cron) writes the parent digests.
+"""
+import logging
+import threading
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+
+from app import notifications, rollups, speciaal_algoritme
+from app.extensions import db
+from app.models import Bike, Rental, JobRun, ExpiringRental
+
+log = logging.getLogger(__name__)
+
+EXPIRE_RENTALS_JOB = 'expire_past_due_rentals'
+REFRESH_DAILY_STATS_JOB = 'refresh_daily_stats'
+EXPIRING_DIGEST_JOB = 'expiring_rentals_digest'
+
+
+def record_run(name: str, result: str):
+    """Store the last-run timestamp of a job in the current transaction."""
+    db.session.merge(JobRun(name=name, last_run_at=datetime.utcnow(), last_result=result[:255]))
+
+
+def last_run(name: str):
+    return db.session.get(JobRun, name)
+
+
+def expire_past_due_rentals(today: date = None) -> int:
+    """Zet verhuringen die verlopen zijn op 'returned' en hun fiets op 'available'.
+
+    Two set-based UPDATE statements in one transaction; returns the number of rentals expired.
+    The daily_stats rows of the affected end dates are refreshed on commit.
+    """
+    today = today or date.today()
+    overdue = (Rental.status == 'active', Rental.end_date < today)
+
+    # De retourdatums van deze verhuringen tellen straks mee in daily_stats
+    rollups.touch_query(Rental.query.filter(*overdue))
+    # Fietsen eerst: de subquery kijkt nog naar de actieve verhuringen
+    Bike.query.filter(
+        Bike.bike_id.in_(select(Rental.bike_id).where(*overdue))
+    ).update({'status': 'available'}, synchronize_session=False)
+    expired = Rental.query.filter(*overdue).update({'status': 'returned'}, synchronize_session=False)
+
+    record_run(EXPIRE_RENTALS_JOB, f'{expired} rentals expired')
+    db.session.commit()
+    return expired
+
+
+def refresh_daily_stats(start: date = None, stop: date = None) -> int:
+    """Recompute daily_stats for ``start <= day < stop``; returns the number of days.
+
+    Defaults: from the first rental/payment date (or yesterday) up to and including today.
+    """
+    today = date.today()
+    connection = db.session.connection()
+    start = start or min(filter(None, (rollups.first_activity_date(connection), today - timedelta(days=1))))
+    stop = stop or today + timedelta(days=1)
+    days = rollups.refresh_range(connection, start, stop) if start < stop else 0
+    record_run(REFRESH_DAILY_STATS_JOB, f'{days} days refreshed ({start} .. {stop - timedelta(days=1)})')
+    db.session.commit()
+    return days
+
+
+def refresh_expiring_snapshot(today: date = None) -> int:
+    """Rebuild the expiring_rental queue the dashboard popup reads; returns the number of rentals."""
+    today = today or date.today()
+    count = speciaal_algoritme.snapshot_expiring_rentals(today)
+    record_run(speciaal_algoritme.SNAPSHOT_JOB, f'{today.isoformat()}: {count} rentals expiring')
+    db.session.commit()
+    return count
+
+
+def send_expiring_digest(today: date = None, directory: str = None) -> dict:
+    """Daily job: refresh the snapshot and write one digest per parent to the outbox."""
+    today = today or date.today()
+    rentals = refresh_expiring_snapshot(today)
+    digests = notifications.build_digests(ExpiringRental.query.all())
+    path = notifications.write_outbox(digests, today, directory)
+    record_run(EXPIRING_DIGEST_JOB, f'{len(digests)} digests for {rentals} rentals')
+    db.session.commit()
+    return {'rentals': rentals, 'digests': len(digests), 'path': path}
+
+
+def sweep(app):
+    """One sweeper pass: expire overdue rentals, keep the recent rollup rows and the popup snapshot current."""
+    with app.app_context():
+        try:
+            expired = expire_past_due_rentals()
+            if expired:
+                log.info('Rental sweeper expired %s rentals', expired)
+            # Gisteren en vandaag moeten een rollup-rij hebben, ook zonder activiteit
+            if app.config.get('DAILY_STATS_ROLLUP', True):
+                refresh_daily_stats(date.today() - timedelta(days=1))
+            # Nieuwe of gewijzigde verhuringen komen zo binnen één interval in de popup
+            refresh_expiring_snapshot()
+        except Exception:
+            db.session.rollback()
+            log.exception('Rental sweeper failed')
+        finally:
+            db.session.remove()
+
+
+def _sweeper_loop(app, interval: float, stop: threading.Event):
+    while not stop.is_set():
+        sweep(app)
+        stop.wait(interval)
+
+
+def run_sweeper(app, interval: float, stop: threading.Event = None):
+    """Run the sweeper in the current thread every ``interval`` seconds until ``stop`` is set.
+
+    Meant for one dedicated process (``flask rental-sweeper``); the passes are idempotent,
+    but there is no need to run them once per worker.
+    """
+    _sweeper_loop(app, interval, stop or threading.Event())
+
+
+def start_sweeper(app, interval: float = None) -> threading.Event:
+    """Start the sweeper as a daemon thread (``interval`` defaults to ``RENTAL_SWEEP_INTERVAL``; 0 = not started).
+
+    Only for a process that explicitly opts in; ``create_app`` does not call this.
+    Returns an event that stops the loop when set.
+    """
+    stop = threading.Event()
+    interval = app.config.get('RENTAL_SWEEP_INTERVAL', 0) if interval is None else interval
+    if interval and interval > 0:
+        thread = threading.Thread(target=_sweeper_loop, args=(app, interval, stop),
+                                  name='rental-sweeper', daemon=True)
+        thread.start()
+    return stop
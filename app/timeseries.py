@@ -0,0 +1,149 @@
+"""
+Bucketed time series for the dashboard charts and ``/api/dashboard/timeseries``.
+
+A series is one grouped query: the date column is truncated to the start of its
+day, ISO week (Monday) or month in SQL and counted or summed per bucket. Buckets
+without rows are zero-filled in Python, so the result always has one value per
+bucket in the requested range.
+
+Metrics that exist in the ``daily_stats`` rollup are read from it for the days
+before today when the rollup covers every one of those days; today (and any
+range the rollup does not fully cover) comes from the base tables.
+"""
+from datetime import date, datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import cast, func
+from sqlalchemy.types import Date, DateTime
+
+from app import rollups
+from app.dateranges import date_range
+from app.extensions import db
+from app.models import DailyStats, Member, Payment, Rental
+
+GRANULARITIES = ('day', 'week', 'month')
+
+# metric -> (date column, summed value or None for a row count, extra criteria)
+METRICS = {
+    'rentals_started': (Rental.start_date, None, ()),
+    'rentals_returned': (Rental.end_date, None, (Rental.status == 'returned',)),
+    'payments': (Payment.paid_at, None, ()),
+    'revenue': (Payment.paid_at, Payment.amount, ()),
+    'revenue_cash': (Payment.paid_at, Payment.amount, (Payment.method == 'cash',)),
+    'revenue_card': (Payment.paid_at, Payment.amount, (Payment.method == 'card',)),
+    'bank_received': (Payment.paid_at, Payment.amount, (Payment.method == 'bank_transfer', Payment.received == True)),
+    'bank_open': (Payment.paid_at, Payment.amount, (Payment.method == 'bank_transfer', Payment.received != True)),
+    'new_members': (Member.created_at, None, ()),
+}
+
+# metric -> kolom in daily_stats
+ROLLUP_COLUMNS = {
+    'rentals_started': DailyStats.rentals_started,
+    'rentals_returned': DailyStats.rentals_returned,
+    'payments': DailyStats.payments_count,
+    'revenue': DailyStats.revenue,
+    'revenue_cash': DailyStats.cash_amount,
+    'revenue_card': DailyStats.card_amount,
+    'bank_received': DailyStats.bank_received_amount,
+    'bank_open': DailyStats.bank_open_amount,
+}
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    """First day of the bucket ``day`` falls in."""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(day: date, granularity: str) -> date:
+    if granularity == 'week':
+        return day + timedelta(weeks=1)
+    if granularity == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def buckets(start: date, stop: date, granularity: str) -> List[date]:
+    """Bucket starts covering ``start <= day < stop``."""
+    result = []
+    day = bucket_start(start, granularity)
+    while day < stop:
+        result.append(day)
+        day = next_bucket(day, granularity)
+    return result
+
+
+def bucket_expression(column, granularity: str, dialect: str):
+    """SQL expression truncating ``column`` to its bucket start."""
+    if dialect == 'postgresql':
+        return cast(func.date_trunc(granularity, cast(column, DateTime)), Date)
+    # SQLite: 'weekday 0' springt naar de volgende zondag, -6 dagen geeft de maandag ervoor
+    if granularity == 'week':
+        return func.date(column, 'weekday 0', '-6 days')
+    if granularity == 'month':
+        return func.date(column, 'start of month')
+    return func.date(column)
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def _grouped(column, aggregates, granularity, dialect, start, stop, *criteria):
+    bucket = bucket_expression(column, granularity, dialect).label('bucket')
+    rows = db.session.query(bucket, *aggregates) \
+        .filter(date_range(column, start, stop), *criteria) \
+        .group_by(bucket).all()
+    return [(_as_date(row[0]), *row[1:]) for row in rows if row[0] is not None]
+
+
+def _from_rollup(metric, granularity, dialect, start, stop):
+    """Bucket totals from daily_stats, or None when a day in the range has no rollup row (1 query)."""
+    rows = _grouped(DailyStats.day, (func.sum(ROLLUP_COLUMNS[metric]), func.count()),
+                    granularity, dialect, start, stop)
+    if sum(days for _, _, days in rows) != (stop - start).days:
+        return None
+    return {day: total for day, total, _ in rows}
+
+
+def series(metric: str, granularity: str, start: date, stop: date) -> List[Tuple[date, float]]:
+    """``(bucket_start, value)`` for every bucket overlapping ``start <= day < stop``.
+
+    The first bucket is widened to its full day/week/month so every bucket is complete.
+    One query, or two when the rollup answers the past and the base tables today.
+    """
+    if metric not in METRICS:
+        raise ValueError(f'Unknown metric: {metric}')
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Unknown granularity: {granularity}')
+    column, value, criteria = METRICS[metric]
+    first = bucket_start(start, granularity)
+    dialect = db.session.get_bind().dialect.name
+
+    totals = {}
+    base_start = first
+    history_stop = min(stop, date.today())
+    if metric in ROLLUP_COLUMNS and first < history_stop and rollups.enabled():
+        from_rollup = _from_rollup(metric, granularity, dialect, first, history_stop)
+        if from_rollup is not None:
+            totals, base_start = from_rollup, history_stop
+
+    if base_start < stop:
+        aggregate = func.sum(value) if value is not None else func.count()
+        for day, total in _grouped(column, (aggregate,), granularity, dialect, base_start, stop, *criteria):
+            totals[day] = (totals.get(day) or 0) + (total or 0)
+
+    if value is None:
+        return [(day, int(totals.get(day) or 0)) for day in buckets(first, stop, granularity)]
+    return [(day, float(totals.get(day) or 0)) for day in buckets(first, stop, granularity)]
+
+
+def label(day: date, granularity: str) -> str:
+    return day.strftime('%m/%Y') if granularity == 'month' else day.strftime('%d/%m')
@@ -0,0 +1,51 @@
+"""
+Password hash benchmark: time werkzeug hash methods to pick PASSWORD_HASH_METHOD.
+
+    python -m benchmarks.bench_password_hash
+    python -m benchmarks.bench_password_hash --method scrypt:16384:8:1 --method pbkdf2:sha256:600000
+
+Every login verifies one hash, so the verify time is the CPU cost per login
+(and per rejected guess). Aim for a method that is as slow as the login
+traffic allows; the token buckets in app/login_security.py cap the guesses.
+"""
+import argparse
+import statistics
+import time
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHODS = [
+    'scrypt',                 # werkzeug-standaard: scrypt:32768:8:1
+    'scrypt:16384:8:1',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:260000',
+]
+
+
+def time_method(method: str, repeat: int) -> dict:
+    stored = generate_password_hash('benchmark-password', method)
+    hashing, verifying = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        generate_password_hash('benchmark-password', method)
+        hashing.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        check_password_hash(stored, 'benchmark-password')
+        verifying.append((time.perf_counter() - start) * 1000)
+    return {'method': method, 'hash_ms': statistics.median(hashing), 'verify_ms': statistics.median(verifying)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--method', action='append', help='werkzeug hash method (repeatable)')
+    parser.add_argument('--repeat', type=int, default=5, help='hashes per method')
+    args = parser.parse_args(argv)
+
+    print(f"{'method':<26}{'hash ms':>10}{'verify ms':>11}{'logins/s':>10}")
+    for method in args.method or DEFAULT_METHODS:
+        r = time_method(method, args.repeat)
+        print(f"{r['method']:<26}{r['hash_ms']:>10.1f}{r['verify_ms']:>11.1f}{1000 / r['verify_ms']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
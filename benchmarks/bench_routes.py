@@ -0,0 +1,167 @@
+"""
+Route benchmark: seed a SQLite database with synthetic data and time the main pages.
+
+    python -m benchmarks.bench_routes --preset small
+    python -m benchmarks.bench_routes --preset full --db /tmp/bench-full.db --repeat 5
+    python -m benchmarks.bench_routes --members 1000 --payments 50000 --output results.json
+
+The database file is reused when it already holds data (seeding `full` takes a
+while), unless --reseed is given. Results are written as JSON, named after the
+current commit, so runs on different commits can be diffed.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Rijen per tabel; 'full' is de omvang waarop we willen kunnen draaien
+PRESETS = {
+    'small': {'members': 500, 'children': 800, 'bikes': 200, 'rentals': 5_000, 'payments': 10_000},
+    'medium': {'members': 5_000, 'children': 8_000, 'bikes': 2_000, 'rentals': 50_000, 'payments': 100_000},
+    'full': {'members': 50_000, 'children': 80_000, 'bikes': 20_000, 'rentals': 500_000, 'payments': 1_000_000},
+}
+
+ROUTES = [
+    '/dashboard',
+    '/inventory',
+    '/members',
+    '/rentals',
+    '/payments',
+    '/api/dashboard/rental-activity',
+    '/api/dashboard/upcoming-rentals',
+    # Zoeken via de genormaliseerde zoektekst (app/search.py)
+    '/members?search=helene+lambert',
+    '/rentals?search=matt+goossens',
+    '/payments?search=lina+vermeul',
+    # Verhuurformulier en zijn kiezers
+    '/rentals/new',
+    '/api/lookup/members',
+    '/api/lookup/members?q=goossens',
+    '/api/lookup/bikes?type=gewoon',
+]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return 'unknown'
+
+
+def _parse_server_timing(values):
+    """Return (db_ms, queries) from our Server-Timing header, if present."""
+    for value in values:
+        if value.startswith('db;'):
+            parts = dict(p.split('=', 1) for p in value.split(';')[1:] if '=' in p)
+            queries = parts.get('desc', '"0 queries"').strip('"').split()[0]
+            return float(parts.get('dur', 0)), int(queries)
+    return None, None
+
+
+def time_route(client, url: str, repeat: int) -> dict:
+    timings, db_ms, queries, status = [], [], [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        status = response.status_code
+        d, q = _parse_server_timing(response.headers.getlist('Server-Timing'))
+        if d is not None:
+            db_ms.append(d)
+            queries.append(q)
+    timings.sort()
+    return {
+        'status': status,
+        'runs': repeat,
+        'min_ms': round(timings[0], 2),
+        'median_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        'max_ms': round(timings[-1], 2),
+        'db_median_ms': round(statistics.median(db_ms), 2) if db_ms else None,
+        'queries': max(queries) if queries else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+    for name in PRESETS['small']:
+        parser.add_argument(f'--{name}', type=int, help=f'override number of {name}')
+    parser.add_argument('--db', default=None, help='SQLite file (default: instance/bench-<preset>.db)')
+    parser.add_argument('--reseed', action='store_true', help='drop and regenerate the data')
+    parser.add_argument('--repeat', type=int, default=5, help='requests per route')
+    parser.add_argument('--cache', action='store_true', help='keep the dashboard stats cache enabled')
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='JSON file (default: benchmarks/results/<time>-<commit>.json)')
+    args = parser.parse_args(argv)
+
+    volumes = dict(PRESETS[args.preset])
+    for name in volumes:
+        if getattr(args, name) is not None:
+            volumes[name] = getattr(args, name)
+
+    db_path = os.path.abspath(args.db or os.path.join('instance', f'bench-{args.preset}.db'))
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    if args.reseed and os.path.exists(db_path):
+        os.remove(db_path)
+
+    # Configuratie moet vóór het importeren van de app gezet zijn
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['RENTAL_SWEEP_INTERVAL'] = '0'
+    os.environ.setdefault('SLOW_QUERY_MS', '0')
+    if not args.cache:
+        os.environ['STATS_CACHE_TTL'] = '0'
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import Member
+    from benchmarks.datagen import seed, ensure_admin
+
+    app = create_app()
+    result = {
+        'commit': _git_commit(),
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'python': platform.python_version(),
+        'database': db_path,
+        'preset': args.preset,
+        'volumes': volumes,
+        'routes': {},
+    }
+    with app.app_context():
+        if db.session.query(Member.member_id).first() is None:
+            print(f'Seeding {volumes} into {db_path} ...', flush=True)
+            start = time.perf_counter()
+            result['seeded'] = seed(volumes, seed=args.seed, chunk_size=args.chunk_size)
+            result['seed_seconds'] = round(time.perf_counter() - start, 2)
+            print(f"Seeded in {result['seed_seconds']} s", flush=True)
+        admin = ensure_admin()
+        admin_id = admin.user_id
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = admin_id
+    for url in ROUTES:
+        client.get(url)  # warm-up (template compilation, first connection)
+        stats = time_route(client, url, args.repeat)
+        result['routes'][url] = stats
+        print(f"{url:40s} {stats['status']}  median {stats['median_ms']:9.2f} ms  "
+              f"p95 {stats['p95_ms']:9.2f} ms  queries {stats['queries']}", flush=True)
+
+    output = args.output or os.path.join(
+        'benchmarks', 'results', f"{datetime.utcnow():%Y%m%dT%H%M%S}-{result['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f'Results written to {output}')
+    return result
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,66 @@
+"""
+Startup benchmark: boot-to-first-request time per config profile (app/config.py).
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 10 --path /login --db /tmp/bench-startup.db
+
+Every run is a fresh Python process (like a new worker) that imports the app,
+calls create_app(profile) and serves one GET through the test client. The
+production profile is run twice: the first run fills the Jinja bytecode cache
+("cold"), the following runs use it ("warm").
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = r'''
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app(PROFILE)
+t2 = time.perf_counter()
+status = app.test_client().get(PATH).status_code
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "first_request": t3 - t2, "status": status}))
+'''
+
+
+def run_once(profile: str, path: str, env: dict) -> dict:
+    code = f'PROFILE = {profile!r}\nPATH = {path!r}\n' + CHILD
+    out = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='processes per profile')
+    parser.add_argument('--path', default='/login', help='first request')
+    parser.add_argument('--db', default=None, help='SQLite file (default: a temporary file)')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-startup-')
+    env = dict(os.environ,
+               DATABASE_URL='sqlite:///' + (args.db or os.path.join(workdir, 'bench.db')),
+               RENTAL_SWEEP_INTERVAL='0',
+               JINJA_CACHE_DIR=os.path.join(workdir, 'jinja'),
+               PYTHONPATH=os.getcwd())
+
+    print(f"{'profile':<18}{'import ms':>11}{'create_app ms':>15}{'1st request ms':>16}{'total ms':>10}")
+    runs = [('development', 'development'), ('test', 'test'),
+            ('production', 'production (cold)'), ('production', 'production (warm)')]
+    for profile, label in runs:
+        results = [run_once(profile, args.path,
+                            dict(env, APP_PROFILE=profile)) for _ in range(1 if 'cold' in label else args.repeat)]
+        assert all(r['status'] < 500 for r in results), results
+        med = {k: statistics.median(r[k] for r in results) * 1000 for k in ('import', 'create_app', 'first_request')}
+        total = sum(med.values())
+        print(f"{label:<18}{med['import']:>11.1f}{med['create_app']:>15.1f}{med['first_request']:>16.1f}{total:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Template benchmark: render time of the base layout per language, before and after
+the cached translators and the navigation fragment cache (app/i18n.py).
+
+    python -m benchmarks.bench_templates
+    python -m benchmarks.bench_templates --repeat 2000 --role finance_manager
+
+"before" builds a fresh translator for every render and renders the navigation
+each time (FRAGMENT_CACHE_TTL=0); "after" uses the per-process translator and
+the fragment cache. No database is needed: the page is rendered for a logged-in
+user straight from the session.
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('RENTAL_SWEEP_INTERVAL', '0')
+
+from flask import g, render_template, session  # noqa: E402
+
+from app import create_app, i18n  # noqa: E402
+
+# Eenvoudige pagina op base.html: de layout (navigatie, vertalingen) is het grootste deel van het werk
+PAGE = 'password_reset.html'
+
+
+def _fresh_translator(lang):
+    # Zoals vroeger: per request een nieuwe closure
+    mapping = i18n.TRANSLATIONS.get(lang, {})
+
+    def t(s):
+        return mapping.get(s, s)
+
+    return t
+
+
+def time_renders(app, lang: str, role: str, repeat: int, cached: bool) -> float:
+    app.config['FRAGMENT_CACHE_TTL'] = 300 if cached else 0
+    i18n.init_app(app)
+    timings = []
+    with app.test_request_context('/password-reset'):
+        session.update({'user_id': 'bench', 'user_role': role, 'lang': lang})
+        app.preprocess_request()
+        render_template(PAGE)  # template compileren valt buiten de meting
+        for _ in range(repeat):
+            start = time.perf_counter()
+            g.t = i18n.get_translator(lang) if cached else _fresh_translator(lang)
+            render_template(PAGE)
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=500, help='renders per language and variant')
+    parser.add_argument('--role', default='admin')
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    app.config['TEMPLATES_AUTO_RELOAD'] = False
+    print(f"{'lang':<6}{'before ms':>11}{'after ms':>10}{'speedup':>9}")
+    for lang in i18n.LANGUAGES:
+        before = time_renders(app, lang, args.role, args.repeat, cached=False)
+        after = time_renders(app, lang, args.role, args.repeat, cached=True)
+        print(f'{lang:<6}{before:>11.3f}{after:>10.3f}{before / after:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
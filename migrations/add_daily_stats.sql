@@ -0,0 +1,16 @@
+-- Migration: daily rollup of rentals and payments for the dashboard charts
+-- Date: 2026-10-17
+-- Fill it afterwards with: flask --app run refresh-daily-stats
+
+CREATE TABLE IF NOT EXISTS daily_stats (
+    day DATE PRIMARY KEY,
+    rentals_started INTEGER NOT NULL DEFAULT 0,
+    rentals_returned INTEGER NOT NULL DEFAULT 0,
+    payments_count INTEGER NOT NULL DEFAULT 0,
+    revenue DOUBLE PRECISION NOT NULL DEFAULT 0,
+    cash_amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+    card_amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+    bank_received_amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+    bank_open_amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP
+);
@@ -0,0 +1,20 @@
+-- Migration: daily snapshot of rentals expiring within 30 days (dashboard popup + digest)
+-- Date: 2026-10-17
+-- Filled by: flask --app run expiring-digest (daily cron) and the rental sweeper
+
+CREATE TABLE IF NOT EXISTS expiring_rental (
+    rental_id VARCHAR PRIMARY KEY REFERENCES rental (rental_id) ON DELETE CASCADE,
+    snapshot_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    days_left INTEGER NOT NULL,
+    window_days INTEGER NOT NULL,
+    member_id VARCHAR,
+    parent_name VARCHAR(201),
+    parent_email VARCHAR(120),
+    child_name VARCHAR(201),
+    bike_name VARCHAR(120),
+    bike_type VARCHAR(80)
+);
+
+CREATE INDEX IF NOT EXISTS ix_expiring_rental_end_date ON expiring_rental (end_date);
+CREATE INDEX IF NOT EXISTS ix_expiring_rental_member_id ON expiring_rental (member_id);
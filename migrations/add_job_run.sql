@@ -0,0 +1,8 @@
+-- Migration: bookkeeping table for background jobs (rental expiry sweeper, cron commands)
+-- Date: 2026-10-17
+
+CREATE TABLE IF NOT EXISTS job_run (
+    name VARCHAR(80) PRIMARY KEY,
+    last_run_at TIMESTAMP,
+    last_result VARCHAR(255)
+);
@@ -0,0 +1,35 @@
+-- Migration: indexes for the hot filter / sort columns (dashboard, lists, login)
+-- Date: 2026-10-17
+-- Idempotent: safe to run repeatedly (works on PostgreSQL and SQLite).
+-- On a busy PostgreSQL database prefer running each statement as
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS ... outside a transaction.
+
+-- Rentals
+CREATE INDEX IF NOT EXISTS ix_rental_status_start_date ON rental (status, start_date);
+CREATE INDEX IF NOT EXISTS ix_rental_child_status ON rental (child_id, status);
+CREATE INDEX IF NOT EXISTS ix_rental_active_end_date ON rental (end_date) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS ix_rental_bike_id ON rental (bike_id);
+CREATE INDEX IF NOT EXISTS ix_rental_member_id ON rental (member_id);
+CREATE INDEX IF NOT EXISTS ix_rental_start_date ON rental (start_date);
+CREATE INDEX IF NOT EXISTS ix_rental_end_date ON rental (end_date);
+
+-- Bikes
+CREATE INDEX IF NOT EXISTS ix_bike_status_archived ON bike (status, archived);
+CREATE INDEX IF NOT EXISTS ix_bike_type ON bike (type);
+CREATE INDEX IF NOT EXISTS ix_bike_created_at ON bike (created_at);
+
+-- Payments
+CREATE INDEX IF NOT EXISTS ix_payment_method_paid_at ON payment (method, paid_at);
+CREATE INDEX IF NOT EXISTS ix_payment_paid_at ON payment (paid_at);
+CREATE INDEX IF NOT EXISTS ix_payment_member_id ON payment (member_id);
+
+-- Members / children
+CREATE INDEX IF NOT EXISTS ix_member_name ON member (last_name, first_name);
+CREATE INDEX IF NOT EXISTS ix_member_status ON member (status);
+CREATE INDEX IF NOT EXISTS ix_member_last_payment ON member (last_payment);
+CREATE INDEX IF NOT EXISTS ix_member_created_at ON member (created_at);
+CREATE INDEX IF NOT EXISTS ix_member_email_lower ON member (lower(email));
+CREATE INDEX IF NOT EXISTS ix_child_member_id ON child (member_id);
+
+-- Users (login lookup)
+CREATE INDEX IF NOT EXISTS ix_user_email ON "user" (email);
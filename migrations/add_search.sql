@@ -0,0 +1,13 @@
+-- Migration: normalized search column + trigram indexes for member/child name search
+-- Date: 2026-10-17
+-- Requires the pg_trgm extension (available on Supabase).
+-- Afterwards fill search_text for existing rows with: flask --app run reindex-search
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE member ADD COLUMN IF NOT EXISTS search_text TEXT;
+ALTER TABLE child ADD COLUMN IF NOT EXISTS search_text TEXT;
+
+-- GIN trigram indexes: LIKE '%term%' and similarity() use them
+CREATE INDEX IF NOT EXISTS ix_member_search_trgm ON member USING gin (search_text gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_child_search_trgm ON child USING gin (search_text gin_trgm_ops);
@@ -0,0 +1,126 @@
+import os
+from datetime import date, datetime, timedelta
+
+# Tests draaien altijd tegen een lokale in-memory SQLite database, nooit tegen Supabase.
+# Profiel 'test' (app/config.py) legt dat ook zelf vast; DATABASE_URL blijft als vangnet.
+# Moet gezet zijn vóór app.config geïmporteerd wordt.
+os.environ['DATABASE_URL'] = 'sqlite://'
+# Geen achtergrond-threads tijdens tests; sweeper wordt expliciet aangeroepen
+os.environ['RENTAL_SWEEP_INTERVAL'] = '0'
+os.environ['APP_PROFILE'] = 'test'
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.models import Member, Child, Bike, Rental, Payment, User
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def explain(app):
+    """Return SQLite's EXPLAIN QUERY PLAN for an ORM query or statement as one string."""
+    def plan(query):
+        stmt = query.statement if hasattr(query, 'statement') else query
+        compiled = stmt.compile(dialect=db.engine.dialect)
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params).all()
+        return ' | '.join(row[-1] for row in rows)
+    return plan
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin(app):
+    user = User(first_name='Test', last_name='Admin', email='admin@test.local', role='admin')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def login(client):
+    """Log ``client`` in as a user, the way the login view fills the session."""
+    def _login(user):
+        with client.session_transaction() as sess:
+            sess['user_id'] = user.user_id
+            sess['user_role'] = user.role
+    return _login
+
+
+@pytest.fixture
+def seeded(app):
+    """Small but varied dataset covering every status, method and date bucket."""
+    today = date.today()
+    now = datetime.utcnow()
+
+    members = []
+    for i in range(12):
+        m = Member(
+            first_name=f'Voornaam{i}', last_name=f'Achternaam{i}', email=f'lid{i}@test.local',
+            status='active' if i % 3 else 'inactive',
+            created_at=now - timedelta(days=i * 9),
+            last_payment=None if i % 4 == 0 else today - timedelta(days=i * 40),
+        )
+        members.append(m)
+    db.session.add_all(members)
+    db.session.flush()
+
+    children = []
+    for i, m in enumerate(members):
+        for j in range(i % 3):
+            children.append(Child(member_id=m.member_id, first_name=f'Kind{i}{j}', last_name=m.last_name))
+    db.session.add_all(children)
+    db.session.flush()
+
+    bikes = []
+    for i in range(20):
+        bikes.append(Bike(
+            name=f'Fiets {i}',
+            type=['gewoon', 'elektrisch', 'bakfiets'][i % 3],
+            status=['available', 'rented', 'repair', 'available'][i % 4],
+            archived=(i == 19),
+            created_at=now - timedelta(days=i % 2),
+        ))
+    # Type that only exists on an archived bike
+    bikes.append(Bike(name='Oude tandem', type='tandem', status='available', archived=True))
+    db.session.add_all(bikes)
+    db.session.flush()
+
+    for i, child in enumerate(children):
+        start = today - timedelta(days=i * 4)
+        returned = i % 3 == 0
+        db.session.add(Rental(
+            bike_id=bikes[i % len(bikes)].bike_id,
+            member_id=child.member_id,
+            child_id=child.child_id,
+            start_date=start,
+            end_date=today - timedelta(days=i % 5) if returned else start + timedelta(days=365),
+            status='returned' if returned else 'active',
+        ))
+
+    methods = ['cash', 'card', 'bank_transfer']
+    for i in range(60):
+        db.session.add(Payment(
+            member_id=members[i % len(members)].member_id,
+            amount=10 + (i % 7) * 2.5,
+            paid_at=today - timedelta(days=i * 2),
+            method=methods[i % 3],
+            received=(i % 5 != 0),
+        ))
+    db.session.commit()
+    return {'members': members, 'children': children, 'bikes': bikes}
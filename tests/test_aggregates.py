@@ -0,0 +1,117 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, func, or_
+
+from app.extensions import db
+from app.models import Bike, Member, Child, Rental, Payment
+from app.services import get_dashboard_stats, get_rental_activity_data
+
+
+def _legacy_dashboard_stats():
+    """The original one-COUNT-per-figure implementation, kept as reference for parity."""
+    today = date.today()
+    month_start = today.replace(day=1)
+    total_bikes = Bike.query.filter_by(archived=False).count()
+    available = Bike.query.filter_by(status='available', archived=False).count()
+    total_members = Member.query.count()
+    active_members = Member.query.filter_by(status='active').count()
+    total_children = Child.query.count()
+    with_rental = db.session.query(Rental.child_id).filter(Rental.status == 'active', Rental.child_id != None).distinct()
+    without_bike = Child.query.filter(~Child.child_id.in_(with_rental)).count()
+
+    stats = {
+        'total_bikes': total_bikes,
+        'available_bikes_count': available,
+        'rented_bikes_count': Bike.query.filter_by(status='rented', archived=False).count(),
+        'repair_bikes_count': Bike.query.filter_by(status='repair', archived=False).count(),
+        'new_bikes_today': Bike.query.filter(Bike.archived == False, func.date(Bike.created_at) == today).count(),
+        'total_members': total_members,
+        'active_members_count': active_members,
+        'new_members_this_month': Member.query.filter(func.date(Member.created_at) >= month_start).count(),
+        'overdue_members_count': Member.query.filter(
+            Member.status == 'active',
+            or_(Member.last_payment == None, Member.last_payment < today - timedelta(days=365))
+        ).count(),
+        'total_children': total_children,
+        'children_without_bike': without_bike,
+        'payments_this_month': db.session.query(func.sum(Payment.amount)).filter(func.date(Payment.paid_at) >= month_start).scalar() or 0,
+        'cash_payments': float(db.session.query(func.sum(Payment.amount)).filter(Payment.method == 'cash').scalar() or 0),
+        'card_payments': float(db.session.query(func.sum(Payment.amount)).filter(Payment.method == 'card').scalar() or 0),
+        'bank_payments': float(db.session.query(func.sum(Payment.amount)).filter(Payment.method == 'bank_transfer', Payment.received == True).scalar() or 0),
+        'active_rentals_count': Rental.query.filter_by(status='active').count(),
+        'rentals_today': Rental.query.filter(func.date(Rental.start_date) == today).count(),
+        'returns_today': Rental.query.filter(func.date(Rental.end_date) == today, Rental.status == 'returned').count(),
+    }
+
+    stats['rental_chart_rentals'] = []
+    stats['rental_chart_returns'] = []
+    for i in range(6, -1, -1):
+        day = today - timedelta(days=i)
+        stats['rental_chart_rentals'].append(Rental.query.filter(func.date(Rental.start_date) == day).count())
+        stats['rental_chart_returns'].append(Rental.query.filter(func.date(Rental.end_date) == day, Rental.status == 'returned').count())
+
+    stats['payment_amounts'] = []
+    weekly_rentals = []
+    start_of_week = today - timedelta(days=today.weekday())
+    for i in range(7, -1, -1):
+        week_start = start_of_week - timedelta(weeks=i)
+        week_end = week_start + timedelta(days=7)
+        amt = db.session.query(func.sum(Payment.amount)).filter(Payment.paid_at >= week_start, Payment.paid_at < week_end).scalar() or 0
+        stats['payment_amounts'].append(float(amt))
+        weekly_rentals.append(Rental.query.filter(Rental.start_date >= week_start, Rental.start_date < week_end).count())
+
+    categories = []
+    for (t_name,) in db.session.query(Bike.type).distinct().all():
+        categories.append({
+            'name': t_name.title(),
+            'total': Bike.query.filter_by(type=t_name, archived=False).count(),
+            'available': Bike.query.filter_by(type=t_name, status='available', archived=False).count(),
+            'rented': Bike.query.filter_by(type=t_name, status='rented', archived=False).count(),
+            'repair': Bike.query.filter_by(type=t_name, status='repair', archived=False).count(),
+        })
+    stats['bike_categories'] = sorted(categories, key=lambda c: c['name'])
+    return stats, weekly_rentals
+
+
+def test_dashboard_stats_match_legacy_queries(seeded):
+    expected, _ = _legacy_dashboard_stats()
+    actual = get_dashboard_stats()
+
+    for key, value in expected.items():
+        if key == 'bike_categories':
+            assert sorted(actual[key], key=lambda c: c['name']) == value
+        elif isinstance(value, float):
+            assert actual[key] == pytest.approx(value), key
+        else:
+            assert actual[key] == value, key
+
+
+def test_dashboard_stats_empty_database(app):
+    stats = get_dashboard_stats()
+    assert stats['total_bikes'] == 0
+    assert stats['payment_amounts'] == [0.0] * 8
+    assert stats['rental_chart_rentals'] == [0] * 7
+    assert stats['bike_categories'] == []
+
+
+def test_rental_activity_matches_legacy_weeks(seeded):
+    _, weekly_rentals = _legacy_dashboard_stats()
+    data = get_rental_activity_data()
+    assert data['rentals'] == weekly_rentals
+    assert len(data['labels']) == 8
+
+
+def test_dashboard_stats_use_a_handful_of_queries(seeded):
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        get_dashboard_stats()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    # 6 samenvattingen (+3 geïndexeerde datumtellers) + per grafiekreeks de rollup en de basistabellen (vandaag)
+    assert len(statements) <= 15
@@ -0,0 +1,70 @@
+import json
+import os
+
+from flask import render_template_string, url_for
+
+from app import assets, i18n
+from app.assets import manifest
+
+
+def test_static_urls_are_fingerprinted_without_stat(app, monkeypatch):
+    version = manifest.version('css/styles.css')
+    assert version and len(version) == 12
+    i18n.get_translator('nl')  # catalogi worden lui gelezen; niet meetellen
+    monkeypatch.setattr(os.path, 'isfile', lambda *a: (_ for _ in ()).throw(AssertionError('stat')))
+    with app.test_request_context('/'):
+        app.preprocess_request()
+        html = render_template_string(
+            "{{ static_first(['img/missing.svg', 'img/home/logo-nl.svg']) }}|{{ static_or('nope.png', 'http://x/y.png') }}")
+        assert url_for('static', filename='css/styles.css').endswith(f'?v={version}')
+    first, second = html.split('|')
+    assert first.endswith('img/home/logo-nl.svg?v=' + manifest.version('img/home/logo-nl.svg'))
+    assert second == 'http://x/y.png'
+
+
+def test_far_future_cache_only_for_current_hash(app, client):
+    with app.test_request_context('/'):
+        url = url_for('static', filename='css/styles.css')
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.cache_control.max_age == assets.FAR_FUTURE and response.cache_control.immutable
+    response.close()
+
+    stale = client.get('/static/css/styles.css?v=000000000000')
+    assert not stale.cache_control.immutable and stale.cache_control.max_age in (None, 0)
+    stale.close()
+
+
+def test_manifest_file_and_rebuild(tmp_path):
+    (tmp_path / 'a.css').write_text('body{}')
+    files = assets.write(str(tmp_path))
+    assert json.loads((tmp_path / assets.MANIFEST_NAME).read_text()) == files
+
+    local = assets.StaticManifest()
+    local.load(str(tmp_path))
+    assert local.files == {'a.css': files['a.css']['hash']}
+    (tmp_path / 'a.css').write_text('body{color:red}')
+    local.rebuild()
+    assert local.version('a.css') != files['a.css']['hash']
+
+
+def test_stale_manifest_file_is_not_trusted(tmp_path):
+    (tmp_path / 'a.css').write_text('body{}')
+    (tmp_path / 'b.css').write_text('p{}')
+    old = assets.write(str(tmp_path))
+    # Volgende deploy: a.css gewijzigd, het oude manifest.json staat er nog
+    (tmp_path / 'a.css').write_text('body{color:red}')
+
+    local = assets.StaticManifest()
+    local.load(str(tmp_path))
+    assert local.version('a.css') != old['a.css']['hash']
+    assert local.version('b.css') == old['b.css']['hash']
+
+
+def test_cli_writes_manifest(app, tmp_path, monkeypatch):
+    (tmp_path / 'x.js').write_text('1')
+    monkeypatch.setattr(app, 'static_folder', str(tmp_path))
+    result = app.test_cli_runner().invoke(args=['assets-manifest'])
+    assert result.exit_code == 0 and 'Static files: 1' in result.output
+    assert (tmp_path / assets.MANIFEST_NAME).exists()
+    assert manifest.version('x.js')
@@ -0,0 +1,90 @@
+from sqlalchemy import event
+
+from app.auth import principal_cache
+from app.cache import LRUCache
+from app.extensions import db
+from app.models import User
+
+
+def _user_queries(client, url):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if 'FROM "user"' in statement or 'FROM user' in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return response, len(statements)
+
+
+def test_lru_ttl_and_eviction():
+    now = [0.0]
+    cache = LRUCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)  # 'b' is het minst recent gebruikt
+    assert cache.get('b') is None and cache.get('a') == 1
+    cache.evict('a')
+    assert cache.get('a') is None
+    now[0] = 11
+    assert cache.get('c') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_warm_decorator_stack_needs_no_user_query(client, admin, login):
+    login(admin)
+    response, cold = _user_queries(client, '/api/lookup/bikes')
+    assert response.status_code == 200 and cold == 1
+    response, warm = _user_queries(client, '/api/lookup/bikes')
+    assert response.status_code == 200 and warm == 0
+
+
+def test_login_seeds_cache(client, admin):
+    client.post('/login', data={'email': 'admin@test.local', 'password': 'secret'})
+    response, queries = _user_queries(client, '/rentals/new')
+    assert response.status_code == 200 and queries == 0
+
+
+def test_role_change_is_seen_on_next_request(client, admin, login):
+    login(admin)
+    assert client.get('/rentals/new').status_code == 200
+
+    admin.role = 'finance_manager'
+    db.session.commit()
+    assert principal_cache.get(admin.user_id) is None
+    response = client.get('/rentals/new')
+    assert response.status_code == 302 and '/dashboard' in response.headers['Location']
+    assert client.get('/payments').status_code == 200
+    with client.session_transaction() as sess:
+        assert sess['user_role'] == 'finance_manager'
+
+
+def test_password_change_and_bulk_update_evict(client, admin, login):
+    login(admin)
+    client.get('/rentals/new')
+    assert principal_cache.get(admin.user_id) is not None
+
+    admin.set_password('nieuw')
+    db.session.commit()
+    assert principal_cache.get(admin.user_id) is None
+
+    client.get('/rentals/new')
+    User.query.update({'role': 'depot_manager'}, synchronize_session=False)
+    db.session.commit()
+    assert principal_cache.stats()['size'] == 0
+
+
+def test_deleted_user_is_logged_out(client, admin, login):
+    login(admin)
+    assert client.get('/dashboard').status_code == 200
+    db.session.delete(admin)
+    db.session.commit()
+    response = client.get('/dashboard')
+    assert response.status_code == 302 and '/login' in response.headers['Location']
+    with client.session_transaction() as sess:
+        assert 'user_id' not in sess
@@ -0,0 +1,91 @@
+from datetime import date
+
+from app.cache import TTLCache, stats_cache
+from app.extensions import db
+from app.models import Bike, Item, Rental
+from app.services import get_dashboard_stats
+
+
+def test_ttl_expiry_and_counters():
+    now = [0.0]
+    cache = TTLCache(ttl=10, clock=lambda: now[0])
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_set('k', factory) == 1
+    assert cache.get_or_set('k', factory) == 1
+    now[0] = 11
+    assert cache.get_or_set('k', factory) == 2
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
+
+
+def test_size_bound_and_expired_entries_are_dropped():
+    now = [0.0]
+    cache = TTLCache(ttl=10, maxsize=3, clock=lambda: now[0])
+    for key in 'abc':
+        cache.get_or_set(key, lambda: key)
+    cache.get_or_set('a', lambda: 'x')  # 'a' is nu het recentst gebruikt
+    cache.get_or_set('d', lambda: 'd')
+    assert cache.stats()['size'] == 3 and cache.get_or_set('b', lambda: 'new') == 'new'
+
+    now[0] = 11
+    cache.get_or_set('e', lambda: 'e')
+    cache.get_or_set('f', lambda: 'f')
+    assert cache.stats()['size'] == 2
+
+
+def test_value_computed_across_an_invalidation_is_not_stored():
+    cache = TTLCache(ttl=60)
+
+    def stale_factory():
+        # Een commit tijdens de berekening
+        cache.invalidate()
+        return 'oud'
+
+    assert cache.get_or_set('k', stale_factory) == 'oud'
+    assert cache.stats()['size'] == 0
+    assert cache.get_or_set('k', lambda: 'nieuw') == 'nieuw'
+    assert cache.get_or_set('k', lambda: 'anders') == 'nieuw'
+
+
+def test_timeseries_ranges_cannot_grow_the_cache(app):
+    from app.services import get_timeseries
+    stats_cache.maxsize = 5
+    for i in range(20):
+        get_timeseries('revenue', 'day', date(2024, 1, 1), date(2024, 1, 2 + i))
+    assert stats_cache.stats()['size'] <= 5
+
+
+def test_dashboard_stats_cached_until_write(seeded):
+    first = get_dashboard_stats()
+    hits = stats_cache.hits
+    assert get_dashboard_stats() is first
+    assert stats_cache.hits == hits + 1
+
+    bike = Bike.query.filter_by(status='available', archived=False).first()
+    db.session.add(Rental(bike_id=bike.bike_id, start_date=date.today()))
+    bike.status = 'rented'
+    db.session.commit()
+
+    fresh = get_dashboard_stats()
+    assert fresh is not first
+    assert fresh['active_rentals_count'] == first['active_rentals_count'] + 1
+    assert fresh['rentals_today'] == first['rentals_today'] + 1
+
+
+def test_bulk_update_invalidates(seeded):
+    first = get_dashboard_stats()
+    Bike.query.filter_by(status='repair').update({'status': 'available'})
+    db.session.commit()
+    assert get_dashboard_stats()['repair_bikes_count'] == 0 != first['repair_bikes_count']
+
+
+def test_untracked_writes_keep_cache(seeded):
+    first = get_dashboard_stats()
+    db.session.add(Item(name='Helm'))
+    db.session.commit()
+    assert get_dashboard_stats() is first
@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+from sqlalchemy import inspect
+
+from app import create_app
+from app.config import ProductionConfig, config_for
+from app.extensions import db
+
+
+def test_profile_selection(monkeypatch):
+    assert config_for('production') is ProductionConfig
+    monkeypatch.setenv('APP_PROFILE', 'Production')
+    assert config_for() is ProductionConfig
+    with pytest.raises(ValueError):
+        config_for('staging')
+
+
+def test_production_profile(tmp_path, monkeypatch):
+    monkeypatch.setattr(ProductionConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path}/prod.db')
+    monkeypatch.setattr(ProductionConfig, 'SQLALCHEMY_ENGINE_OPTIONS', {})
+    monkeypatch.setattr(ProductionConfig, 'JINJA_CACHE_DIR', str(tmp_path / 'jinja'))
+    monkeypatch.setattr(ProductionConfig, 'STATIC_WATCH_INTERVAL', 1)
+
+    app = create_app('production')
+    # Klaar om te forken: geen threads gestart, geen open verbindingen in de pool
+    assert not any(t.name in ('static-watcher', 'rental-sweeper') for t in threading.enumerate())
+    with app.app_context():
+        assert db.engine.pool.checkedin() == 0
+    assert not app.jinja_env.auto_reload
+    assert app.jinja_env.bytecode_cache is not None and any((tmp_path / 'jinja').iterdir())
+    # Vooraf geladen: base.html zit al in de template-cache van Jinja
+    assert any(key[1] == 'base.html' for key in app.jinja_env.cache.keys())
+    with app.app_context():
+        # Geen create_all: het schema komt uit migrations/
+        assert inspect(db.engine).get_table_names() == []
+        db.engine.dispose()
+    assert app.test_client().get('/login').status_code == 200
+
+
+def test_test_profile_is_isolated(app):
+    assert app.testing and app.config['SQLALCHEMY_DATABASE_URI'] == 'sqlite://'
+    assert not app.jinja_env.auto_reload
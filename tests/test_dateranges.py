@@ -0,0 +1,45 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import func
+
+from app.dateranges import date_range, on_day
+from app.extensions import db
+from app.models import Bike, Member, Payment
+
+
+def test_on_day_matches_func_date_for_timestamps(app):
+    today = date.today()
+    midnight = datetime.combine(today, datetime.min.time())
+    for created in (midnight - timedelta(microseconds=1), midnight,
+                    midnight + timedelta(hours=23, minutes=59, seconds=59), midnight + timedelta(days=1)):
+        db.session.add(Bike(name=str(created), created_at=created))
+    db.session.commit()
+
+    assert Bike.query.filter(on_day(Bike.created_at, today)).count() == 2
+    assert Bike.query.filter(on_day(Bike.created_at, today)).count() == \
+        Bike.query.filter(func.date(Bike.created_at) == today).count()
+
+
+def test_date_range_on_date_column_is_half_open(seeded):
+    today = date.today()
+    start, stop = today - timedelta(days=10), today - timedelta(days=4)
+    expected = [p.payment_id for p in Payment.query.all() if start <= p.paid_at < stop]
+    assert sorted(p.payment_id for p in Payment.query.filter(date_range(Payment.paid_at, start, stop))) == sorted(expected)
+
+
+@pytest.mark.parametrize('column, wrapped, ranged, index', [
+    (Bike.created_at, lambda: func.date(Bike.created_at) == date.today(),
+     lambda: on_day(Bike.created_at, date.today()), 'ix_bike_created_at'),
+    (Member.created_at, lambda: func.date(Member.created_at) >= date.today().replace(day=1),
+     lambda: date_range(Member.created_at, date.today().replace(day=1)), 'ix_member_created_at'),
+    (Payment.paid_at, lambda: func.date(Payment.paid_at) >= date.today().replace(day=1),
+     lambda: date_range(Payment.paid_at, date.today().replace(day=1)), 'ix_payment_paid_at'),
+])
+def test_range_predicates_switch_plan_to_index_range_scan(seeded, explain, column, wrapped, ranged, index):
+    entity = column.class_
+    before = explain(db.session.query(func.count()).select_from(entity).filter(wrapped()))
+    after = explain(db.session.query(func.count()).select_from(entity).filter(ranged()))
+    # func.date() kan hooguit de hele index doorlopen, een bereik zoekt erin
+    assert before.startswith('SCAN') and 'SEARCH' not in before
+    assert f'SEARCH {entity.__tablename__} USING COVERING INDEX {index}' in after
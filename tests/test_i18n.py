@@ -0,0 +1,55 @@
+import json
+
+from app import i18n
+from app.assets import manifest
+from app.i18n import fragment_cache, get_translator
+
+
+def test_translator_is_built_once_per_language(app):
+    assert get_translator('fr') is get_translator('fr')
+    assert get_translator('fr')('Leden') == 'Membres'
+    assert get_translator('nl')('Leden') == 'Leden'
+    assert get_translator('xx')('Leden') == 'Leden'
+
+
+def test_json_catalog_is_loaded_lazily(app, tmp_path):
+    (tmp_path / 'fr.json').write_text(json.dumps({'Leden': 'Adhérents', 'Nieuw': 'Nouveau'}), encoding='utf-8')
+    app.config['I18N_CATALOG_DIR'] = str(tmp_path)
+    i18n.init_app(app)
+    assert 'fr' not in i18n._translators
+    t = get_translator('fr')
+    assert t('Leden') == 'Adhérents' and t('Nieuw') == 'Nouveau' and t('Dashboard') == 'Tableau de bord'
+
+
+def test_navigation_fragment_is_cached_per_language(app, client, admin, login):
+    login(admin)
+    client.get('/rentals/new')
+    misses = fragment_cache.stats()['misses']
+    body = client.get('/rentals/new').get_data(as_text=True)
+    assert fragment_cache.stats()['misses'] == misses
+    assert 'id="app-sidebar"' in body and 'id="mobile-menu"' in body
+
+    client.get('/lang/fr')
+    body = client.get('/rentals/new').get_data(as_text=True)
+    assert fragment_cache.stats()['misses'] == misses + 2
+    assert 'Déconnexion' in body
+
+
+def test_fragment_cache_can_be_disabled(app, client, admin, login):
+    app.config['FRAGMENT_CACHE_TTL'] = 0
+    i18n.init_app(app)
+    login(admin)
+    client.get('/rentals/new')
+    client.get('/rentals/new')
+    assert fragment_cache.stats()['size'] == 0
+
+
+def test_navigation_fragment_follows_manifest_rebuild(app, client, admin, monkeypatch, login):
+    login(admin)
+    logo = 'img/home/logo-nl.svg'
+    old = manifest.version(logo)
+    assert f'{logo}?v={old}' in client.get('/rentals/new').get_data(as_text=True)
+
+    monkeypatch.setitem(manifest.files, logo, 'feedfeedfeed')
+    manifest.generation += 1
+    assert f'{logo}?v=feedfeedfeed' in client.get('/rentals/new').get_data(as_text=True)
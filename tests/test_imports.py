@@ -0,0 +1,106 @@
+import io
+from datetime import date
+
+from app import imports, search
+from app.extensions import db
+from app.models import Bike, Child, DailyStats, Member, Payment, User
+
+
+MEMBERS_CSV = """first_name,last_name,email,status,street,city
+Zoë,Müller,ZOE@example.org,active,Kerkstraat 1,Gent
+Jan,Peeters,jan@example.org,inactive,,
+,Zonder voornaam,x@example.org,,,
+Piet,Janssens,piet@example.org,verhuisd,,
+"""
+
+
+def test_members_csv_skips_invalid_rows(app):
+    result = imports.run_import('members', io.StringIO(MEMBERS_CSV), 'csv', chunk_size=2)
+    assert (result.rows, result.inserted, result.error_count) == (4, 2, 2)
+    assert [line for line, _ in result.errors] == [4, 5]
+    assert 'first_name ontbreekt' in result.errors[0][1] and 'verhuisd' in result.errors[1][1]
+
+    zoe = Member.query.filter_by(last_name='Müller').one()
+    assert zoe.address == 'Kerkstraat 1 Gent' and zoe.status == 'active'
+    # search_text wordt ook zonder mapper events ingevuld
+    assert {mid for (mid,) in db.session.execute(search.matching_ids(Member, 'zoe mul'))} == {zoe.member_id}
+
+
+def test_children_and_payments_resolve_members_per_chunk(app):
+    imports.run_import('members', io.StringIO(MEMBERS_CSV), 'csv')
+    jan = Member.query.filter_by(first_name='Jan').one()
+    children = '\n'.join([
+        '{"member_email": "zoe@EXAMPLE.org", "first_name": "Lotte"}',
+        f'{{"member_id": "{jan.member_id}", "first_name": "Mats", "last_name": "Peeters-Maes"}}',
+        '{"member_email": "niemand@example.org", "first_name": "Spook"}',
+        'geen json',
+    ])
+    result = imports.run_import('children', io.StringIO(children), 'jsonl', chunk_size=3)
+    assert (result.inserted, result.error_count) == (2, 2)
+    assert {c.last_name for c in Child.query} == {'Müller', 'Peeters-Maes'}
+    assert 'niemand@example.org' in result.errors[0][1] and 'JSON' in result.errors[1][1]
+    lotte = Child.query.filter_by(first_name='Lotte').one()
+    assert lotte.search_text == 'lotte muller'
+    assert {cid for (cid,) in db.session.execute(search.matching_ids(Child, 'lotte'))} == {lotte.child_id}
+
+    payments = '\n'.join([
+        f'{{"member_id": "{jan.member_id}", "amount": 20, "method": "bank_transfer", "paid_at": "2026-01-05"}}',
+        f'{{"member_id": "{jan.member_id}", "amount": "15.5", "paid_at": "2026-03-01"}}',
+        f'{{"member_id": "{jan.member_id}", "amount": "tien"}}',
+        f'{{"member_id": "{jan.member_id}", "amount": 5, "method": "bitcoin"}}',
+        f'{{"member_id": "{jan.member_id}", "amount": "nan"}}',
+        f'{{"member_id": "{jan.member_id}", "amount": "inf"}}',
+    ])
+    result = imports.run_import('payments', io.StringIO(payments), 'jsonl')
+    assert (result.inserted, result.error_count) == (2, 4)
+    assert {(p.method, p.received) for p in Payment.query} == {('bank_transfer', False), ('cash', True)}
+    db.session.refresh(jan)
+    assert jan.last_payment == date(2026, 3, 1)
+    assert db.session.get(DailyStats, date(2026, 3, 1)).revenue == 15.5
+
+
+def test_failed_chunk_falls_back_to_single_rows(app):
+    existing = Member(member_id='m-1', first_name='Al', last_name='Bestaand')
+    db.session.add(existing)
+    db.session.commit()
+    csv = 'member_id,first_name,last_name\nm-2,Nieuw,Lid\nm-1,Dubbel,Lid\nm-3,Ook,Nieuw\n'
+    result = imports.run_import('members', io.StringIO(csv), 'csv')
+    assert result.inserted == 2 and [line for line, _ in result.errors] == [3]
+    assert Member.query.count() == 3
+
+
+def test_dry_run_writes_nothing(app):
+    result = imports.run_import('bikes', io.StringIO('name,type\nFiets A,gewoon\nFiets B,raket\n'), 'csv',
+                                dry_run=True)
+    assert (result.inserted, result.error_count) == (1, 1)
+    assert Bike.query.count() == 0
+
+
+def test_import_cli(app, tmp_path):
+    path = tmp_path / 'fietsen.csv'
+    path.write_text('name,type,status\nFiets A,gewoon,\nFiets B,elektrisch,repair\nFiets C,raket,\n', encoding='utf-8')
+    result = app.test_cli_runner().invoke(args=['import-data', 'bikes', str(path), '--chunk-size', '1'])
+    assert result.exit_code == 0, result.output
+    assert 'Inserted bikes: 2 of 3 rows, errors: 1' in result.output
+    assert 'line 4' in result.stderr
+    assert {(b.name, b.status) for b in Bike.query} == {('Fiets A', 'available'), ('Fiets B', 'repair')}
+
+
+def test_upload_endpoint(client, admin, login):
+    login(admin)
+    response = client.post('/api/import/bikes', data={
+        'file': (io.BytesIO('﻿name,type\nFiets A,gewoon\n'.encode('utf-8')), 'fietsen.csv'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert response.get_json()['inserted'] == 1
+    assert client.post('/api/import/bikes').status_code == 400
+    assert client.post('/api/import/rentals').status_code == 404
+
+    depot = User(first_name='D', last_name='Epot', email='depot@test.local', role='depot_manager')
+    db.session.add(depot)
+    db.session.commit()
+    login(depot)
+    response = client.post('/api/import/payments', data={
+        'file': (io.BytesIO(b'{"member_id": "x", "amount": 1}\n'), 'betalingen.jsonl'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 403
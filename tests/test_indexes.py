@@ -0,0 +1,94 @@
+import re
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, func
+
+from app import aggregates
+from app.extensions import db
+from app.models import Bike, Member, Payment, Rental, User
+
+# Migraties die samen alle in de modellen gedeclareerde indexen aanmaken
+MIGRATIONS = ['migrations/add_performance_indexes.sql', 'migrations/add_expiring_rental.sql']
+
+
+def test_migration_matches_model_indexes(app):
+    declared = {i.name for t in db.metadata.tables.values() for i in t.indexes}
+    sql = ''
+    for path in MIGRATIONS:
+        with open(path) as f:
+            sql += f.read()
+    assert set(re.findall(r'CREATE INDEX IF NOT EXISTS (\w+)', sql)) == declared
+
+    # Idempotent: running it twice on an existing schema is a no-op
+    statements = [s for s in re.sub(r'--[^\n]*', '', sql).split(';') if s.strip()]
+    conn = db.session.connection()
+    for _ in range(2):
+        for statement in statements:
+            conn.exec_driver_sql(statement)
+
+
+@pytest.mark.parametrize('name, build, index', [
+    ('active rental of child',
+     lambda: Rental.query.filter_by(child_id='x', status='active'), 'ix_rental_child_status'),
+    ('rentals list by status',
+     lambda: Rental.query.filter(Rental.status == 'active').order_by(Rental.status, Rental.start_date.desc()),
+     'ix_rental_status_start_date'),
+    # SQLite only picks a partial index for literal predicates; with a bound status the
+    # composite status index is used (PostgreSQL/psycopg2 inlines parameters client-side)
+    ('overdue sweep',
+     lambda: Rental.query.filter(Rental.status == 'active', Rental.end_date < date.today()),
+     'SEARCH rental USING INDEX ix_rental_'),
+    ('rental starts per day',
+     lambda: db.session.query(Rental.start_date, func.count()).filter(
+         Rental.start_date >= date.today() - timedelta(days=56), Rental.start_date <= date.today()
+     ).group_by(Rental.start_date), 'ix_rental_start_date'),
+    ('inventory bikes by status',
+     lambda: Bike.query.filter_by(status='available', archived=False), 'ix_bike_status_archived'),
+    ('payments filtered by method',
+     lambda: Payment.query.filter(Payment.method == 'cash').order_by(Payment.paid_at.desc()),
+     'ix_payment_method_paid_at'),
+    ('payments in period',
+     lambda: Payment.query.filter(Payment.paid_at >= date.today().replace(day=1)), 'ix_payment_paid_at'),
+    ('members list order',
+     lambda: Member.query.order_by(Member.last_name, Member.first_name), 'ix_member_name'),
+    ('login lookup',
+     lambda: User.query.filter_by(email='admin@test.local'), 'ix_user_email'),
+])
+def test_query_uses_index(seeded, explain, name, build, index):
+    assert index in explain(build()), name
+
+
+def test_partial_index_for_literal_active_filter(seeded):
+    db.session.connection().exec_driver_sql('ANALYZE')
+    plan = db.session.connection().exec_driver_sql(
+        "EXPLAIN QUERY PLAN SELECT rental_id FROM rental WHERE status = 'active' AND end_date < '2000-01-01'"
+    ).all()
+    assert 'ix_rental_active_end_date' in ' '.join(row[-1] for row in plan)
+
+
+def test_rental_status_counts_use_covering_index(seeded, explain):
+    plan = explain(db.session.query(Rental.status, func.count(Rental.rental_id)).group_by(Rental.status))
+    assert 'ix_rental_status_start_date' in plan
+    assert aggregates.rental_status_counts()
+
+
+def test_dashboard_date_counters_search_their_index(seeded):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        aggregates.bike_summary(date.today())
+        aggregates.member_summary(date.today())
+        aggregates.payment_summary(date.today())
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    conn = db.session.connection()
+    plans = ' | '.join(row[-1] for statement, params in statements
+                       for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, params).all())
+    for index in ('ix_bike_created_at', 'ix_member_created_at', 'ix_payment_paid_at'):
+        assert f'USING INDEX {index}' in plans or f'USING COVERING INDEX {index}' in plans, index
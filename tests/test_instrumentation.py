@@ -0,0 +1,93 @@
+import pytest
+from flask import g
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.config import engine_options
+from app.extensions import db
+from app.instrumentation import TimedQueuePool, pool_status, pool_wait_stats
+
+
+def test_engine_options_from_env(monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '12')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+    monkeypatch.setenv('DB_STATEMENT_TIMEOUT_MS', '5000')
+    options = engine_options('postgresql+psycopg2://u:p@host/db')
+    assert options['pool_size'] == 12
+    assert options['pool_pre_ping'] is False
+    assert options['connect_args'] == {'options': '-c statement_timeout=5000'}
+    assert engine_options('sqlite://') == {}
+
+
+def test_timed_pool_records_wait(app, tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/pool.db', poolclass=TimedQueuePool, pool_size=2, max_overflow=0)
+    before = pool_wait_stats.checkouts
+    with app.test_request_context('/'):
+        g.db_pool_wait = 0.0
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+            status = pool_status(engine)
+            assert status['checked_out'] == 1
+            assert status['size'] == 2
+        assert g.db_pool_wait >= 0.0
+    assert pool_wait_stats.checkouts == before + 1
+    engine.dispose()
+
+
+def test_metrics_endpoint_access(app, client, admin, login):
+    assert client.get('/internal/metrics').status_code == 403
+
+    app.config['METRICS_TOKEN'] = 's3cret'
+    assert client.get('/internal/metrics', headers={'X-Metrics-Token': 'wrong'}).status_code == 403
+    # Niet-ASCII in de header is gewoon een fout token, geen 500
+    assert client.get('/internal/metrics', headers={'X-Metrics-Token': 'sécret'}).status_code == 403
+    data = client.get('/internal/metrics', headers={'X-Metrics-Token': 's3cret'}).get_json()
+    assert {'pool', 'pool_wait', 'stats_cache'} <= set(data)
+    assert 'hits' in data['stats_cache']
+
+    app.config['METRICS_TOKEN'] = None
+    login(admin)
+    assert client.get('/internal/metrics').status_code == 200
+
+
+def test_main_routes_stay_within_query_budget(client, admin, seeded, login):
+    login(admin)
+    for url in ('/dashboard', '/inventory', '/members', '/rentals', '/payments',
+                '/api/dashboard/rental-activity', '/api/dashboard/upcoming-rentals'):
+        response = client.get(url)
+        assert response.status_code == 200, url
+        assert any(v.startswith('db;dur=') for v in response.headers.getlist('Server-Timing')), url
+
+
+def test_query_budget_violation_fails_in_tests(app, client):
+    from app.extensions import db
+    from app.instrumentation import QueryBudgetExceeded, query_budget
+    from app.models import Bike
+
+    @app.route('/_test/greedy')
+    @query_budget(1)
+    def greedy():
+        for _ in range(3):
+            db.session.query(Bike).count()
+        return 'ok'
+
+    with pytest.raises(QueryBudgetExceeded, match='3 SQL queries'):
+        client.get('/_test/greedy')
+
+
+def test_slow_queries_are_logged_with_route(app, client, admin, caplog, login):
+    app.config['SLOW_QUERY_MS'] = 1e-9
+    login(admin)
+    with caplog.at_level('WARNING', logger='app.sql.slow'):
+        client.get('/rentals')
+    assert any('main.rentals_list' in r.getMessage() for r in caplog.records)
+
+
+def test_failed_statement_leaves_no_start_time_behind(app):
+    conn = db.session.connection()
+    for _ in range(3):
+        with pytest.raises(OperationalError):
+            conn.execute(text('SELECT * FROM bestaat_niet'))
+    assert conn.info['query_start'] == []
+    conn.execute(text('SELECT 1'))
+    assert conn.info['query_start'] == []
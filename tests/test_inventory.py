@@ -0,0 +1,66 @@
+from flask import template_rendered
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import Bike, Payment, Rental, without_eager
+
+
+class _Statements:
+    def __init__(self):
+        self.all = []
+
+    def __enter__(self):
+        event.listen(db.engine, 'before_cursor_execute', self._record)
+        return self.all
+
+    def __exit__(self, *exc):
+        event.remove(db.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, *args):
+        self.all.append(statement)
+
+
+def test_without_eager_drops_joined_relationships(app):
+    sql = str(Rental.query.options(*without_eager(Rental)).statement.compile(db.engine))
+    assert 'JOIN' not in sql
+    assert len(without_eager(Rental)) == 3 and len(without_eager(Payment)) == 1
+
+
+def test_inventory_is_one_bike_query(app, client, admin, seeded, login):
+    # Tweede actieve verhuring op dezelfde fiets mag de fiets niet dubbel tonen
+    rental = Rental.query.filter_by(status='active').first()
+    db.session.add(Rental(bike_id=rental.bike_id, member_id=rental.member_id, status='active'))
+    db.session.commit()
+    login(admin)
+
+    rendered = []
+
+    def record(sender, template, context, **extra):
+        rendered.append(context)
+
+    with template_rendered.connected_to(record, app), _Statements() as statements:
+        response = client.get('/inventory')
+    assert response.status_code == 200
+
+    bike_queries = [s for s in statements if 'FROM bike' in s]
+    assert len(bike_queries) == 1
+    assert 'JOIN child' not in bike_queries[0]
+
+    ctx = rendered[-1]
+    active = Bike.query.filter_by(archived=False).order_by(Bike.created_at.desc(), Bike.bike_id).all()
+    for status in ('available', 'rented', 'repair'):
+        assert [b.bike_id for b in ctx[f'{status}_bikes']] == [b.bike_id for b in active if b.status == status]
+
+    expected = {}
+    for r in Rental.query.filter_by(status='active'):
+        expected[r.bike_id] = f'{r.member.first_name} {r.member.last_name}' if r.member else 'Onbekend'
+    assert ctx['rental_map'] == {k: v for k, v in expected.items() if not db.session.get(Bike, k).archived}
+
+
+def test_list_pages_do_not_join_twice(client, admin, seeded, login):
+    login(admin)
+    for url, table in (('/rentals', 'bike'), ('/payments', 'member')):
+        with _Statements() as statements:
+            assert client.get(url).status_code == 200
+        listing = next(s for s in statements if 'LIMIT' in s and f'JOIN {table}' in s)
+        assert f'{table}_1' not in listing, url
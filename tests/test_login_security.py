@@ -0,0 +1,145 @@
+from werkzeug.security import generate_password_hash
+
+from app import login_security, maintenance
+from app.extensions import db
+from app.login_security import TokenBucketLimiter
+from app.models import User
+
+
+def _post_login(client, email='admin@test.local', password='secret', ip='10.0.0.1'):
+    return client.post('/login', data={'email': email, 'password': password},
+                       environ_base={'REMOTE_ADDR': ip})
+
+
+def test_token_bucket_refills_and_is_bounded():
+    now = [0.0]
+    limiter = TokenBucketLimiter(burst=2, per_minute=6, maxsize=2, clock=lambda: now[0])
+    limiter.hit('a')
+    limiter.hit('a')
+    assert limiter.peek('a') == 10.0  # 6 per minuut = één token per 10 s
+    now[0] = 10
+    assert limiter.peek('a') == 0
+    limiter.hit('b')
+    limiter.hit('c')  # 'a' is het minst recent gebruikt
+    assert limiter.stats()['tracked'] == 2 and 'a' not in limiter._buckets
+
+
+def test_email_is_stored_lowercased(app, explain):
+    user = User(first_name='A', last_name='B', email='  Mixed@Case.LOCAL ')
+    db.session.add(user)
+    db.session.commit()
+    assert user.email == 'mixed@case.local'
+    assert 'ix_user_email' in explain(User.query.filter_by(email='mixed@case.local'))
+
+
+def test_login_is_case_insensitive(client, admin):
+    response = _post_login(client, email='Admin@Test.Local')
+    assert response.status_code == 302
+
+
+def test_failed_attempts_return_429_without_hashing(app, client, admin, monkeypatch):
+    app.config['LOGIN_ACCOUNT_BURST'] = 3
+    login_security.init_app(app)
+    for _ in range(3):
+        assert _post_login(client, password='wrong').status_code == 200
+
+    monkeypatch.setattr(User, 'check_password', lambda *a: (_ for _ in ()).throw(AssertionError('hashed')))
+    response = _post_login(client)
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert login_security.account_limiter.stats()['rejected'] == 1
+
+
+def test_attacker_cannot_lock_out_the_account_owner(app, client, admin):
+    app.config['LOGIN_ACCOUNT_BURST'] = 2
+    login_security.init_app(app)
+    for _ in range(5):
+        _post_login(client, password='wrong', ip='10.6.6.6')
+    assert _post_login(client, password='wrong', ip='10.6.6.6').status_code == 429
+    # Het eigen adres van de gebruiker heeft niets verbruikt
+    assert _post_login(client, ip='10.0.0.2').status_code == 302
+
+
+def test_guessing_one_account_from_many_addresses_is_throttled(app, client, admin):
+    app.config['LOGIN_EMAIL_BURST'] = 4
+    app.config['LOGIN_EMAIL_PER_MINUTE'] = 6
+    login_security.init_app(app)
+    for i in range(4):
+        assert _post_login(client, password='wrong', ip=f'10.7.0.{i}').status_code == 200
+    # Elk adres heeft zijn eigen buckets nog vol, het account niet meer
+    response = _post_login(client, password='wrong', ip='10.7.0.99')
+    assert response.status_code == 429
+    assert login_security.email_limiter.stats()['rejected'] == 1
+    # Zachte vertraging: de eigenaar wacht één aanvulling (10 s), geen lockout
+    assert int(response.headers['Retry-After']) <= 10
+    assert _post_login(client, password='wrong', email='ander@test.local', ip='10.7.0.99').status_code == 200
+
+
+def test_successful_attempts_do_not_use_account_tokens(app, client, admin):
+    app.config['LOGIN_ACCOUNT_BURST'] = 1
+    login_security.init_app(app)
+    for _ in range(3):
+        assert _post_login(client).status_code == 302
+
+
+def test_proxy_hops_give_each_client_its_own_bucket(monkeypatch):
+    from app import create_app
+    from app.config import TestConfig
+    monkeypatch.setattr(TestConfig, 'TRUSTED_PROXY_HOPS', 1)
+    monkeypatch.setattr(TestConfig, 'LOGIN_IP_BURST', 1)
+    app = create_app('test')
+    client = app.test_client()
+
+    def attempt(client_ip):
+        return client.post('/login', data={'email': 'x@y.local', 'password': 'p'},
+                           headers={'X-Forwarded-For': client_ip}, environ_base={'REMOTE_ADDR': '10.0.0.1'})
+
+    with app.app_context():
+        assert attempt('203.0.113.1').status_code == 200
+        assert attempt('203.0.113.1').status_code == 429
+        assert attempt('203.0.113.2').status_code == 200
+        db.drop_all()
+
+
+def test_ip_bucket_covers_all_accounts(app, client, admin):
+    app.config['LOGIN_IP_BURST'] = 2
+    login_security.init_app(app)
+    _post_login(client, email='a@x.local')
+    _post_login(client, email='b@x.local')
+    assert _post_login(client).status_code == 429
+    assert _post_login(client, ip='10.0.0.9').status_code == 302
+
+
+def test_successful_login_resets_account_bucket(app, client, admin):
+    app.config['LOGIN_ACCOUNT_BURST'] = 2
+    login_security.init_app(app)
+    _post_login(client, password='wrong')
+    assert _post_login(client).status_code == 302
+    assert _post_login(client, password='wrong').status_code == 200
+    assert _post_login(client).status_code == 302
+
+
+def test_old_hash_is_upgraded_on_login(app, client, admin):
+    admin.password = generate_password_hash('secret', 'pbkdf2:sha256:1000')
+    db.session.commit()
+    assert admin.password_needs_rehash()
+
+    assert _post_login(client).status_code == 302
+    db.session.refresh(admin)
+    assert admin.password.startswith('scrypt:') and not admin.password_needs_rehash()
+    assert admin.check_password('secret')
+
+
+def test_configured_method_with_parameters(app, admin):
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    assert admin.password_needs_rehash()
+    admin.set_password('secret')
+    assert admin.password.startswith('pbkdf2:sha256:1000$') and not admin.password_needs_rehash()
+
+
+def test_maint_lowercases_existing_emails(app, admin):
+    db.session.execute(db.update(User).values(email='Admin@Test.Local'))
+    db.session.commit()
+    assert maintenance.count('user-emails') == {'user': 1}
+    maintenance.run('user-emails')
+    assert db.session.scalar(db.select(User.email)) == 'admin@test.local'
@@ -0,0 +1,58 @@
+from app.extensions import db
+from app.models import Bike, Child, Member, Rental
+
+
+def test_rental_form_does_not_embed_tables(client, admin, seeded, login):
+    login(admin)
+    body = client.get('/rentals/new').get_data(as_text=True)
+    assert 'Achternaam3' not in body and 'Fiets 0' not in body
+    assert '/api/lookup/members' in body and '/api/lookup/bikes' in body
+
+    bike = Bike.query.filter_by(status='available', archived=False).first()
+    body = client.get(f'/rent/{bike.bike_id}').get_data(as_text=True)
+    assert bike.name in body and 'Achternaam3' not in body
+
+
+def test_members_lookup_pages_and_search(client, admin, seeded, login):
+    login(admin)
+    first = client.get('/api/lookup/members?per_page=5').get_json()
+    second = client.get(f"/api/lookup/members?per_page=5&after={first['next']}").get_json()
+    labels = [m['label'] for m in first['results'] + second['results']]
+    expected = [f'{m.last_name}, {m.first_name}' for m in
+                Member.query.order_by(Member.last_name, Member.first_name, Member.member_id).limit(10)]
+    assert labels == expected
+
+    found = client.get('/api/lookup/members?q=lid7@').get_json()
+    assert [m['email'] for m in found['results']] == ['lid7@test.local'] and found['next'] is None
+
+
+def test_children_lookup_flags_active_rentals(client, admin, seeded, login):
+    login(admin)
+    assert client.get('/api/lookup/children').status_code == 400
+
+    member = next(m for m in seeded['members'] if len(m.children) == 2)
+    results = client.get(f'/api/lookup/children?member_id={member.member_id}').get_json()['results']
+    assert {c['id'] for c in results} == {c.child_id for c in member.children}
+    for item in results:
+        active = Rental.query.filter_by(child_id=item['id'], status='active').first()
+        assert item['active_rental'] == (active is not None)
+        assert item['bike_name'] == (active.bike.name if active else None)
+
+
+def test_bikes_lookup_filters_available(client, admin, seeded, login):
+    login(admin)
+    data = client.get('/api/lookup/bikes?type=gewoon&per_page=200').get_json()
+    expected = Bike.query.filter_by(status='available', archived=False, type='gewoon').order_by(Bike.name).all()
+    assert [b['id'] for b in data['results']] == [b.bike_id for b in expected]
+
+    assert client.get('/api/lookup/bikes?type=raket').status_code == 400
+    prefixed = client.get('/api/lookup/bikes?q=fiets 1').get_json()['results']
+    assert prefixed and all(b['label'].startswith('Fiets 1') for b in prefixed)
+
+
+def test_lookup_responses_are_cacheable(client, admin, seeded, login):
+    login(admin)
+    response = client.get('/api/lookup/bikes')
+    assert 'private' in response.headers['Cache-Control'] and 'max-age=30' in response.headers['Cache-Control']
+    again = client.get('/api/lookup/bikes', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
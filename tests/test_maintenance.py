@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app import maintenance
+from app.extensions import db
+from app.models import Bike, DailyStats, JobRun, Member, Payment, Rental, User
+
+
+@pytest.fixture
+def legacy(app):
+    members = [Member(first_name=f'L{i}', last_name='Oud', status=status)
+               for i, status in enumerate(['actief', 'Inactief ', None, '', 'paused', 'active', 'raar'])]
+    bike = Bike(name='Oude fiets')
+    db.session.add_all(members + [bike])
+    db.session.flush()
+    start = date(2025, 3, 1)
+    rentals = [Rental(bike_id=bike.bike_id, member_id=members[0].member_id, status='returned',
+                      start_date=start + timedelta(days=i), end_date=None) for i in range(5)]
+    rentals.append(Rental(bike_id=bike.bike_id, member_id=members[0].member_id, start_date=None, end_date=None))
+    db.session.add_all(rentals)
+    db.session.commit()
+    # Kolom-defaults vullen NULL in bij INSERT; oude data heeft ze wel
+    Member.query.filter_by(first_name='L2').update({'status': None}, synchronize_session=False)
+    Rental.query.filter_by(rental_id=rentals[-1].rental_id).update({'start_date': None}, synchronize_session=False)
+    db.session.commit()
+    return members
+
+
+def test_member_statuses_set_based(legacy):
+    assert maintenance.count('member-statuses') == {'member': 5}
+    assert maintenance.run('member-statuses', chunk_size=2) == {'member': 5}
+    assert [m.status for m in Member.query.order_by(Member.first_name)] == \
+        ['active', 'inactive', 'active', 'active', 'paused', 'active', 'active']
+    # Opnieuw draaien verandert niets meer
+    assert maintenance.run('member-statuses') == {'member': 0}
+    assert db.session.get(JobRun, 'maint:member-statuses').last_result.startswith('done')
+
+
+def test_rental_end_dates_and_rollup(app, legacy):
+    assert maintenance.run('rental-end-dates', chunk_size=2) == {'rental': 5}
+    for rental in Rental.query.filter(Rental.start_date.isnot(None)):
+        assert rental.end_date == rental.start_date + timedelta(days=365)
+    assert Rental.query.filter(Rental.end_date.is_(None)).count() == 1
+    # Nieuwe retourdatums staan meteen in daily_stats
+    assert db.session.get(DailyStats, date(2026, 3, 1)).rentals_returned == 1
+
+
+def test_interrupted_run_resumes(app, legacy, monkeypatch):
+    calls = []
+    real = maintenance._save
+
+    def crash_after_first_chunk(task, result):
+        real(task, result)
+        calls.append(result)
+        if len(calls) == 1:
+            db.session.commit()
+            raise RuntimeError('onderbroken')
+
+    monkeypatch.setattr(maintenance, '_save', crash_after_first_chunk)
+    with pytest.raises(RuntimeError):
+        maintenance.run('member-statuses', chunk_size=2)
+    db.session.rollback()
+    monkeypatch.setattr(maintenance, '_save', real)
+
+    position = maintenance._saved_position(maintenance.TASKS['member-statuses'])
+    assert position[0] == 0 and position[1] and position[2] == 2
+    # Hervat na de cursor: enkel de resterende drie
+    assert maintenance.run('member-statuses', chunk_size=2) == {'member': 3}
+    assert Member.query.filter(Member.status.notin_(maintenance.CANONICAL_MEMBER_STATUSES)).count() == 0
+
+
+def test_maint_cli(app, admin, seeded):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['maint', 'delete-all-data', '--dry-run'])
+    assert result.exit_code == 0 and f'payment: {Payment.query.count()} rows would change' in result.output
+
+    result = runner.invoke(args=['maint', 'delete-all-data'], input='n\n')
+    assert result.exit_code == 1 and Member.query.count() > 0
+
+    result = runner.invoke(args=['maint', 'delete-all-data', '--yes', '--chunk-size', '5'])
+    assert result.exit_code == 0, result.output
+    assert Member.query.count() == 0 and Rental.query.count() == 0 and Bike.query.count() == 0
+    assert User.query.count() == 1
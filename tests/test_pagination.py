@@ -0,0 +1,107 @@
+import re
+from html import unescape
+
+import pytest
+
+from app.extensions import db
+from app.models import Member, Payment, Rental, Bike, Child
+from app.pagination import paginate, decode_cursor, encode_cursor, page_size
+
+PAYMENT_KEYS = [(Payment.amount, True), (Payment.paid_at, True), (Payment.payment_id, True)]
+RENTAL_KEYS = [(Rental.status, False), (Rental.start_date, True), (Rental.rental_id, True)]
+
+
+def _walk_forward(query, keys, per_page):
+    pages, cursor = [], None
+    while True:
+        page = paginate(query, keys, after=cursor, per_page=per_page)
+        pages.append(page)
+        if not page.has_next:
+            return pages
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize('per_page', [1, 7, 50])
+def test_forward_walk_matches_full_ordering(seeded, per_page):
+    query = db.session.query(Payment, Member).join(Member)
+    expected = query.order_by(Payment.amount.desc(), Payment.paid_at.desc(), Payment.payment_id.desc()).all()
+    pages = _walk_forward(query, PAYMENT_KEYS, per_page)
+    assert [row for page in pages for row in page] == expected
+    assert all(len(page) <= per_page for page in pages)
+    assert not pages[0].has_prev
+
+
+def test_backward_walk_returns_same_pages(seeded):
+    query = db.session.query(Rental, Bike, Child, Member).join(Bike) \
+        .outerjoin(Child, Rental.child_id == Child.child_id) \
+        .outerjoin(Member, Rental.member_id == Member.member_id)
+    forward = _walk_forward(query, RENTAL_KEYS, 4)
+    assert len(forward) > 2
+
+    page = forward[-1]
+    for expected in reversed(forward[:-1]):
+        page = paginate(query, RENTAL_KEYS, before=page.prev_cursor, per_page=4)
+        assert page.items == expected.items
+    assert not page.has_prev
+
+
+@pytest.mark.parametrize('sort, direction', [('method', 'asc'), ('method', 'desc'), ('date', 'desc'), ('date', 'asc')])
+def test_rows_with_null_keys_are_not_skipped(seeded, sort, direction):
+    from app.services import payment_sort_keys
+    ids = [p.payment_id for p in Payment.query.order_by(Payment.payment_id).limit(3)]
+    # Zonder methode, zonder datum en zonder beide
+    db.session.execute(db.update(Payment).where(Payment.payment_id.in_(ids[:2])).values(method=None))
+    db.session.execute(db.update(Payment).where(Payment.payment_id.in_(ids[1:])).values(paid_at=None))
+    db.session.commit()
+
+    keys = payment_sort_keys(sort, direction)
+    query = Payment.query
+    forward = _walk_forward(query, keys, 3)
+    ids = [p.payment_id for page in forward for p in page]
+    assert sorted(ids) == sorted(p.payment_id for p in Payment.query.all())
+    assert len(ids) == len(set(ids))
+
+    page = forward[-1]
+    for expected in reversed(forward[:-1]):
+        page = paginate(query, keys, before=page.prev_cursor, per_page=3)
+        assert page.items == expected.items
+
+
+def test_null_rental_start_date_is_listed(seeded):
+    from app.services import RENTAL_SORT_KEYS
+    Rental.query.filter_by(status='active').first().start_date = None
+    db.session.commit()
+    query = db.session.query(Rental, Bike).join(Bike)
+    rows = [row for page in _walk_forward(query, RENTAL_SORT_KEYS, 2) for row in page]
+    assert len(rows) == Rental.query.count()
+    assert any(rental.start_date is None for rental, _ in rows)
+
+
+def test_cursor_roundtrip_and_bad_input():
+    from datetime import date
+    keys = [(Payment.paid_at, True), (Payment.payment_id, True)]
+    token = encode_cursor([date(2025, 1, 31), 'abc'])
+    assert decode_cursor(token, keys) == [date(2025, 1, 31), 'abc']
+    assert decode_cursor('not-a-cursor', keys) is None
+    assert decode_cursor(encode_cursor([1]), keys) is None
+    assert page_size('500') == 200
+    assert page_size('x') == 50
+
+
+def test_payments_totals_cover_all_pages(client, admin, seeded, login):
+    login(admin)
+    html = client.get('/payments?per_page=5').get_data(as_text=True)
+    payments = Payment.query.all()
+    expected_total = sum(p.amount for p in payments if p.received)
+    assert f"€{expected_total:.2f}" in html
+    assert 'after=' in html
+
+
+def test_list_pages_follow_next_cursor(client, admin, seeded, login):
+    login(admin)
+    for url in ('/members?per_page=3', '/rentals?per_page=3&status=all', '/payments?per_page=3&sort=method&dir=asc'):
+        html = client.get(url).get_data(as_text=True)
+        next_url = unescape(re.search(r'href="([^"]*after=[^"]*)"', html).group(1))
+        page_two = client.get(next_url)
+        assert page_two.status_code == 200
+        assert 'before=' in page_two.get_data(as_text=True)
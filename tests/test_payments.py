@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import Member, Payment
+from app.services import get_payment_totals, payment_filter_criteria
+
+
+def _python_totals(method, period, search):
+    today = date.today()
+    start = {'today': today, 'week': today - timedelta(days=today.weekday()),
+             'month': today.replace(day=1)}.get(period)
+    rows = []
+    for p, m in db.session.query(Payment, Member).join(Member).all():
+        if method != 'all' and p.method != method:
+            continue
+        if start and p.paid_at < start:
+            continue
+        term = search.lower()
+        if term and not any(term in (v or '').lower() for v in (m.first_name, m.last_name, m.email)):
+            continue
+        rows.append(p)
+    return {
+        'total': sum(p.amount for p in rows if p.received),
+        'cash': sum(p.amount for p in rows if p.method == 'cash'),
+        'card': sum(p.amount for p in rows if p.method == 'card'),
+        'bank': sum(p.amount for p in rows if p.method == 'bank_transfer' and p.received),
+    }
+
+
+@pytest.mark.parametrize('method, period, search', [
+    ('all', 'all', ''),
+    ('cash', 'all', ''),
+    ('bank_transfer', 'month', ''),
+    ('all', 'week', ''),
+    ('all', 'today', ''),
+    ('all', 'all', 'achternaam1'),
+    ('card', 'month', 'lid3@'),
+])
+def test_totals_match_python_sums(seeded, method, period, search):
+    totals = get_payment_totals(payment_filter_criteria(method, period, search))
+    expected = _python_totals(method, period, search)
+    assert totals == pytest.approx(expected)
+
+
+def test_totals_are_one_query_without_member_join(seeded):
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        get_payment_totals(payment_filter_criteria('all', 'month', 'voornaam'))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert len(statements) == 1
+    assert 'GROUP BY payment.method, payment.received' in statements[0]
+    assert 'JOIN member' not in statements[0]
@@ -0,0 +1,175 @@
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import rollups, timeseries
+from app.extensions import db
+from app.models import DailyStats, Member, Payment, Rental
+from app.tasks import expire_past_due_rentals, refresh_daily_stats
+
+
+def _expected(day):
+    rentals, payments = Rental.query.all(), [p for p in Payment.query.all() if p.paid_at == day]
+    bank = [p for p in payments if p.method == 'bank_transfer']
+    return {
+        'rentals_started': sum(r.start_date == day for r in rentals),
+        'rentals_returned': sum(r.end_date == day and r.status == 'returned' for r in rentals),
+        'payments_count': len(payments),
+        'revenue': sum(p.amount for p in payments),
+        'cash_amount': sum(p.amount for p in payments if p.method == 'cash'),
+        'card_amount': sum(p.amount for p in payments if p.method == 'card'),
+        'bank_received_amount': sum(p.amount for p in bank if p.received),
+        'bank_open_amount': sum(p.amount for p in bank if not p.received),
+    }
+
+
+def _row(day):
+    row = db.session.get(DailyStats, day)
+    return {key: getattr(row, key) for key in _expected(day)} if row else None
+
+
+def test_commits_keep_touched_days_in_sync(seeded):
+    today = date.today()
+    member = seeded['members'][0]
+    # seeded is via de ORM gecommit: alle betaaldagen hebben al een rij
+    assert _row(today - timedelta(days=4)) == pytest.approx(_expected(today - timedelta(days=4)))
+
+    payment = Payment(member_id=member.member_id, amount=7.5, method='bank_transfer', received=False)
+    db.session.add(payment)
+    db.session.commit()
+    assert _row(today) == pytest.approx(_expected(today))
+
+    # Verplaatsen raakt de oude én de nieuwe dag
+    moved_to = today - timedelta(days=3)
+    payment.paid_at = moved_to
+    db.session.commit()
+    assert _row(today) == pytest.approx(_expected(today))
+    assert _row(moved_to)['bank_open_amount'] == 7.5
+
+    db.session.delete(payment)
+    db.session.commit()
+    assert _row(moved_to) == pytest.approx(_expected(moved_to))
+
+
+def test_rollback_discards_touched_days(seeded):
+    db.session.add(Payment(member_id=seeded['members'][0].member_id, amount=1, paid_at=date(2001, 1, 1)))
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+    assert db.session.get(DailyStats, date(2001, 1, 1)) is None
+
+
+def test_bulk_delete_with_touch_query(seeded):
+    member = seeded['members'][1]
+    days = {p.paid_at for p in member.payments}
+    rows = Payment.query.filter_by(member_id=member.member_id)
+    rollups.touch_query(rows)
+    rows.delete()
+    db.session.commit()
+    for day in days:
+        assert _row(day) == pytest.approx(_expected(day))
+
+
+def test_sweeper_refreshes_returned_counts(app, seeded):
+    today = date.today()
+    rental = Rental.query.filter_by(status='active').first()
+    rental.end_date = today - timedelta(days=2)
+    db.session.commit()
+    assert _row(rental.end_date)['rentals_returned'] == _expected(rental.end_date)['rentals_returned']
+
+    expire_past_due_rentals(today)
+    assert _row(today - timedelta(days=2)) == pytest.approx(_expected(today - timedelta(days=2)))
+
+
+def test_backfill_covers_every_day_and_series_reads_rollup(app, seeded):
+    today = date.today()
+    DailyStats.query.delete()
+    db.session.commit()
+    days = refresh_daily_stats()
+    first = rollups.first_activity_date(db.session.connection())
+    assert days == (today - first).days + 1 == DailyStats.query.count()
+
+    start, stop = today - timedelta(days=60), today + timedelta(days=1)
+    app.config['DAILY_STATS_ROLLUP'] = False
+    from_base = timeseries.series('revenue', 'week', start, stop)
+    app.config['DAILY_STATS_ROLLUP'] = True
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        from_rollup = timeseries.series('revenue', 'week', start, stop)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert from_rollup == pytest.approx(from_base)
+    # Verleden uit daily_stats, vandaag uit de basistabel
+    assert len(statements) == 2
+    assert 'FROM daily_stats' in statements[0] and 'FROM payment' in statements[1]
+
+
+def test_incomplete_rollup_falls_back_to_base_tables(app, seeded):
+    today = date.today()
+    refresh_daily_stats()
+    db.session.delete(db.session.get(DailyStats, today - timedelta(days=10)))
+    db.session.commit()
+    # Een afwijkende rollup-waarde mag niet doorschemeren als de reeks onvolledig is
+    db.session.get(DailyStats, today - timedelta(days=8)).revenue = 10_000
+    db.session.commit()
+    points = dict(timeseries.series('revenue', 'day', today - timedelta(days=12), today + timedelta(days=1)))
+    assert points[today - timedelta(days=8)] == _expected(today - timedelta(days=8))['revenue']
+
+
+def test_refresh_daily_stats_command(app, seeded):
+    result = app.test_cli_runner().invoke(args=['refresh-daily-stats', '--from', '2024-01-01', '--to', '2024-01-31'])
+    assert result.exit_code == 0, result.output
+    assert 'Refreshed days: 31' in result.output
+    assert DailyStats.query.filter(DailyStats.day < date(2024, 2, 1)).count() == 31
+
+
+def test_overlapping_sessions_on_the_same_day(tmp_path, monkeypatch):
+    # Twee echte verbindingen (bestand i.p.v. in-memory): B schrijft dezelfde dag terwijl A nog open staat
+    from app import create_app
+    from app.config import TestConfig
+    monkeypatch.setattr(TestConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path}/overlap.db')
+    app = create_app('test')
+    day = date(2024, 3, 1)
+    with app.app_context():
+        member = Member(first_name='A', last_name='B')
+        db.session.add(member)
+        db.session.commit()
+        member_id = member.member_id
+        refresh_daily_stats(day, day + timedelta(days=1))
+
+    a_flushed, errors = threading.Event(), []
+
+    def pay(amount, wait_for=None, then=None):
+        with app.app_context():
+            try:
+                if wait_for:
+                    wait_for.wait(5)
+                db.session.add(Payment(member_id=member_id, amount=amount, paid_at=day, method='cash'))
+                db.session.flush()
+                if then:
+                    then.set()
+                    time.sleep(0.2)  # B staat nu te wachten op de schrijflock
+                db.session.commit()
+            except Exception as e:  # pragma: no cover - faalt de test hieronder
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=pay, args=(10,), kwargs={'then': a_flushed}),
+               threading.Thread(target=pay, args=(5,), kwargs={'wait_for': a_flushed})]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    with app.app_context():
+        row = db.session.get(DailyStats, day)
+        assert (row.payments_count, row.revenue, row.cash_amount) == (2, 15, 15)
+        db.engine.dispose()
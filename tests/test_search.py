@@ -0,0 +1,136 @@
+import pytest
+from sqlalchemy import text
+
+from app import search
+from app.extensions import db
+from app.models import Child, Member, Payment, Rental
+
+
+def _ids(model, term):
+    return {row[0] for row in db.session.execute(search.matching_ids(model, term))}
+
+
+@pytest.mark.parametrize('parts, expected', [
+    (('Zoë', 'Müller'), 'zoe muller'),
+    (('  Hélène ', 'De  Smet', 'HELENE@Example.org'), 'helene de smet helene@example.org'),
+    (('100%_sure',), '100 sure'),
+    ((None, 'Peeters'), 'peeters'),
+])
+def test_normalize(parts, expected):
+    assert search.normalize(*parts) == expected
+
+
+@pytest.fixture
+def people(app):
+    zoe = Member(first_name='Zoë', last_name='Müller', email='zoe@test.local')
+    jan = Member(first_name='Jan', last_name='Zoetemelk', email='jan@test.local')
+    other = Member(first_name='Piet', last_name='Peeters', email='piet@test.local')
+    db.session.add_all([zoe, jan, other])
+    db.session.flush()
+    db.session.add_all([Child(member_id=other.member_id, first_name='Mathéo', last_name='Peeters')])
+    db.session.commit()
+    return zoe, jan, other
+
+
+def test_search_text_maintained_and_accent_folded(people):
+    zoe, jan, other = people
+    assert zoe.search_text == 'zoe muller zoe@test.local'
+    assert _ids(Member, 'ZOË mül') == {zoe.member_id}
+    assert _ids(Member, 'zoe') == {zoe.member_id, jan.member_id}
+    assert _ids(Child, 'matheo') == {other.children[0].child_id}
+    # Korte termen gaan niet via de trigram-index maar vinden hetzelfde
+    assert _ids(Member, 'zo') == {zoe.member_id, jan.member_id}
+
+    jan.last_name = 'Janssens'
+    db.session.commit()
+    assert _ids(Member, 'zoetemelk') == set()
+    assert _ids(Member, 'janssens') == {jan.member_id}
+
+    db.session.delete(other)
+    db.session.commit()
+    assert _ids(Member, 'peeters') == set()
+
+
+def test_fts_index_is_used(people, explain):
+    plan = explain(search.matching_ids(Member, 'muller'))
+    assert 'VIRTUAL TABLE' in plan
+
+
+def test_ranking_prefers_first_name_prefix(people):
+    zoe, jan, _ = people
+    assert [m.member_id for m in search.ranked(Member.query, Member, 'zoe', 10)] == [zoe.member_id, jan.member_id]
+
+
+def test_reindex_rebuilds_search_text(app, people):
+    db.session.execute(text('UPDATE member SET search_text = NULL'))
+    db.session.commit()
+    assert _ids(Member, 'muller') == set()
+    result = app.test_cli_runner().invoke(args=['reindex-search'])
+    assert result.exit_code == 0, result.output
+    assert 'member: 3' in result.output
+    assert _ids(Member, 'muller') == {people[0].member_id}
+
+
+def test_list_pages_search(client, admin, seeded, login):
+    login(admin)
+    member = seeded['members'][5]
+    child = seeded['children'][3]
+
+    body = client.get('/members?search=' + member.first_name.upper()).get_data(as_text=True)
+    assert member.email in body and seeded['members'][4].email not in body
+
+    rentals = client.get('/rentals?search=' + child.first_name).get_data(as_text=True)
+    for rental in Rental.query.filter_by(child_id=child.child_id):
+        assert rental.rental_id in rentals
+
+    payments = client.get(f'/payments?search={member.first_name}').get_data(as_text=True)
+    own = Payment.query.filter_by(member_id=member.member_id).all()
+    assert own and all(p.payment_id in payments for p in own if p.payment_id)
+
+
+def test_member_search_reports_all_matches(client, admin, login):
+    login(admin)
+    db.session.add_all([Member(first_name=f'Jan{i}', last_name='Peeters', email=f'jan{i}@x.local') for i in range(5)])
+    db.session.commit()
+    body = client.get('/members?search=peeters&per_page=2').get_data(as_text=True)
+    assert '(5)' in body and '2 beste treffers getoond' in body
+    assert search.count_matching(Member, 'pe') == 5
+
+
+def _make_pre_search_database(connection):
+    # Zoals een database van vóór de zoekkolom: geen search_text, geen FTS-tabellen of triggers
+    for name in ('member', 'child'):
+        for suffix in ('ai', 'ad', 'au'):
+            connection.exec_driver_sql(f'DROP TRIGGER {name}_search_{suffix}')
+        connection.exec_driver_sql(f'DROP TABLE {name}_search')
+        connection.exec_driver_sql(f'ALTER TABLE {name} DROP COLUMN search_text')
+    connection.exec_driver_sql("INSERT INTO member (member_id, first_name, last_name, status) "
+                               "VALUES ('m1', 'Zoë', 'Müller', 'active')")
+
+
+def test_old_sqlite_database_is_upgraded_at_startup(tmp_path, monkeypatch):
+    from app import create_app
+    from app.config import TestConfig
+    monkeypatch.setattr(TestConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path}/old.db')
+    app = create_app('test')
+    with app.app_context():
+        with db.engine.begin() as connection:
+            _make_pre_search_database(connection)
+        db.engine.dispose()
+
+    app = create_app('test')
+    with app.app_context():
+        assert _ids(Member, 'zoe mul') == {'m1'}
+        db.session.add(Child(member_id='m1', first_name='Lotte', last_name='Müller'))
+        db.session.commit()
+        assert len(_ids(Child, 'lotte')) == 1
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_reindex_upgrades_old_sqlite_database(app):
+    with db.engine.begin() as connection:
+        _make_pre_search_database(connection)
+    db.session.remove()
+    assert search.reindex() == {'member': 1, 'child': 0}
+    assert _ids(Member, 'muller') == {'m1'}
@@ -0,0 +1,70 @@
+from datetime import date, timedelta
+
+from app.extensions import db
+from app.models import Bike, Rental
+from app.tasks import EXPIRE_RENTALS_JOB, expire_past_due_rentals, last_run
+
+
+def _rental(end_date, status='active'):
+    bike = Bike(name='Fiets', type='gewoon', status='rented' if status == 'active' else 'available')
+    db.session.add(bike)
+    db.session.flush()
+    rental = Rental(bike_id=bike.bike_id, start_date=end_date - timedelta(days=365),
+                    end_date=end_date, status=status)
+    db.session.add(rental)
+    return rental
+
+
+def test_expire_past_due_rentals_is_set_based(app):
+    today = date.today()
+    overdue = _rental(today - timedelta(days=1))
+    due_today = _rental(today)
+    db.session.commit()
+    ids = (overdue.rental_id, overdue.bike_id, due_today.rental_id, due_today.bike_id)
+
+    assert expire_past_due_rentals() == 1
+    db.session.expire_all()
+
+    assert db.session.get(Rental, ids[0]).status == 'returned'
+    assert db.session.get(Bike, ids[1]).status == 'available'
+    assert db.session.get(Rental, ids[2]).status == 'active'
+    assert db.session.get(Bike, ids[3]).status == 'rented'
+    run = last_run(EXPIRE_RENTALS_JOB)
+    assert run.last_run_at is not None
+    assert run.last_result == '1 rentals expired'
+
+
+def test_read_pages_do_not_expire_rentals(client, admin, login):
+    _rental(date.today() - timedelta(days=3))
+    db.session.commit()
+    login(admin)
+    assert client.get('/rentals').status_code == 200
+    assert Rental.query.filter_by(status='active').count() == 1
+
+
+def test_expire_rentals_cli(app):
+    _rental(date.today() - timedelta(days=2))
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=['expire-rentals'])
+    assert 'Expired rentals: 1' in result.output
+
+
+def test_create_app_never_starts_the_sweeper(monkeypatch):
+    import threading
+    from app import create_app
+    from app.config import TestConfig
+    monkeypatch.setattr(TestConfig, 'RENTAL_SWEEP_INTERVAL', 60)
+    app = create_app('test')
+    with app.app_context():
+        assert not any(t.name == 'rental-sweeper' for t in threading.enumerate())
+        db.drop_all()
+
+
+def test_rental_sweeper_cli_once(app):
+    overdue = _rental(date.today() - timedelta(days=2))
+    db.session.commit()
+    rental_id = overdue.rental_id
+    result = app.test_cli_runner().invoke(args=['rental-sweeper', '--once'])
+    assert result.exit_code == 0 and 'Sweep done.' in result.output
+    db.session.expire_all()
+    assert db.session.get(Rental, rental_id).status == 'returned'
@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import timeseries
+from app.extensions import db
+from app.models import Member, Payment, Rental
+
+
+# Python-tegenhanger van de extra criteria per metric
+PREDICATES = {
+    'rentals_returned': lambda r: r.status == 'returned',
+    'revenue_cash': lambda p: p.method == 'cash',
+    'revenue_card': lambda p: p.method == 'card',
+    'bank_received': lambda p: p.method == 'bank_transfer' and p.received,
+    'bank_open': lambda p: p.method == 'bank_transfer' and not p.received,
+}
+
+
+def _python_series(metric, granularity, start, stop):
+    column, value, _ = timeseries.METRICS[metric]
+    model = column.class_
+    rows = [r for r in model.query.all() if PREDICATES.get(metric, lambda r: True)(r)]
+    expected = {}
+    for day in timeseries.buckets(start, stop, granularity):
+        end = timeseries.next_bucket(day, granularity)
+        hits = []
+        for row in rows:
+            d = getattr(row, column.key)
+            d = d.date() if hasattr(d, 'date') and callable(d.date) else d
+            if d is not None and day <= d < min(end, stop):
+                hits.append(row)
+        expected[day] = sum(getattr(r, value.key) for r in hits) if value is not None else len(hits)
+    return expected
+
+
+@pytest.mark.parametrize('metric', sorted(timeseries.METRICS))
+@pytest.mark.parametrize('granularity', timeseries.GRANULARITIES)
+def test_series_matches_python_bucketing(seeded, metric, granularity):
+    today = date.today()
+    start, stop = today - timedelta(days=120), today + timedelta(days=1)
+    points = timeseries.series(metric, granularity, start, stop)
+    expected = _python_series(metric, granularity, timeseries.bucket_start(start, granularity), stop)
+    assert [day for day, _ in points] == list(expected)
+    assert dict(points) == pytest.approx(expected)
+
+
+def test_series_zero_fills_and_is_one_query(app):
+    app.config['DAILY_STATS_ROLLUP'] = False
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        points = timeseries.series('revenue', 'month', date(2024, 1, 15), date(2024, 7, 1))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert points == [(date(2024, m, 1), 0.0) for m in range(1, 7)]
+    assert len(statements) == 1
+
+
+def test_week_buckets_start_on_monday(app):
+    sunday, monday = date(2024, 3, 10), date(2024, 3, 11)
+    db.session.add_all([Member(first_name='A', last_name='B'), Member(first_name='C', last_name='D')])
+    db.session.flush()
+    for day in (sunday, monday):
+        db.session.add(Payment(member_id=1, amount=5, paid_at=day, method='cash'))
+    db.session.commit()
+    assert timeseries.series('payments', 'week', date(2024, 3, 4), date(2024, 3, 18)) == \
+        [(date(2024, 3, 4), 1), (date(2024, 3, 11), 1)]
+
+
+def test_timeseries_endpoint(client, admin, seeded, login):
+    login(admin)
+    today = date.today()
+    resp = client.get(f'/api/dashboard/timeseries?metric=rentals_started&granularity=week'
+                      f'&from={(today - timedelta(weeks=20)).isoformat()}&to={today.isoformat()}')
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert len(data['buckets']) == len(data['labels']) == len(data['values']) == 21
+    assert sum(data['values']) == Rental.query.filter(
+        Rental.start_date >= date.fromisoformat(data['buckets'][0]), Rental.start_date <= today).count()
+
+
+@pytest.mark.parametrize('query', ['metric=nope', 'granularity=hour', 'from=gisteren',
+                                   'from=2024-02-01&to=2024-01-01', 'from=2000-01-01&granularity=day'])
+def test_timeseries_endpoint_rejects_bad_arguments(client, admin, query, login):
+    login(admin)
+    resp = client.get('/api/dashboard/timeseries?' + query)
+    assert resp.status_code == 400
+    assert 'error' in resp.get_json()
@@ -0,0 +1,161 @@
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+import email
+import json
+import os
+
+from app import tasks
+from app.extensions import db
+from app.models import Bike, Child, ExpiringRental, Member, Rental
+from app.speciaal_algoritme import get_upcoming_rentals, get_upcoming_rentals_for_popup
+
+
+def _expiring(seeded):
+    """Laat een deel van de actieve verhuringen binnen het venster aflopen, ook op de randen."""
+    today = date.today()
+    active = Rental.query.filter_by(status='active').order_by(Rental.rental_id).all()
+    for i, rental in enumerate(active):
+        rental.end_date = today + timedelta(days=[-1, 0, 5, 30, 31, 12][i % 6])
+    db.session.commit()
+    return today, active
+
+
+def test_window_and_order(seeded):
+    today, active = _expiring(seeded)
+    expected = sorted(
+        (r for r in active if r.child_id and 0 <= (r.end_date - today).days <= 30),
+        key=lambda r: (r.end_date, r.rental_id),
+    )
+    result = get_upcoming_rentals(30)
+    assert [row['rental_id'] for row in result] == [r.rental_id for r in expected]
+    assert {row['days_left'] for row in result} <= {0, 5, 12, 30}
+
+    first, rental = result[0], expected[0]
+    assert first['parent_name'] == f'{rental.member.first_name} {rental.member.last_name}'
+    assert first['child_name'] == f'{rental.child.first_name} {rental.child.last_name}'
+    assert first['bike_name'] == rental.bike.name
+
+
+def test_limit_and_single_query(seeded):
+    _expiring(seeded)
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        limited = get_upcoming_rentals(30, limit=2)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert [r['rental_id'] for r in limited] == [r['rental_id'] for r in get_upcoming_rentals(30)][:2]
+    assert len(statements) == 1 and 'LIMIT' in statements[0]
+
+
+def test_bike_without_name_falls_back(app):
+    member = Member(first_name='Ouder', last_name='Test')
+    db.session.add(member)
+    db.session.flush()
+    child = Child(member_id=member.member_id, first_name='Kind', last_name='Test')
+    bike = Bike(name='', type='gewoon')
+    db.session.add_all([child, bike])
+    db.session.flush()
+    db.session.add(Rental(bike_id=bike.bike_id, member_id=member.member_id, child_id=child.child_id,
+                          end_date=date.today() + timedelta(days=3)))
+    db.session.commit()
+
+    payload = get_upcoming_rentals_for_popup(30)
+    assert payload['count'] == 1
+    assert payload['items'][0]['bike_name'] == 'Onbekend'
+    assert payload['items'][0]['days_left'] == 3
+
+
+def test_popup_served_from_todays_snapshot(seeded):
+    _expiring(seeded)
+    live = get_upcoming_rentals_for_popup(30)
+    assert live['source'] == 'live'
+
+    assert tasks.refresh_expiring_snapshot() == live['count']
+    snapshot = get_upcoming_rentals_for_popup(30)
+    assert snapshot['source'] == 'snapshot'
+    assert snapshot['items'] == live['items']
+    assert [r['rental_id'] for r in get_upcoming_rentals_for_popup(7)['items']] == \
+        [r['rental_id'] for r in live['items'] if r['days_left'] <= 7]
+
+    # Teruggebracht na de snapshot: niet meer tonen
+    returned = db.session.get(Rental, live['items'][0]['rental_id'])
+    returned.status = 'returned'
+    db.session.commit()
+    assert returned.rental_id not in [r['rental_id'] for r in get_upcoming_rentals_for_popup(30)['items']]
+
+
+def test_rental_created_after_snapshot_is_shown(seeded):
+    today, _ = _expiring(seeded)
+    tasks.refresh_expiring_snapshot()
+    assert get_upcoming_rentals_for_popup(30)['source'] == 'snapshot'
+
+    bike = Bike(name='Nieuw na snapshot')
+    db.session.add(bike)
+    db.session.flush()
+    child = Child.query.first()
+    rental = Rental(bike_id=bike.bike_id, member_id=child.member_id, child_id=child.child_id,
+                    end_date=today + timedelta(days=2))
+    db.session.add(rental)
+    db.session.commit()
+
+    payload = get_upcoming_rentals_for_popup(30)
+    assert payload['source'] == 'live'
+    assert rental.rental_id in [r['rental_id'] for r in payload['items']]
+    # De volgende snapshot neemt haar op
+    tasks.refresh_expiring_snapshot()
+    payload = get_upcoming_rentals_for_popup(30)
+    assert payload['source'] == 'snapshot' and rental.rental_id in [r['rental_id'] for r in payload['items']]
+
+
+def test_bulk_rental_update_drops_snapshot(seeded):
+    _expiring(seeded)
+    tasks.refresh_expiring_snapshot()
+    Rental.query.filter(Rental.status == 'active').update({'end_date': date.today() + timedelta(days=1)})
+    db.session.commit()
+    assert get_upcoming_rentals_for_popup(30)['source'] == 'live'
+
+
+def test_stale_snapshot_falls_back_to_live(seeded):
+    _expiring(seeded)
+    tasks.refresh_expiring_snapshot(date.today() - timedelta(days=1))
+    assert get_upcoming_rentals_for_popup(30)['source'] == 'live'
+
+
+def test_digest_groups_children_per_parent(seeded, tmp_path):
+    today, _ = _expiring(seeded)
+    # Tweede kind van dezelfde ouder laat ook binnen het venster aflopen
+    member = next(m for m in seeded['members'] if len(m.children) == 2)
+    for child in member.children:
+        for rental in Rental.query.filter_by(child_id=child.child_id, status='active'):
+            rental.end_date = today + timedelta(days=3)
+    db.session.commit()
+
+    result = tasks.send_expiring_digest(today, str(tmp_path))
+    rows = ExpiringRental.query.all()
+    assert result['rentals'] == len(rows)
+    assert result['digests'] == len({r.member_id for r in rows})
+    assert {r.window_days for r in rows} <= {7, 14, 30}
+
+    with open(os.path.join(result['path'], 'digest.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    digest = next(d for d in data['digests'] if d['member_id'] == member.member_id)
+    assert len(digest['items']) == Rental.query.filter(
+        Rental.member_id == member.member_id, Rental.status == 'active',
+        Rental.end_date.between(today, today + timedelta(days=30))).count()
+
+    with open(os.path.join(result['path'], f'{member.member_id}.eml'), 'rb') as f:
+        message = email.message_from_bytes(f.read())
+    assert message['To'] == member.email
+    body = message.get_payload(decode=True).decode()
+    assert all(item['child_name'] in body for item in digest['items'])
+
+
+def test_expiring_digest_command(app, seeded, tmp_path):
+    _expiring(seeded)
+    result = app.test_cli_runner().invoke(args=['expiring-digest', '--outbox', str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    assert os.path.isfile(os.path.join(tmp_path, date.today().isoformat(), 'digest.json'))